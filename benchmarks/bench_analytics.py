@@ -0,0 +1,169 @@
+"""Benchmark vectorized CGM analytics against a pure-Python reference.
+
+Usage::
+
+    python benchmarks/bench_analytics.py --days 90 --patients 20
+
+Generates synthetic 5-minute series, checks that both implementations agree
+and prints the time each takes per report.
+"""
+
+import argparse
+import math
+import statistics
+import time
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from sweetwatch.services.analytics import (
+    AGP_PERCENTILES,
+    HIGH,
+    LOW,
+    VERY_HIGH,
+    VERY_LOW,
+    GlucoseSeries,
+    agp,
+    compute_stats,
+)
+
+
+def synthetic_series(days: int, seed: int) -> GlucoseSeries:
+    """5-minute readings with a daily cycle, meal spikes and sensor noise."""
+    rng = np.random.default_rng(seed)
+    start = int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp())
+    times = start + np.arange(days * 288, dtype=np.int64) * 300
+    hours = (times % 86400) / 3600
+    values = (
+        130
+        + 35 * np.sin(2 * np.pi * hours / 24)
+        + 25 * np.sin(2 * np.pi * hours / 5)
+        + rng.normal(0, 12, times.size).cumsum() * 0.05
+        + rng.normal(0, 6, times.size)
+    )
+    return GlucoseSeries(times, np.clip(np.round(values), 40, 400))
+
+
+# --- Pure-Python reference -------------------------------------------------
+
+
+def reference_stats(times: list[int], values: list[float]) -> dict[str, float | None]:
+    n = len(values)
+    mean = sum(values) / n
+    sd = statistics.stdev(values)
+    ranges = [0] * 5
+    lbgi = hbgi = 0.0
+    for v in values:
+        if v < VERY_LOW:
+            ranges[0] += 1
+        elif v < LOW:
+            ranges[1] += 1
+        elif v <= HIGH:
+            ranges[2] += 1
+        elif v <= VERY_HIGH:
+            ranges[3] += 1
+        else:
+            ranges[4] += 1
+        f = 1.509 * (math.log(v) ** 1.084 - 5.381)
+        if f < 0:
+            lbgi += 10 * f * f
+        elif f > 0:
+            hbgi += 10 * f * f
+
+    deduped = [values[0]]
+    for v in values[1:]:
+        if v != deduped[-1]:
+            deduped.append(v)
+    extrema = [deduped[0]]
+    for prev, cur, nxt in zip(deduped, deduped[1:], deduped[2:]):
+        if (cur > prev) != (nxt > cur):
+            extrema.append(cur)
+    extrema.append(deduped[-1])
+    swings = [abs(b - a) for a, b in zip(extrema, extrema[1:]) if abs(b - a) > sd]
+
+    return {
+        "mean": mean,
+        "sd": sd,
+        "cv": sd / mean * 100,
+        "gmi": 3.31 + 0.02392 * mean,
+        "mage": sum(swings) / len(swings) if swings else None,
+        "lbgi": lbgi / n,
+        "hbgi": hbgi / n,
+        "time_very_low": ranges[0] / n * 100,
+        "time_low": ranges[1] / n * 100,
+        "time_in_range": ranges[2] / n * 100,
+        "time_high": ranges[3] / n * 100,
+        "time_very_high": ranges[4] / n * 100,
+    }
+
+
+def _percentile(ordered: list[float], p: float) -> float:
+    # Linear interpolation, as numpy's default method
+    k = (len(ordered) - 1) * p / 100
+    lo = math.floor(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def reference_agp(
+    times: list[int], values: list[float], bin_minutes: int, tz: str
+) -> list[list[float] | None]:
+    zone = ZoneInfo(tz)
+    bins: list[list[float]] = [[] for _ in range(1440 // bin_minutes)]
+    for t, v in zip(times, values):
+        local = datetime.fromtimestamp(t, tz=zone)
+        bins[(local.hour * 60 + local.minute) // bin_minutes].append(v)
+    return [
+        [_percentile(sorted(b), p) for p in AGP_PERCENTILES] if b else None for b in bins
+    ]
+
+
+# --------------------------------------------------------------------------
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--patients", type=int, default=10)
+    parser.add_argument("--bin-minutes", type=int, default=15)
+    parser.add_argument("--tz", default="Europe/Warsaw")
+    args = parser.parse_args()
+
+    series = [synthetic_series(args.days, seed) for seed in range(args.patients)]
+    as_lists = [(s.times.tolist(), s.values.tolist()) for s in series]
+
+    compute_stats(series[0]), agp(series[0], args.bin_minutes, args.tz)  # warm up
+    started = time.perf_counter()
+    vectorized = [(compute_stats(s), agp(s, args.bin_minutes, args.tz)) for s in series]
+    vectorized_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    reference = [
+        (reference_stats(t, v), reference_agp(t, v, args.bin_minutes, args.tz))
+        for t, v in as_lists
+    ]
+    reference_time = time.perf_counter() - started
+
+    for (stats, profile), (ref_stats, ref_agp) in zip(vectorized, reference):
+        for name, expected in ref_stats.items():
+            actual = getattr(stats, name)
+            assert (actual is None) == (expected is None), name
+            if expected is not None:
+                assert math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-9), name
+        for i, expected_row in enumerate(ref_agp):
+            row = [profile.percentiles[p][i] for p in AGP_PERCENTILES]
+            if expected_row is None:
+                assert all(math.isnan(v) for v in row)
+            else:
+                assert np.allclose(row, expected_row), i
+
+    readings = sum(len(s) for s in series)
+    print(f"{args.patients} patients x {args.days} days ({readings} readings)")
+    print(f"  numpy:       {vectorized_time * 1000 / args.patients:8.2f} ms/report")
+    print(f"  pure Python: {reference_time * 1000 / args.patients:8.2f} ms/report")
+    print(f"  speedup:     {reference_time / vectorized_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
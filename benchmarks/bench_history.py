@@ -0,0 +1,126 @@
+"""Benchmark the raw history response path, per-row models vs column tuples.
+
+Usage::
+
+    python benchmarks/bench_history.py --rows 1000 --repeat 200
+
+Loads readings into an in-memory SQLite database, then times the old path
+(ORM rows, one ``GlucoseResponse`` per row, FastAPI's JSON encoder) against
+the fast path (column tuples encoded by ``history_json``), both with and
+without the query. Checks that both produce the same bytes and prints rows
+per second.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from sweetwatch.api.schemas import GlucoseHistoryResponse, GlucoseResponse
+from sweetwatch.api.serialization import history_json
+from sweetwatch.models.glucose import Base, GlucoseReading
+
+COLUMNS = (GlucoseReading.id, GlucoseReading.value, GlucoseReading.trend, GlucoseReading.timestamp)
+
+
+def model_path(readings: list[GlucoseReading]) -> bytes:
+    # What get_glucose_history did before the fast path
+    response = GlucoseHistoryResponse(
+        readings=[
+            GlucoseResponse(id=r.id, value=r.value, trend=r.trend or 3, timestamp=r.timestamp)
+            for r in readings
+        ],
+        count=len(readings),
+    )
+    return JSONResponse(jsonable_encoder(response)).body
+
+
+async def timed(fn: Callable[[], Awaitable[bytes]], repeat: int) -> tuple[float, bytes]:
+    body = await fn()  # warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    return (time.perf_counter() - started) / repeat, body
+
+
+async def run(rows: int, repeat: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    rng = random.Random(0)
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    async with sessions() as db:
+        db.add_all(
+            GlucoseReading(
+                patient_id="bench",
+                value=float(rng.randint(40, 400)),
+                trend=rng.choice((None, 1, 2, 3, 4, 5)),
+                timestamp=now - timedelta(minutes=i),
+            )
+            for i in range(rows)
+        )
+        await db.commit()
+
+    newest_first = GlucoseReading.timestamp.desc()
+
+    async def fetch_models(db: AsyncSession) -> list[GlucoseReading]:
+        return list(await db.scalars(select(GlucoseReading).order_by(newest_first)))
+
+    async def fetch_rows(db: AsyncSession) -> list[tuple]:
+        return [tuple(row) for row in await db.execute(select(*COLUMNS).order_by(newest_first))]
+
+    async with sessions() as db:
+        readings = await fetch_models(db)
+        tuples = await fetch_rows(db)
+
+    async def old_query() -> bytes:
+        async with sessions() as db:
+            return model_path(await fetch_models(db))
+
+    async def new_query() -> bytes:
+        async with sessions() as db:
+            return history_json(await fetch_rows(db))
+
+    async def old_encode() -> bytes:
+        return model_path(readings)
+
+    async def new_encode() -> bytes:
+        return history_json(tuples)
+
+    results = {}
+    for name, fn in [
+        ("encode, models + json", old_encode),
+        ("encode, tuples + orjson", new_encode),
+        ("query + encode, models", old_query),
+        ("query + encode, tuples", new_query),
+    ]:
+        results[name] = await timed(fn, repeat)
+    await engine.dispose()
+
+    bodies = {body for _, body in results.values()}
+    assert len(bodies) == 1, "fast path output differs from the model path"
+
+    print(f"{rows} rows, {len(bodies.pop())} bytes per response")
+    for name, (seconds, _) in results.items():
+        print(f"  {name:26} {seconds * 1000:8.2f} ms  {rows / seconds:12,.0f} rows/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
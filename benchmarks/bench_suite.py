@@ -0,0 +1,478 @@
+"""Reproducible benchmark suite over synthetic CGM data.
+
+Usage::
+
+    python benchmarks/bench_suite.py --patients 4 --days 30 --json results.json
+    python benchmarks/bench_suite.py --interval 1 --days 730 --repeat 20
+
+Generates deterministic readings with ``sweetwatch.synthetic``, loads them
+through ``fetch_and_store`` and times the hot paths:
+
+* ``store.*``: bulk load in one-day batches, then steady-state syncs that
+  each bring one new reading per patient
+* ``service.*``: ``get_current``, ``get_history`` and ``get_history_rows``,
+  with the hot-window cache cold and warm
+* ``api.*``: ``/current`` and ``/history`` (raw and downsampled) through
+  the ASGI app, in-process
+* ``parse.*``: LibreLinkUp and Nightscout sources on canned payloads
+
+Each backend runs in its own interpreter, configured through
+``DATABASE_URL`` exactly like the app. SQLite runs in a temporary
+directory. Postgres runs too when ``SWEETWATCH_BENCH_POSTGRES_URL`` (or
+``--database-url``) points at an empty database; the suite creates its
+tables there and refuses databases that already hold readings. Results
+are printed and, with ``--json``, written with the run's parameters and
+environment so runs can be compared.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+POSTGRES_ENV = "SWEETWATCH_BENCH_POSTGRES_URL"
+
+# Steady-state syncs fetch this many readings per patient, like the scheduler
+SYNC_COUNT = 50
+
+# Reads are scoped to one patient; this is the first generated one
+BENCH_PATIENT = "bench-0"
+
+
+def summarize(name: str, samples: list[float], rows: int = 0) -> dict[str, Any]:
+    """Latency statistics (ms) for one benchmark; ``rows`` per call adds rows/s."""
+    ordered = sorted(samples)
+    mean = statistics.fmean(ordered)
+    result: dict[str, Any] = {
+        "name": name,
+        "calls": len(ordered),
+        "mean_ms": mean * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000,
+        "min_ms": ordered[0] * 1000,
+    }
+    if rows:
+        result["rows_per_call"] = rows
+        result["rows_per_s"] = rows / mean
+    return result
+
+
+async def timed(fn: Callable[[], Awaitable[Any]], repeat: int, warmup: int = 3) -> list[float]:
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def canned_source(batches: list[list[Any]]) -> Any:
+    """A source returning ``batches`` one per call, filtered by watermark."""
+    from sweetwatch.sources.base import CGMSource, as_utc
+
+    class CannedSource(CGMSource):
+        reading_interval = 300.0
+
+        async def get_current(self) -> Any:
+            return None
+
+        async def get_entries(self, count: int = 10, since: Any = None) -> list[Any]:
+            batch = batches.pop(0) if batches else []
+            since = since or {}
+            return [
+                entry
+                for entry in batch
+                if entry.patient_id not in since
+                or entry.timestamp > as_utc(since[entry.patient_id])
+            ]
+
+        async def close(self) -> None:
+            pass
+
+    return CannedSource()
+
+
+async def bench_store(args: argparse.Namespace, end: datetime) -> list[dict[str, Any]]:
+    from sweetwatch import synthetic
+    from sweetwatch.db.engine import AsyncSessionLocal
+    from sweetwatch.services.glucose import GlucoseService, glucose_service
+
+    profiles = synthetic.patient_profiles(args.patients, args.interval, args.seed, "bench")
+    # The newest stretch is held back and revealed one reading per steady-state sync
+    tail = timedelta(minutes=args.interval * (args.repeat + 3 + SYNC_COUNT))
+    split = end - tail
+    start = end - timedelta(days=args.days)
+
+    series = {p.patient_id: synthetic.entries(p, split - timedelta(days=1), end) for p in profiles}
+    days = [synthetic.iter_entries(p, start, split) for p in profiles]
+    load_batches = [
+        [entry for per_patient in batch for entry in per_patient] for batch in _zip_longest(days)
+    ]
+    rows = sum(len(batch) for batch in load_batches)
+
+    # Shares the global cache like per-account services, so api.* sees the same state
+    service = GlucoseService(
+        source=canned_source(load_batches),
+        patient_id="bench",
+        cache=glucose_service.cache,
+        broadcaster=glucose_service.broadcaster,
+        predictor=glucose_service.predictor,
+    )
+    load_samples = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(len(load_batches)):
+            started = time.perf_counter()
+            await service.fetch_and_store(db, count=SYNC_COUNT)
+            load_samples.append(time.perf_counter() - started)
+    results = [summarize("store.load_day", load_samples, rows // max(len(load_batches), 1))]
+
+    cursor = {pid: sum(e.timestamp < split for e in entries) for pid, entries in series.items()}
+
+    def next_batch() -> list[Any]:
+        batch = []
+        for pid, entries in series.items():
+            cursor[pid] += 1
+            batch += entries[max(cursor[pid] - SYNC_COUNT, 0) : cursor[pid]]
+        return batch
+
+    steady: list[list[Any]] = []
+    service._source = canned_source(steady)
+    async with AsyncSessionLocal() as db:
+
+        async def sync() -> None:
+            steady.append(next_batch())
+            await service.fetch_and_store(db, count=SYNC_COUNT)
+
+        samples = await timed(sync, args.repeat)
+    results.append(summarize("store.sync_one_new", samples, args.patients))
+    return results
+
+
+def _zip_longest(iterators: list[Any]) -> Any:
+    iterators = list(iterators)
+    while iterators:
+        batch = []
+        for it in list(iterators):
+            try:
+                batch.append(next(it))
+            except StopIteration:
+                iterators.remove(it)
+        if batch:
+            yield batch
+
+
+async def bench_service(args: argparse.Namespace) -> list[dict[str, Any]]:
+    from sweetwatch.db.engine import AsyncSessionLocal
+    from sweetwatch.services.glucose import glucose_service
+
+    results = []
+    pid = BENCH_PATIENT
+    cases: list[tuple[str, Callable[[Any], Awaitable[Any]]]] = [
+        ("get_current", lambda db: glucose_service.get_current(db, pid)),
+        ("get_history_24h", lambda db: glucose_service.get_history(db, 24, 288, pid)),
+        ("get_history_7d", lambda db: glucose_service.get_history(db, 168, 1000, pid)),
+        ("get_history_rows_24h", lambda db: glucose_service.get_history_rows(db, 24, 288, pid)),
+        ("get_history_rows_7d", lambda db: glucose_service.get_history_rows(db, 168, 1000, pid)),
+    ]
+    async with AsyncSessionLocal() as db:
+        for warm in (False, True):
+            if warm:
+                await glucose_service.warm_cache(db)
+            else:
+                glucose_service.cache.clear()
+            for name, fn in cases:
+                rows = await fn(db)
+                count = len(rows) if isinstance(rows, list) else 1
+                samples = await timed(lambda: fn(db), args.repeat)
+                state = "warm" if warm else "cold"
+                results.append(summarize(f"service.{name}.{state}", samples, count))
+    return results
+
+
+async def bench_api(args: argparse.Namespace) -> list[dict[str, Any]]:
+    import httpx
+
+    from sweetwatch.api.main import app
+    from sweetwatch.db.engine import AsyncSessionLocal
+    from sweetwatch.services.glucose import glucose_service
+
+    # In-process ASGI on this loop, so the numbers exclude a client thread hop
+    paths = {
+        "current": f"/api/glucose/current?patient_id={BENCH_PATIENT}",
+        "history_24h": f"/api/glucose/history?hours=24&patient_id={BENCH_PATIENT}",
+        "history_7d": f"/api/glucose/history?hours=168&limit=1000&patient_id={BENCH_PATIENT}",
+        "history_90d_1h": (
+            f"/api/glucose/history?hours=2160&resolution=1h&patient_id={BENCH_PATIENT}"
+        ),
+        "history_1y_1d": (
+            f"/api/glucose/history?hours=8784&resolution=1d&patient_id={BENCH_PATIENT}"
+        ),
+    }
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for warm in (False, True):
+            if warm:
+                async with AsyncSessionLocal() as db:
+                    await glucose_service.warm_cache(db)
+            else:
+                glucose_service.cache.clear()
+            for name, path in paths.items():
+
+                async def get() -> None:
+                    response = await client.get(path)
+                    response.raise_for_status()
+
+                samples = await timed(get, args.repeat)
+                body = (await client.get(path)).json()
+                rows = body.get("count", 1)
+                state = "warm" if warm else "cold"
+                results.append(summarize(f"api.{name}.{state}", samples, rows))
+    return results
+
+
+async def bench_parse(args: argparse.Namespace, end: datetime) -> list[dict[str, Any]]:
+    import httpx
+
+    from sweetwatch import synthetic
+    from sweetwatch.sources.librelinkup import LibreLinkUpSource
+    from sweetwatch.sources.nightscout import NightscoutSource
+
+    profiles = synthetic.patient_profiles(args.patients, 1, args.seed, "llu")
+    # LibreLinkUp graphs span the last 12 hours
+    graphs = {
+        p.patient_id: synthetic.librelinkup_graph(
+            synthetic.entries(p, end - timedelta(hours=12), end, tag=False)
+        )
+        for p in profiles
+    }
+    newest = {pid: graph["data"]["graphData"][-1] for pid, graph in graphs.items()}
+
+    def llu(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/llu/auth/login":
+            auth = {"authTicket": {"token": "t", "expires": 2**31}, "user": {"id": "u"}}
+            return httpx.Response(200, json={"status": 0, "data": auth})
+        if request.url.path == "/llu/connections":
+            return httpx.Response(200, json={"data": [{"patientId": pid} for pid in graphs]})
+        return httpx.Response(200, json=graphs[request.url.path.split("/")[3]])
+
+    source = LibreLinkUpSource("bench", "bench")
+    source._http = httpx.AsyncClient(transport=httpx.MockTransport(llu))
+    rows = sum(len(g["data"]["graphData"]) for g in graphs.values())
+    results = [
+        summarize(
+            "parse.librelinkup_full",
+            await timed(lambda: source.get_entries(count=rows), args.repeat),
+            rows,
+        )
+    ]
+    # Steady state: everything but the newest item is behind the watermark
+    since = {
+        pid: source._parse_timestamp(item["FactoryTimestamp"]) - timedelta(seconds=1)
+        for pid, item in newest.items()
+    }
+    results.append(
+        summarize(
+            "parse.librelinkup_watermark",
+            await timed(lambda: source.get_entries(count=rows, since=since), args.repeat),
+            len(graphs),
+        )
+    )
+    await source.close()
+
+    profile = synthetic.patient_profiles(1, 5, args.seed, "ns")[0]
+    page = synthetic.nightscout_entries(
+        synthetic.entries(profile, end - timedelta(days=5), end, tag=False)[-1000:]
+    )
+
+    def nightscout(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=page)
+
+    ns = NightscoutSource("http://nightscout.bench", "secret")
+    ns._http = httpx.AsyncClient(
+        transport=httpx.MockTransport(nightscout), base_url="http://nightscout.bench"
+    )
+
+    async def parse_only() -> None:
+        NightscoutSource._parse_entries(page)
+
+    results.append(
+        summarize("parse.nightscout_page", await timed(parse_only, args.repeat), len(page))
+    )
+    results.append(
+        summarize(
+            "parse.nightscout_fetch",
+            await timed(lambda: ns.get_entries(count=len(page)), args.repeat),
+            len(page),
+        )
+    )
+    await ns.close()
+    return results
+
+
+async def prepare_database() -> str | None:
+    """Migrate the schema; a reason to skip when the database is unusable."""
+    from sqlalchemy import func, select
+
+    from sweetwatch.db import migrate
+    from sweetwatch.db.engine import AsyncSessionLocal
+    from sweetwatch.models.glucose import GlucoseReading
+
+    try:
+        await asyncio.to_thread(migrate.upgrade)
+        async with AsyncSessionLocal() as db:
+            existing = await db.scalar(select(func.count()).select_from(GlucoseReading))
+    except Exception as e:
+        return f"database unavailable: {type(e).__name__}: {e}"
+    if existing:
+        return f"database already holds {existing} readings; use an empty one"
+    return None
+
+
+async def run_backend(args: argparse.Namespace) -> dict[str, Any]:
+    from sqlalchemy.engine import make_url
+
+    backend = make_url(os.environ["DATABASE_URL"]).get_backend_name()
+    report: dict[str, Any] = {"backend": backend, "results": []}
+    try:
+        from sweetwatch.db.engine import async_engine
+    except ImportError as e:
+        report["skipped"] = f"database driver missing: {e}"
+        return report
+    if reason := await prepare_database():
+        report["skipped"] = reason
+        return report
+
+    end = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    started = time.perf_counter()
+    report["results"] += await bench_store(args, end)
+    report["results"] += await bench_service(args)
+    report["results"] += await bench_api(args)
+    report["results"] += await bench_parse(args, end)
+    report["seconds"] = time.perf_counter() - started
+    await async_engine.dispose()
+    return report
+
+
+def run_worker(args: argparse.Namespace) -> None:
+    """Benchmark the database in ``DATABASE_URL`` and print the report as JSON."""
+    import logging
+
+    logging.disable(logging.WARNING)
+    report = asyncio.run(run_backend(args))
+    print(json.dumps(report))
+
+
+def run_isolated(url: str, args: argparse.Namespace) -> dict[str, Any]:
+    """Run one backend in a fresh interpreter, so settings and engines start clean."""
+    argv = [
+        sys.executable,
+        __file__,
+        "--worker",
+        f"--patients={args.patients}",
+        f"--days={args.days}",
+        f"--interval={args.interval}",
+        f"--repeat={args.repeat}",
+        f"--seed={args.seed}",
+    ]
+    env = dict(os.environ, DATABASE_URL=url)
+    proc = subprocess.run(argv, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"Benchmark worker for {url.split(':')[0]} failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def environment() -> dict[str, Any]:
+    import numpy
+    import sqlalchemy
+
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except OSError:
+        revision = ""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "numpy": numpy.__version__,
+        "git_revision": revision or None,
+    }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    print(f"\n[{report['backend']}]")
+    if "skipped" in report:
+        print(f"  skipped: {report['skipped']}")
+        return
+    for r in report["results"]:
+        rate = f"{r['rows_per_s']:12,.0f} rows/s" if "rows_per_s" in r else ""
+        print(f"  {r['name']:36} p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  {rate}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--patients", type=int, default=4)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--interval", type=int, choices=(1, 5), default=5, help="minutes")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--database-url",
+        action="append",
+        help="benchmark this database (repeatable); default: temporary SQLite, "
+        f"plus ${POSTGRES_ENV} when set",
+    )
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="sweetwatch-bench-") as tmp:
+        urls = args.database_url or [f"sqlite:///{tmp}/bench.db"]
+        if not args.database_url and os.environ.get(POSTGRES_ENV):
+            urls.append(os.environ[POSTGRES_ENV])
+        reports = []
+        for url in urls:
+            reports.append(run_isolated(url, args))
+            print_report(reports[-1])
+
+    if args.json:
+        output = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "parameters": {
+                "patients": args.patients,
+                "days": args.days,
+                "interval_minutes": args.interval,
+                "repeat": args.repeat,
+                "seed": args.seed,
+            },
+            "environment": environment(),
+            "backends": reports,
+        }
+        args.json.write_text(json.dumps(output, indent=2) + "\n", encoding="utf-8")
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,8 @@
 """SweetWatch - Open source CGM monitoring with AI agent and Garmin integration."""
 
+import time
+
 __version__ = "0.1.0"
+
+# Start of the import, for the startup profile
+IMPORT_STARTED = time.perf_counter()
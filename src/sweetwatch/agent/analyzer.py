@@ -1,32 +1,209 @@
-"""AI agent for CGM trend analysis and predictions."""
+"""AI agent for CGM trend analysis."""
 
-import anthropic
+import asyncio
+import hashlib
+import statistics
+import time
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from sweetwatch.config import settings
+
+if TYPE_CHECKING:
+    import anthropic
+
+DEFAULT_MODEL = "claude-sonnet-4-20250514"
+
+# Bump whenever the prompt or window compression changes, so cached
+# answers produced by the old prompt are not served
+PROMPT_VERSION = 2
+
+# Windows up to this many readings are sent verbatim
+MAX_RAW_READINGS = 24
+# Readings kept verbatim at the end of a compressed window
+RECENT_READINGS = 6
+# Swings smaller than this (mg/dL) are not reported as inflection points;
+# the threshold doubles until at most MAX_INFLECTIONS remain
+MIN_SWING = 15.0
+MAX_INFLECTIONS = 16
+
+Reading = Mapping[str, Any]
+
+
+def _line(reading: Reading) -> str:
+    return f"  {reading['timestamp']}: {reading['value']:.0f} mg/dL"
+
+
+def _inflection_points(readings: Sequence[Reading], min_swing: float) -> list[Reading]:
+    """Local peaks and nadirs separated by at least ``min_swing`` mg/dL."""
+    points = [readings[0]]
+    direction = 0
+    for reading in readings[1:]:
+        delta = reading["value"] - points[-1]["value"]
+        if direction and (delta > 0) == (direction > 0):
+            # Still moving the same way: extend the current excursion
+            points[-1] = reading
+        elif abs(delta) >= min_swing:
+            direction = 1 if delta > 0 else -1
+            points.append(reading)
+    return points[1:-1] if len(points) > 2 else []
+
+
+def compress_window(readings: Sequence[Reading]) -> str:
+    """Prompt text for a window: verbatim when short, otherwise a compact summary.
+
+    Long windows become summary statistics, the peaks and nadirs between
+    them, and the last few readings for the current trend.
+    """
+    if len(readings) <= MAX_RAW_READINGS:
+        return "Readings:\n" + "\n".join(_line(r) for r in readings)
+
+    values = [float(r["value"]) for r in readings]
+    n = len(values)
+    low = min(range(n), key=values.__getitem__)
+    high = max(range(n), key=values.__getitem__)
+    below = sum(v < 70 for v in values)
+    above = sum(v > 180 for v in values)
+    lines = [
+        f"Summary of {n} readings from {readings[0]['timestamp']} to {readings[-1]['timestamp']}:",
+        f"  mean {statistics.fmean(values):.0f} mg/dL, SD {statistics.stdev(values):.0f}",
+        f"  min {values[low]:.0f} at {readings[low]['timestamp']}, "
+        f"max {values[high]:.0f} at {readings[high]['timestamp']}",
+        f"  time below 70: {below / n:.0%}, in 70-180: {(n - below - above) / n:.0%}, "
+        f"above 180: {above / n:.0%}",
+    ]
+    min_swing = MIN_SWING
+    inflections = _inflection_points(readings, min_swing)
+    while len(inflections) > MAX_INFLECTIONS:
+        min_swing *= 2
+        inflections = _inflection_points(readings, min_swing)
+    if inflections:
+        lines.append("Peaks and nadirs:")
+        lines.extend(_line(r) for r in inflections)
+    lines.append("Most recent readings:")
+    lines.extend(_line(r) for r in readings[-RECENT_READINGS:])
+    return "\n".join(lines)
+
+
+def window_key(readings: Sequence[Reading], model: str) -> str:
+    """Cache key for a reading window under the current model and prompt."""
+    digest = hashlib.sha256(f"{model}|{PROMPT_VERSION}".encode())
+    for reading in readings:
+        ts = reading["timestamp"]
+        ts = ts.isoformat() if isinstance(ts, datetime) else str(ts)
+        digest.update(f"|{ts}={float(reading['value'])}".encode())
+    return digest.hexdigest()
+
+
+class AnalysisError(Exception):
+    """The model API call behind an analysis failed."""
 
 
 class GlucoseAnalyzer:
-    """Uses Claude API to analyze glucose trends and make predictions."""
+    """Uses Claude API for narrative insight into glucose trends.
 
-    def __init__(self, api_key: str) -> None:
-        self.client = anthropic.Anthropic(api_key=api_key)
+    Numeric forecasts come from ``sweetwatch.services.prediction``, which
+    runs locally on every reading. Answers are memoized per reading window
+    (LRU with a TTL) and concurrent requests for the same window share one
+    API call. The ``anthropic`` SDK is only imported once an analyzer is
+    built, keeping it out of startup for deployments without insights.
+    """
 
-    def analyze_trend(self, readings: list[dict]) -> str:
-        """Analyze a series of glucose readings and return insights."""
-        readings_text = "\n".join(
-            f"  {r['timestamp']}: {r['value']} mg/dL" for r in readings
-        )
-        message = self.client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=1024,
-            messages=[
-                {
-                    "role": "user",
-                    "content": (
-                        "You are a glucose trend analyst. Analyze the following CGM readings "
-                        "and provide: 1) current trend direction, 2) rate of change, "
-                        "3) prediction for next 30 minutes, 4) any alerts.\n\n"
-                        f"Readings:\n{readings_text}"
-                    ),
-                }
-            ],
-        )
+    def __init__(
+        self,
+        api_key: str,
+        model: str = DEFAULT_MODEL,
+        cache_ttl: float = 900,
+        cache_size: int = 128,
+        client: "anthropic.AsyncAnthropic | None" = None,
+    ) -> None:
+        if client is None:
+            import anthropic
+
+            client = anthropic.AsyncAnthropic(api_key=api_key)
+        self.client = client
+        self.model = model
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._pending: dict[str, asyncio.Future[str]] = {}
+        self.api_calls = 0
+
+    def _cached(self, key: str) -> str | None:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires, text = entry
+        if expires <= time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return text
+
+    def _store(self, key: str, text: str) -> None:
+        self._cache[key] = (time.monotonic() + self.cache_ttl, text)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def analyze_trend(self, readings: Sequence[Reading]) -> str:
+        """Analyze readings (dicts with ``timestamp`` and ``value``), oldest first.
+
+        Raises:
+            AnalysisError: If the API call fails.
+        """
+        key = window_key(readings, self.model)
+        if (cached := self._cached(key)) is not None:
+            return cached
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._analyze(readings))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        # Shield so one caller disconnecting doesn't cancel the shared call
+        text = await asyncio.shield(pending)
+        self._store(key, text)
+        return text
+
+    async def _analyze(self, readings: Sequence[Reading]) -> str:
+        import anthropic
+
+        self.api_calls += 1
+        try:
+            message = await self.client.messages.create(
+                model=self.model,
+                max_tokens=1024,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": (
+                            "You are a glucose trend analyst. Analyze the following CGM readings "
+                            "and provide: 1) current trend direction, 2) rate of change, "
+                            "3) any alerts.\n\n"
+                            f"{compress_window(readings)}"
+                        ),
+                    }
+                ],
+            )
+        except anthropic.APIError as e:
+            raise AnalysisError(str(e)) from e
         return message.content[0].text
+
+
+_analyzer: GlucoseAnalyzer | None = None
+
+
+def get_analyzer() -> GlucoseAnalyzer | None:
+    """Shared analyzer built from settings, or ``None`` without an API key."""
+    global _analyzer
+    if _analyzer is None and settings.anthropic_api_key:
+        _analyzer = GlucoseAnalyzer(
+            settings.anthropic_api_key,
+            model=settings.analyzer_model,
+            cache_ttl=settings.analyzer_cache_ttl,
+            cache_size=settings.analyzer_cache_size,
+        )
+    return _analyzer
@@ -1,14 +1,14 @@
 import logging
 from pathlib import Path
 
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, Response
 from fastapi.templating import Jinja2Templates
 
-from sweetwatch import __version__
+from sweetwatch import __version__, metrics
 from sweetwatch.api.routers.glucose import router as glucose_router
-from sweetwatch.db.engine import engine
-from sweetwatch.models.glucose import Base
+from sweetwatch.config import settings
+from sweetwatch.profiling import record_import
 from sweetwatch.tasks.sync import lifespan
 
 # Configure logging
@@ -17,9 +17,6 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 app = FastAPI(
     title="SweetWatch API",
     version=__version__,
@@ -30,16 +27,30 @@ app = FastAPI(
 # Include routers
 app.include_router(glucose_router)
 
+if settings.metrics_enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 # Setup templates
 templates_dir = Path(__file__).parent.parent / "templates"
 templates = Jinja2Templates(directory=str(templates_dir))
 
 
+record_import("import app")
+
+
 @app.get("/health")
 async def health() -> dict[str, str]:
     return {"status": "ok", "version": __version__}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    """Prometheus text exposition of request, upstream, sync and DB metrics."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request) -> HTMLResponse:
     """Serve the main dashboard."""
@@ -1,22 +1,76 @@
 """Glucose API endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+import asyncio
+import json
+import math
+import time
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import asdict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Literal
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from sweetwatch.api.schemas import GlucoseHistoryResponse, GlucoseResponse, SyncResponse
-from sweetwatch.db.engine import get_db
-from sweetwatch.services.glucose import glucose_service
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from sweetwatch.agent.analyzer import AnalysisError, get_analyzer
+from sweetwatch.api.schemas import (
+    AgpBinResponse,
+    AgpResponse,
+    BackfillRequest,
+    BackfillStatusResponse,
+    GlucoseAggregateResponse,
+    GlucoseBucketResponse,
+    GlucoseHistoryResponse,
+    GlucoseResponse,
+    GlucoseStatsResponse,
+    GlucoseSummaryResponse,
+    InsightResponse,
+    PatientsResponse,
+    PredictionResponse,
+    SchedulerStatusResponse,
+    SyncResponse,
+)
+from sweetwatch.api.serialization import history_json
+from sweetwatch.config import settings
+from sweetwatch.db.engine import AsyncSessionLocal, get_db
+from sweetwatch.models.glucose import GlucoseReading
+from sweetwatch.services.aggregates import RESOLUTIONS
+from sweetwatch.services.cache import CachedReading
+from sweetwatch.services.export import MEDIA_TYPES, ExportFormat, export_chunks, iter_partitions
+from sweetwatch.services.glucose import (
+    DataVersion,
+    GlucoseService,
+    SyncFreshness,
+    SyncResult,
+    glucose_service,
+)
+from sweetwatch.services.rollups import summarize
+from sweetwatch.services.watch import watch_payload
+from sweetwatch.sources.base import as_utc
+from sweetwatch.tasks.backfill import backfill_jobs, start_nightscout_backfill
 
 router = APIRouter(prefix="/api/glucose", tags=["glucose"])
 
+# History windows slide with the clock; validators treat windows whose start
+# falls in the same slot as equivalent (hence weak ETags)
+HISTORY_WINDOW_GRANULARITY = 300  # seconds
 
-@router.get("/current", response_model=GlucoseResponse)
-async def get_current_glucose(db: Session = Depends(get_db)) -> GlucoseResponse:
-    """Get the most recent glucose reading."""
-    reading = glucose_service.get_current(db)
-    if not reading:
-        raise HTTPException(status_code=404, detail="No glucose readings found")
+# Raw history stays capped at a week; downsampled history may span years
+MAX_RAW_HOURS = 168
+MAX_HISTORY_HOURS = 5 * 366 * 24
+MAX_BUCKETS = 10_000
+
+# Analytics load raw readings into memory; 90 days is the usual report span
+MAX_ANALYTICS_DAYS = 366
+
+# Readings fed to the LLM analyzer, compressed before prompting
+MAX_INSIGHT_READINGS = 1000
 
+
+def _to_response(reading: GlucoseReading | CachedReading) -> GlucoseResponse:
     return GlucoseResponse(
         id=reading.id,
         value=reading.value,
@@ -25,33 +79,490 @@ async def get_current_glucose(db: Session = Depends(get_db)) -> GlucoseResponse:
     )
 
 
-@router.get("/history", response_model=GlucoseHistoryResponse)
+def _sse_event(reading: GlucoseReading | CachedReading) -> str:
+    return f"event: reading\nid: {reading.id}\ndata: {_to_response(reading).model_dump_json()}\n\n"
+
+
+def _window_slot() -> int:
+    return int(time.time()) // HISTORY_WINDOW_GRANULARITY
+
+
+def _validator_headers(
+    version: DataVersion, *tag_parts: object, window_slot: int | None = None
+) -> dict[str, str]:
+    """ETag, Last-Modified and Cache-Control headers for a data version.
+
+    Last-Modified is when the newest row was stored, so backfilled history
+    moves it too. A sliding window also changes when its slot does, so for
+    windowed routes it is never earlier than the start of ``window_slot``.
+    """
+    etag = "-".join(str(part) for part in (version.last_id, *tag_parts))
+    last_modified = version.last_modified.replace(tzinfo=timezone.utc)
+    if window_slot is not None:
+        slot_start = datetime.fromtimestamp(
+            window_slot * HISTORY_WINDOW_GRANULARITY, tz=timezone.utc
+        )
+        last_modified = max(last_modified, slot_start)
+    return {
+        "ETag": f'W/"{etag}"',
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": f"private, max-age={settings.sync_interval_changing}",
+    }
+
+
+def _is_not_modified(request: Request, headers: dict[str, str]) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison, as required for GET
+        etag = headers["ETag"].removeprefix("W/")
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return parsedate_to_datetime(headers["Last-Modified"]) <= since
+    return False
+
+
+async def resolve_patient(db: AsyncSession, patient_id: str | None) -> str | None:
+    """Patient a read is scoped to, so readings of different patients never mix.
+
+    The requested patient, else ``DEFAULT_PATIENT_ID``, else the only stored
+    patient (``None`` while nothing is stored). With several patients and no
+    default the request must name one.
+    """
+    if patient_id:
+        return patient_id
+    if settings.default_patient_id:
+        return settings.default_patient_id
+    patients = await glucose_service.get_patient_ids(db)
+    if len(patients) > 1:
+        raise HTTPException(
+            status_code=422,
+            detail=f"patient_id is required; stored patients: {', '.join(patients)}",
+        )
+    return patients[0] if patients else None
+
+
+async def scoped_patient(
+    patient_id: str | None = None, db: AsyncSession = Depends(get_db)
+) -> str | None:
+    """Dependency form of ``resolve_patient`` for the ``patient_id`` query parameter."""
+    return await resolve_patient(db, patient_id)
+
+
+async def export_patient(
+    patient_id: str | None = None, all_patients: bool = False, db: AsyncSession = Depends(get_db)
+) -> str | None:
+    """``scoped_patient`` for exports; ``all_patients=true`` exports every patient instead."""
+    if not all_patients:
+        return await resolve_patient(db, patient_id)
+    if patient_id:
+        raise HTTPException(status_code=422, detail="patient_id and all_patients are exclusive")
+    return None
+
+
+async def _conditional(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    patient_id: str | None,
+    *tag_parts: object,
+    window_slot: int | None = None,
+) -> Response | None:
+    """Return a 304 response if the client copy is current, else set validators.
+
+    Validators follow the last row stored for ``patient_id``. ``window_slot``
+    marks routes over a window sliding with the clock; it is part of the
+    ETag and bounds Last-Modified.
+    """
+    version = await glucose_service.get_version(db, patient_id)
+    if version is None:
+        return None
+    tag_parts = (patient_id, *tag_parts)
+    if window_slot is not None:
+        tag_parts = (*tag_parts, window_slot)
+    headers = _validator_headers(version, *tag_parts, window_slot=window_slot)
+    if _is_not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+@router.get("/patients", response_model=PatientsResponse)
+async def get_patients(db: AsyncSession = Depends(get_db)) -> PatientsResponse:
+    """Stored patients; the default is ``DEFAULT_PATIENT_ID``, else the first of them."""
+    patients = await glucose_service.get_patient_ids(db)
+    default = settings.default_patient_id or (patients[0] if patients else None)
+    return PatientsResponse(patients=patients, default=default)
+
+
+@router.get("/current", response_model=GlucoseResponse)
+async def get_current_glucose(
+    request: Request,
+    response: Response,
+    patient_id: str | None = Depends(scoped_patient),
+    db: AsyncSession = Depends(get_db),
+) -> GlucoseResponse | Response:
+    """Get the most recent glucose reading."""
+    if not_modified := await _conditional(request, response, db, patient_id, "current"):
+        return not_modified
+
+    reading = await glucose_service.get_current(db, patient_id)
+    if not reading:
+        raise HTTPException(status_code=404, detail="No glucose readings found")
+
+    return _to_response(reading)
+
+
+@router.get("/watch")
+async def get_watch_payload(
+    request: Request,
+    response: Response,
+    hours: int = Query(default=3, ge=1, le=24),
+    points: int = Query(default=36, ge=0, le=288),
+    patient_id: str | None = Depends(scoped_patient),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """Current reading plus a sparkline in the compact watch format.
+
+    A positional integer array (schema in ``sweetwatch.services.watch`` and
+    the README), a fraction of the size of ``/current`` plus ``/history``.
+    Supports the same conditional requests as ``/current``. With no reading
+    in the last ``hours`` the last known one is sent, flagged stale.
+    """
+    if not_modified := await _conditional(
+        request, response, db, patient_id, "watch", hours, points, window_slot=_window_slot()
+    ):
+        return not_modified
+
+    readings: Sequence[GlucoseReading | CachedReading] = await glucose_service.get_history(
+        db, hours=hours, limit=hours * 60, patient_id=patient_id
+    )
+    stale = not readings
+    if stale:
+        current = await glucose_service.get_current(db, patient_id)
+        if current is None:
+            raise HTTPException(status_code=404, detail="No glucose readings found")
+        readings = [current]
+
+    return Response(
+        json.dumps(watch_payload(readings, points, stale), separators=(",", ":")),
+        media_type="application/json",
+        headers=dict(response.headers),
+    )
+
+
+@router.get("/history", response_model=GlucoseHistoryResponse | GlucoseAggregateResponse)
 async def get_glucose_history(
-    hours: int = Query(default=24, ge=1, le=168),
+    request: Request,
+    response: Response,
+    hours: int = Query(default=24, ge=1, le=MAX_HISTORY_HOURS),
     limit: int = Query(default=288, ge=1, le=1000),
-    db: Session = Depends(get_db),
-) -> GlucoseHistoryResponse:
-    """Get historical glucose readings."""
-    readings = glucose_service.get_history(db, hours=hours, limit=limit)
-
-    response_readings = [
-        GlucoseResponse(
-            id=r.id,
-            value=r.value,
-            trend=r.trend or 3,
-            timestamp=r.timestamp,
+    resolution: Literal["raw", "5m", "15m", "1h", "1d"] = "raw",
+    patient_id: str | None = Depends(scoped_patient),
+    db: AsyncSession = Depends(get_db),
+) -> GlucoseHistoryResponse | GlucoseAggregateResponse | Response:
+    """Get historical glucose readings.
+
+    ``resolution=raw`` returns individual readings (up to a week, ``limit``
+    rows). Other resolutions return mean/min/max/count per time bucket,
+    computed in SQL, for ranges up to several years.
+    """
+    if resolution == "raw" and hours > MAX_RAW_HOURS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"hours > {MAX_RAW_HOURS} requires a resolution other than raw",
+        )
+    if resolution != "raw" and hours * 3600 // RESOLUTIONS[resolution] > MAX_BUCKETS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Too many buckets; use a coarser resolution (max {MAX_BUCKETS})",
+        )
+
+    if not_modified := await _conditional(
+        request,
+        response,
+        db,
+        patient_id,
+        "history",
+        resolution,
+        hours,
+        limit,
+        window_slot=_window_slot(),
+    ):
+        return not_modified
+
+    if resolution != "raw":
+        buckets = await glucose_service.get_buckets(
+            db, hours=hours, bucket_seconds=RESOLUTIONS[resolution], patient_id=patient_id
+        )
+        return GlucoseAggregateResponse(
+            resolution=resolution,
+            buckets=[GlucoseBucketResponse(**asdict(bucket)) for bucket in buckets],
+            count=len(buckets),
         )
-        for r in readings
+
+    # Raw windows bypass per-row models; the bytes match GlucoseHistoryResponse
+    rows = await glucose_service.get_history_rows(
+        db, hours=hours, limit=limit, patient_id=patient_id
+    )
+    return Response(
+        history_json(rows), media_type="application/json", headers=dict(response.headers)
+    )
+
+
+@router.get("/summary", response_model=GlucoseSummaryResponse)
+async def get_glucose_summary(
+    days: int = Query(default=14, ge=1, le=3660),
+    patient_id: str | None = Depends(scoped_patient),
+    db: AsyncSession = Depends(get_db),
+) -> GlucoseSummaryResponse:
+    """Mean, SD, CV and time below/in/above range (70-180 mg/dL) from daily rollups.
+
+    Covers the last ``days`` UTC days including today; cost grows with days,
+    not with the number of readings.
+    """
+    return GlucoseSummaryResponse.model_validate(await summarize(db, days, patient_id))
+
+
+@router.get("/stats", response_model=GlucoseStatsResponse)
+async def get_glucose_stats(
+    days: int = Query(default=14, ge=1, le=MAX_ANALYTICS_DAYS),
+    patient_id: str | None = Depends(scoped_patient),
+    db: AsyncSession = Depends(get_db),
+) -> GlucoseStatsResponse:
+    """Time in ranges, GMI, CV, MAGE and LBGI/HBGI over the last ``days`` of readings."""
+    # NumPy is imported on the first analytics request, not at startup
+    from sweetwatch.services.analytics import compute_stats, load_series
+
+    stats = compute_stats(await load_series(db, days, patient_id))
+    return GlucoseStatsResponse(days=days, **asdict(stats))
+
+
+@router.get("/agp", response_model=AgpResponse)
+async def get_glucose_agp(
+    days: int = Query(default=14, ge=1, le=MAX_ANALYTICS_DAYS),
+    bin_minutes: int = Query(default=15, ge=5, le=60),
+    tz: str = "UTC",
+    patient_id: str | None = Depends(scoped_patient),
+    db: AsyncSession = Depends(get_db),
+) -> AgpResponse:
+    """Ambulatory glucose profile: 5/25/50/75/95th percentiles by local time of day."""
+    if 1440 % bin_minutes:
+        raise HTTPException(status_code=422, detail="bin_minutes must divide a day evenly")
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=422, detail=f"Unknown time zone: {tz}")
+
+    from sweetwatch.services.analytics import AGP_PERCENTILES, agp, load_series
+
+    profile = agp(await load_series(db, days, patient_id), bin_minutes=bin_minutes, tz=tz)
+    columns = [profile.percentiles[p].tolist() for p in AGP_PERCENTILES]
+    bins = [
+        AgpBinResponse(
+            minute=minute,
+            count=count,
+            **{
+                f"p{p}": None if math.isnan(value) else value
+                for p, value in zip(AGP_PERCENTILES, row)
+            },
+        )
+        for minute, count, *row in zip(profile.minutes.tolist(), profile.counts.tolist(), *columns)
     ]
+    return AgpResponse(days=days, tz=tz, bin_minutes=bin_minutes, bins=bins)
+
+
+@router.get("/prediction", response_model=PredictionResponse)
+async def get_glucose_prediction(patient_id: str | None = None) -> PredictionResponse:
+    """15/30/60-minute forecast with 95% bands, from the in-memory trend filter.
+
+    Defaults to the patient with the newest reading. No database access.
+    """
+    prediction = glucose_service.predictor.predict(patient_id)
+    if prediction is None:
+        raise HTTPException(status_code=404, detail="No recent readings to predict from")
+    return PredictionResponse.model_validate(prediction)
+
+
+@router.get("/insight", response_model=InsightResponse)
+async def get_glucose_insight(
+    hours: int = Query(default=24, ge=1, le=MAX_RAW_HOURS),
+    patient_id: str | None = Depends(scoped_patient),
+    db: AsyncSession = Depends(get_db),
+) -> InsightResponse:
+    """Narrative trend analysis from Claude, reused while the window is unchanged."""
+    analyzer = get_analyzer()
+    if analyzer is None:
+        raise HTTPException(status_code=503, detail="ANTHROPIC_API_KEY is not configured")
+
+    readings: Sequence[GlucoseReading | CachedReading] = await glucose_service.get_history(
+        db, hours=hours, limit=MAX_INSIGHT_READINGS, patient_id=patient_id
+    )
+    if not readings:
+        raise HTTPException(status_code=404, detail="No glucose readings found")
+
+    window = [{"timestamp": r.timestamp, "value": r.value} for r in reversed(readings)]
+    try:
+        analysis = await analyzer.analyze_trend(window)
+    except AnalysisError as e:
+        raise HTTPException(status_code=502, detail=f"Analysis failed: {e}")
+    return InsightResponse(hours=hours, count=len(window), analysis=analysis)
+
 
-    return GlucoseHistoryResponse(readings=response_readings, count=len(response_readings))
+@router.get("/stream")
+async def stream_glucose(request: Request, patient_id: str | None = None) -> StreamingResponse:
+    """Push new readings of one patient as Server-Sent Events as soon as they are stored.
+
+    The latest known reading is sent first so clients can render immediately.
+    """
+    # Resolved up front: a stream holds no session while it is open
+    async with AsyncSessionLocal() as db:
+        patient_id = await resolve_patient(db, patient_id)
+
+    async def events() -> AsyncIterator[str]:
+        async with glucose_service.broadcaster.subscribe() as queue:
+            # Subscribe before reading the current value so nothing slips in between
+            async with AsyncSessionLocal() as db:
+                current = await glucose_service.get_current(db, patient_id)
+            yield "retry: 5000\n\n"
+            if current is not None:
+                yield _sse_event(current)
+            while not await request.is_disconnected():
+                try:
+                    reading = await asyncio.wait_for(
+                        queue.get(), timeout=settings.stream_keepalive
+                    )
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if patient_id is None or reading.patient_id == patient_id:
+                    yield _sse_event(reading)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/export")
+async def export_glucose(
+    start: datetime | None = None,
+    end: datetime | None = None,
+    format: ExportFormat = "csv",
+    gzip: bool = False,
+    patient_id: str | None = Depends(export_patient),
+) -> StreamingResponse:
+    """Stream raw readings in ``[start, end)`` as CSV or NDJSON, oldest first.
+
+    Rows are read through a server-side cursor and encoded chunk by chunk,
+    so memory use does not depend on the range. ``gzip=true`` compresses
+    the stream into a ``.gz`` download. Only one patient is exported unless
+    ``all_patients=true`` is passed.
+    """
+    start_utc = as_utc(start).replace(tzinfo=None) if start else None
+    end_utc = as_utc(end).replace(tzinfo=None) if end else None
+
+    async def chunks() -> AsyncIterator[bytes]:
+        async with AsyncSessionLocal() as db:
+            partitions = iter_partitions(db, start_utc, end_utc, patient_id)
+            async for chunk in export_chunks(partitions, format, compress=gzip):
+                yield chunk
+
+    filename = f"glucose.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        chunks(),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# Manual sync outcomes, from one that fetched upstream to one that reused a result
+FRESHNESS_ORDER: tuple[SyncFreshness, ...] = ("fresh", "coalesced", "cached")
+
+
+def _sync_services(request: Request, account_id: str | None) -> dict[str, GlucoseService]:
+    """Services a manual sync runs: the scheduler's accounts, else the shared service."""
+    scheduler = getattr(request.app.state, "scheduler", None)
+    if scheduler is None:
+        services = {"default": glucose_service}
+    else:
+        services = {account_id: state.service for account_id, state in scheduler.accounts.items()}
+    if account_id is None:
+        return services
+    if account_id not in services:
+        raise HTTPException(status_code=404, detail=f"Unknown account: {account_id}")
+    return {account_id: services[account_id]}
 
 
 @router.post("/sync", response_model=SyncResponse)
-async def sync_glucose(db: Session = Depends(get_db)) -> SyncResponse:
-    """Manually trigger sync from LibreLinkUp."""
+async def sync_glucose(request: Request, account_id: str | None = None) -> SyncResponse:
+    """Manually trigger a sync of every account, or only ``account_id``.
+
+    Runs through the scheduler's per-account services, so accounts from
+    ``ACCOUNTS_FILE`` sync with their own sources. Concurrent requests share
+    one upstream fetch per account, and requests shortly after a fetch reuse
+    its result; ``freshness`` is ``fresh`` if any account fetched upstream.
+    """
+    services = _sync_services(request, account_id)
+    outcomes = await asyncio.gather(
+        *(service.sync() for service in services.values()), return_exceptions=True
+    )
+    errors = [
+        f"{account}: {outcome}"
+        for account, outcome in zip(services, outcomes)
+        if isinstance(outcome, BaseException)
+    ]
+    if errors:
+        raise HTTPException(status_code=500, detail="; ".join(errors))
+    results = [outcome for outcome in outcomes if isinstance(outcome, SyncResult)]
+    # The most upstream-facing outcome across accounts
+    freshness: SyncFreshness = min(
+        (result.freshness for result in results), key=FRESHNESS_ORDER.index, default="cached"
+    )
+    return SyncResponse(
+        synced=sum(len(result.stored) for result in results),
+        status="ok",
+        freshness=freshness,
+        fetched_at=max((result.fetched_at for result in results), default=None),
+    )
+
+
+@router.get("/sync/status", response_model=SchedulerStatusResponse)
+async def get_sync_status(request: Request) -> SchedulerStatusResponse:
+    """Inspect the background sync scheduler: queue depth, lag and per-account state."""
+    scheduler = getattr(request.app.state, "scheduler", None)
+    if scheduler is None:
+        raise HTTPException(status_code=503, detail="Sync scheduler is not running")
+    return SchedulerStatusResponse.model_validate(scheduler.status())
+
+
+@router.post("/backfill", response_model=BackfillStatusResponse, status_code=202)
+async def start_backfill(request: BackfillRequest) -> BackfillStatusResponse:
+    """Import a Nightscout date range in the background.
+
+    Re-submitting the same range resumes from its last checkpoint.
+    """
+    if request.end <= request.start:
+        raise HTTPException(status_code=422, detail="end must be after start")
     try:
-        stored = await glucose_service.fetch_and_store(db)
-        return SyncResponse(synced=len(stored), status="ok")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        progress = start_nightscout_backfill(request.start, request.end, request.patient_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return BackfillStatusResponse.model_validate(progress)
+
+
+@router.get("/backfill/{job_id}", response_model=BackfillStatusResponse)
+async def get_backfill(job_id: str) -> BackfillStatusResponse:
+    """Get the progress of a backfill job started through the API."""
+    progress = backfill_jobs.get(job_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Backfill job not found")
+    return BackfillStatusResponse.model_validate(progress)
@@ -1,9 +1,18 @@
 """API response schemas."""
 
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel, computed_field
 
+TREND_ARROWS = {
+    1: "↓↓",  # FALLING_FAST
+    2: "↓",   # FALLING
+    3: "→",   # STABLE
+    4: "↑",   # RISING
+    5: "↑↑",  # RISING_FAST
+}
+
 
 class GlucoseResponse(BaseModel):
     """Single glucose reading response."""
@@ -17,14 +26,7 @@ class GlucoseResponse(BaseModel):
     @property
     def trend_arrow(self) -> str:
         """Convert trend integer to arrow symbol."""
-        arrows = {
-            1: "↓↓",  # FALLING_FAST
-            2: "↓",   # FALLING
-            3: "→",   # STABLE
-            4: "↑",   # RISING
-            5: "↑↑",  # RISING_FAST
-        }
-        return arrows.get(self.trend, "?")
+        return TREND_ARROWS.get(self.trend, "?")
 
     model_config = {"from_attributes": True}
 
@@ -36,8 +38,184 @@ class GlucoseHistoryResponse(BaseModel):
     count: int
 
 
+class GlucoseBucketResponse(BaseModel):
+    """Aggregated readings in one time bucket."""
+
+    timestamp: datetime
+    mean: float
+    min: float
+    max: float
+    count: int
+
+
+class GlucoseAggregateResponse(BaseModel):
+    """Downsampled glucose history."""
+
+    resolution: str
+    buckets: list[GlucoseBucketResponse]
+    count: int
+
+
+class GlucoseSummaryResponse(BaseModel):
+    """Summary statistics computed from daily rollups."""
+
+    days: int
+    count: int
+    mean: float | None
+    sd: float | None
+    cv: float | None
+    min: float | None
+    max: float | None
+    time_below: float | None
+    time_in_range: float | None
+    time_above: float | None
+
+    model_config = {"from_attributes": True}
+
+
+class GlucoseStatsResponse(BaseModel):
+    """Standard CGM metrics computed from raw readings."""
+
+    days: int
+    count: int
+    mean: float | None
+    sd: float | None
+    cv: float | None
+    gmi: float | None
+    mage: float | None
+    lbgi: float | None
+    hbgi: float | None
+    time_very_low: float | None
+    time_low: float | None
+    time_in_range: float | None
+    time_high: float | None
+    time_very_high: float | None
+
+
+class AgpBinResponse(BaseModel):
+    """Glucose percentiles for one time-of-day bin."""
+
+    minute: int
+    count: int
+    p5: float | None
+    p25: float | None
+    p50: float | None
+    p75: float | None
+    p95: float | None
+
+
+class AgpResponse(BaseModel):
+    """Ambulatory glucose profile."""
+
+    days: int
+    tz: str
+    bin_minutes: int
+    bins: list[AgpBinResponse]
+
+
+class ForecastPointResponse(BaseModel):
+    """Forecast value and 95% band at one horizon."""
+
+    minutes: int
+    timestamp: datetime
+    value: float
+    low: float
+    high: float
+
+    model_config = {"from_attributes": True}
+
+
+class PredictionResponse(BaseModel):
+    """Short-term forecast from the local trend filter."""
+
+    patient_id: str
+    timestamp: datetime
+    value: float
+    rate: float
+    points: list[ForecastPointResponse]
+
+    model_config = {"from_attributes": True}
+
+
+class InsightResponse(BaseModel):
+    """Narrative analysis of a reading window."""
+
+    hours: int
+    count: int
+    analysis: str
+
+
+class PatientsResponse(BaseModel):
+    """Patients with stored readings and the one shown when none is chosen."""
+
+    patients: list[str]
+    default: str | None
+
+
 class SyncResponse(BaseModel):
     """Sync operation response."""
 
     synced: int
     status: str
+    # "fresh": this request fetched upstream; "coalesced": joined a fetch in
+    # flight; "cached": reused the last fetch within SYNC_MIN_INTERVAL
+    freshness: Literal["fresh", "coalesced", "cached"] = "fresh"
+    fetched_at: datetime | None = None
+
+
+class AccountSyncStatus(BaseModel):
+    """Scheduling state of one synced account."""
+
+    id: str
+    interval: float
+    next_due_in: float
+    running: bool
+    runs: int
+    failures: int
+    last_synced: int
+    last_started: float | None
+    last_duration: float | None
+    last_lag: float | None
+    last_error: str | None
+    cadence: float | None = None  # learned seconds between sensor readings
+    empty_polls: int = 0
+    freshness_lag: float | None = None  # seconds from reading to stored
+    freshness_lag_p50: float | None = None
+    freshness_lag_p95: float | None = None
+
+
+class SchedulerStatusResponse(BaseModel):
+    """Sync scheduler queue depth and lag."""
+
+    mode: str
+    workers: int
+    accounts: int
+    queue_depth: int
+    running: int
+    max_lag: float
+    account_status: list[AccountSyncStatus]
+
+
+class BackfillRequest(BaseModel):
+    """Date range to import from Nightscout."""
+
+    start: datetime
+    end: datetime
+    patient_id: str = "default"
+
+
+class BackfillStatusResponse(BaseModel):
+    """Progress of a backfill job."""
+
+    job_id: str
+    status: str
+    read: int
+    inserted: int
+    batches: int
+    cursor: int | None
+    error: str | None
+    started_at: float
+    finished_at: float | None
+    rate: float
+
+    model_config = {"from_attributes": True}
@@ -1,9 +1,37 @@
+import json
+from pathlib import Path
+
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 
 
+class AccountConfig(BaseModel):
+    """One CGM account synced by the scheduler.
+
+    Field names mirror ``Settings`` so ``create_source`` accepts either.
+    """
+
+    id: str
+    cgm_source: str = "librelinkup"
+
+    nightscout_url: str = ""
+    nightscout_api_secret: str = ""
+
+    libre_username: str = ""
+    libre_password: str = ""
+    libre_region: str = "EU"
+    libre_max_concurrency: int = 4
+    libre_connections_ttl: int = 3600
+
+    replay_file: str = ""
+    replay_patients: int = 1
+    replay_interval: int = 5
+    replay_seed: int = 0
+
+
 class Settings(BaseSettings):
     # CGM Source
-    cgm_source: str = "nightscout"  # "nightscout" or "librelinkup"
+    cgm_source: str = "librelinkup"  # "librelinkup", "nightscout" or "replay"
 
     # Nightscout
     nightscout_url: str = ""
@@ -13,19 +41,103 @@ class Settings(BaseSettings):
     libre_username: str = ""
     libre_password: str = ""
     libre_region: str = "EU"
+    libre_max_concurrency: int = 4  # parallel graph requests across followed patients
+    libre_connections_ttl: int = 3600  # seconds between connection list refreshes
+    # Token, user and patient ids persisted here so restarts skip the login (empty disables)
+    libre_session_file: str = ""
+
+    # Replay: offline generated or recorded readings for load and soak tests
+    replay_file: str = ""  # Nightscout entries.json or LibreLinkUp graph JSON; empty generates
+    replay_patients: int = 1  # virtual patients
+    replay_interval: int = 5  # minutes between generated readings (1 or 5)
+    replay_seed: int = 0
+    replay_speed: float = 1.0  # time acceleration; 100 delivers readings 100x as often
+    replay_latency: float = 0.0  # mean seconds added to each fetch
+    replay_error_rate: float = 0.0  # fraction of fetches failing with HTTP 503
+    replay_gap_rate: float = 0.0  # fraction of 30-minute stretches never delivered
+
+    # Upstream HTTP: connection pool, HTTP/2 (needs httpx[http2]) and retries on 429/5xx
+    http_timeout: float = 30.0
+    http_max_connections: int = 10
+    http_max_keepalive: int = 5
+    http_keepalive_expiry: float = 30.0  # seconds
+    http_http2: bool = False
+    http_retries: int = 3
+    http_backoff: float = 0.5  # seconds, doubled per retry with full jitter
+    http_max_backoff: float = 30.0
 
     # Claude API
     anthropic_api_key: str = ""
+    analyzer_model: str = "claude-sonnet-4-20250514"
+    analyzer_cache_ttl: int = 900  # seconds an analysis of the same window is reused
+    analyzer_cache_size: int = 128  # windows kept, least recently used evicted first
+
+    # In-memory hot window for /current and /history (0 disables)
+    cache_hours: int = 168
+
+    # Patient served by reads that name none; empty serves the only stored patient and
+    # requires ?patient_id= once there are several
+    default_patient_id: str = ""
+
+    # Background sync intervals (seconds); also used as HTTP cache lifetimes
+    sync_interval_stable: int = 180
+    sync_interval_changing: int = 60
+    sync_workers: int = 4  # concurrent account syncs
+    sync_jitter: float = 0.1  # +/- fraction of the interval added to each schedule
+    # "trend": fixed interval by trend; "cadence": poll right after the sensor's next reading
+    sync_mode: str = "trend"
+    sync_cadence_margin: float = 5.0  # seconds after the expected reading to poll
+    sync_min_interval: float = 30  # seconds a manual sync reuses the last upstream fetch
+
+    # JSON list of AccountConfig objects; empty syncs the single account above
+    accounts_file: str = ""
+
+    # Push stream: pending readings buffered per client before dropping oldest
+    stream_queue_size: int = 32
+    stream_keepalive: float = 15.0  # seconds
+
+    # Historical backfill
+    backfill_batch_size: int = 1000  # entries per committed batch
+    backfill_page_size: int = 1000  # entries per upstream page
+    backfill_checkpoint_dir: str = "./backfill"
 
     # App
     app_host: str = "0.0.0.0"
     app_port: int = 8000
     log_level: str = "info"
+    metrics_enabled: bool = True  # Prometheus /metrics plus request/DB timing hooks
+    startup_profile: bool = False  # Log import and startup phase timings
 
     # Database
     database_url: str = "sqlite:///./sweetwatch.db"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800  # seconds
+
+    # SQLite performance profile (WAL, synchronous=NORMAL, ...), applied on connect
+    sqlite_tuning: bool = True
+    sqlite_mmap_size: int = 256 * 1024 * 1024  # bytes
+    sqlite_cache_size_kib: int = 64 * 1024
+    sqlite_busy_timeout: int = 5000  # ms a connection waits for a lock
+
+    # Retention: raw readings older than this are compacted into rollups and
+    # deleted (0 keeps raw readings forever)
+    retention_raw_days: int = 0
+    retention_archive_dir: str = ""  # gzip CSV per day before deleting; empty skips
+    retention_interval: int = 24 * 60 * 60  # seconds between runs
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
 
+def load_accounts(path: str) -> list[AccountConfig]:
+    """Read scheduler accounts from a JSON file."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    accounts = [AccountConfig.model_validate(item) for item in data]
+    ids = [account.id for account in accounts]
+    if len(ids) != len(set(ids)):
+        raise ValueError(f"Duplicate account ids in {path}")
+    return accounts
+
+
 settings = Settings()
@@ -1,18 +1,118 @@
-from typing import Generator
+import time
+from typing import Any, AsyncGenerator
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
 
 from sweetwatch.config import settings
+from sweetwatch.metrics import DB_QUERY_DURATION, statement_operation
 
+# Async drivers used for the plain URLs accepted in DATABASE_URL
+ASYNC_DRIVERS: dict[str, str] = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(database_url: str) -> str:
+    """Rewrite a sync database URL to use the matching async driver."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if url.get_driver_name() in ("aiosqlite", "asyncpg") or backend not in ASYNC_DRIVERS:
+        return database_url
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def _pool_options(database_url: str) -> dict[str, Any]:
+    """Pool sizing from settings; in-memory SQLite uses a static pool instead."""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": True,
+    }
+
+
+def sqlite_pragmas() -> dict[str, str | int]:
+    """Connection pragmas of the SQLite performance profile.
+
+    WAL lets readers proceed while the sync writes, ``synchronous=NORMAL``
+    is durable under WAL except for the last transactions on power loss,
+    and incremental auto-vacuum lets retention hand freed pages back to
+    the filesystem (it takes effect on new files, or after one VACUUM).
+    """
+    return {
+        # Must precede journal_mode, which initialises a new file
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": -settings.sqlite_cache_size_kib,  # negative means KiB
+        "busy_timeout": settings.sqlite_busy_timeout,
+    }
+
+
+def _apply_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def _tune(sync_engine: Engine) -> None:
+    if sync_engine.dialect.name == "sqlite" and settings.sqlite_tuning:
+        event.listen(sync_engine, "connect", _apply_sqlite_pragmas)
+
+
+def _before_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    started = conn.info["query_started"].pop()
+    DB_QUERY_DURATION.labels(statement_operation(statement)).observe(
+        time.perf_counter() - started
+    )
+
+
+def _on_error(context: Any) -> None:
+    # Failed statements never reach after_cursor_execute
+    stack = context.connection.info.get("query_started") if context.connection else None
+    if stack:
+        stack.pop()
+
+
+def _instrument(sync_engine: Engine) -> None:
+    """Time every statement into the DB query histogram."""
+    if settings.metrics_enabled:
+        event.listen(sync_engine, "before_cursor_execute", _before_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_execute)
+        event.listen(sync_engine, "handle_error", _on_error)
+
+
+# Sync engine is kept for schema management and offline tooling
 engine = create_engine(settings.database_url, echo=False)
 SessionLocal = sessionmaker(bind=engine)
 
+async_engine = create_async_engine(
+    to_async_url(settings.database_url), echo=False, **_pool_options(settings.database_url)
+)
+_tune(engine)
+_tune(async_engine.sync_engine)
+_instrument(engine)
+_instrument(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
 
-def get_db() -> Generator[Session, None, None]:
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """FastAPI dependency for database sessions."""
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,106 @@
+"""Schema migrations with Alembic.
+
+Migrations ship inside the package (``sweetwatch/migrations``), so no
+``alembic.ini`` is needed. The app applies them on startup; databases
+created by the former ``create_all`` at import time have the tables but no
+migration history, and are adopted by the baseline revision, which only
+creates what is missing.
+
+Usage::
+
+    sweetwatch-migrate                      # upgrade to the latest revision
+    sweetwatch-migrate current
+    sweetwatch-migrate revision -m "add notes"   # autogenerate from the models
+"""
+
+import argparse
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+
+if TYPE_CHECKING:
+    from alembic.config import Config
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+
+
+def alembic_config(connection: Connection | None = None) -> "Config":
+    """Alembic configuration for the packaged migrations, bound to ``connection``."""
+    from alembic.config import Config
+
+    from sweetwatch.config import settings
+
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    config.set_main_option("sqlalchemy.url", settings.database_url.replace("%", "%%"))
+    config.attributes["connection"] = connection
+    return config
+
+
+def _is_legacy(connection: Connection) -> bool:
+    tables = set(inspect(connection).get_table_names())
+    return "glucose_readings" in tables and "alembic_version" not in tables
+
+
+def upgrade(engine: Engine | None = None, revision: str = "head") -> None:
+    """Migrate the database to ``revision`` in one transaction."""
+    from alembic import command
+
+    if engine is None:
+        from sweetwatch.db.engine import engine as default_engine
+
+        engine = default_engine
+    with engine.begin() as connection:
+        if _is_legacy(connection):
+            logger.info("Adopting schema created without migrations")
+        command.upgrade(alembic_config(connection), revision)
+
+
+def current_revision(engine: Engine | None = None) -> str | None:
+    """Revision the database is at, ``None`` before the first migration."""
+    from alembic.runtime.migration import MigrationContext
+
+    if engine is None:
+        from sweetwatch.db.engine import engine as default_engine
+
+        engine = default_engine
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for ``sweetwatch-migrate``."""
+    parser = argparse.ArgumentParser(description="Apply or create database migrations.")
+    commands = parser.add_subparsers(dest="command")
+    up = commands.add_parser("upgrade", help="Migrate to a revision (default: latest)")
+    up.add_argument("revision", nargs="?", default="head")
+    commands.add_parser("current", help="Show the database revision")
+    revision = commands.add_parser("revision", help="Autogenerate a migration from the models")
+    revision.add_argument("-m", "--message", required=True)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    if args.command == "current":
+        print(current_revision() or "empty")
+    elif args.command == "revision":
+        from alembic import command
+
+        from sweetwatch.db.engine import engine
+
+        with engine.begin() as connection:
+            command.revision(alembic_config(connection), args.message, autogenerate=True)
+    else:
+        upgrade(revision=getattr(args, "revision", "head"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+A deliberately small registry: counters, gauges and histograms with fixed
+label sets, each labelled child kept in a dict so recording is a lookup and
+an add. ``/metrics`` renders the registry; nothing is exported otherwise.
+
+Metric names and label sets are defined here so every instrumented module
+records into the same series.
+"""
+
+import bisect
+import re
+import time
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any
+
+# Seconds; covers sub-millisecond SQLite queries up to slow upstream calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    type = ""
+    suffix = ""  # appended to the name in HELP, TYPE and samples
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], Any] = {}
+
+    def labels(self, *values: str) -> Any:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def children(self) -> Iterable[tuple[tuple[str, ...], Any]]:
+        return list(self._children.items())
+
+    def clear(self) -> None:
+        self._children.clear()
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def _samples(self, values: tuple[str, ...], child: Any) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        family = self.name + self.suffix
+        lines = [f"# HELP {family} {self.help}", f"# TYPE {family} {self.type}"]
+        for values, child in self.children():
+            lines.extend(self._samples(values, child))
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    type = "counter"
+    # Like prometheus_client: the family and its sample are both named ``*_total``
+    suffix = "_total"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _samples(self, values: tuple[str, ...], child: _Value) -> Iterable[str]:
+        name = self.name + self.suffix
+        yield f"{name}{_labels(self.labelnames, values)} {_number(child.value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+    suffix = ""
+
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _Buckets:
+        return _Buckets(self.buckets)
+
+    def _samples(self, values: tuple[str, ...], child: _Buckets) -> Iterable[str]:
+        cumulative = 0
+        for bound, count in zip(self.buckets, child.counts):
+            cumulative += count
+            le = _labels(self.labelnames, values, f'le="{_number(bound)}"')
+            yield f"{self.name}_bucket{le} {cumulative}"
+        le = _labels(self.labelnames, values, 'le="+Inf"')
+        yield f"{self.name}_bucket{le} {child.count}"
+        labels = _labels(self.labelnames, values)
+        yield f"{self.name}_sum{labels} {_number(child.sum)}"
+        yield f"{self.name}_count{labels} {child.count}"
+
+
+class Registry:
+    """Metrics rendered together, with hooks refreshing derived gauges first."""
+
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+        self._collect_hooks: list[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def on_collect(self, hook: Callable[[], None]) -> None:
+        self._collect_hooks.append(hook)
+
+    def render(self) -> str:
+        for hook in self._collect_hooks:
+            hook()
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "sweetwatch_http_request_duration_seconds",
+        "API request latency by route template, until the response is sent",
+        ("method", "route", "status"),
+    )
+)
+UPSTREAM_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "sweetwatch_upstream_request_duration_seconds",
+        "CGM source HTTP request latency per attempt; status is 'error' on transport failures",
+        ("source", "endpoint", "status"),
+    )
+)
+UPSTREAM_LOGINS = REGISTRY.register(
+    Counter("sweetwatch_upstream_logins", "Logins performed against a CGM source", ("source",))
+)
+SYNC_DURATION = REGISTRY.register(
+    Histogram(
+        "sweetwatch_sync_duration_seconds",
+        "Upstream fetch plus store per account",
+        ("account", "result"),
+    )
+)
+SYNC_ROWS = REGISTRY.register(
+    Counter(
+        "sweetwatch_sync_rows",
+        "Readings returned by the source (fetched) and newly stored (inserted)",
+        ("account", "kind"),
+    )
+)
+NEWEST_READING = REGISTRY.register(
+    Gauge(
+        "sweetwatch_newest_reading_timestamp_seconds",
+        "Unix time of the newest stored reading per patient",
+        ("patient",),
+    )
+)
+READING_FRESHNESS = REGISTRY.register(
+    Gauge(
+        "sweetwatch_reading_freshness_seconds",
+        "Now minus the newest stored reading per patient",
+        ("patient",),
+    )
+)
+DB_QUERY_DURATION = REGISTRY.register(
+    Histogram(
+        "sweetwatch_db_query_duration_seconds",
+        "Database statement execution time by statement type",
+        ("operation",),
+    )
+)
+
+
+def _update_freshness() -> None:
+    now = time.time()
+    for values, child in NEWEST_READING.children():
+        READING_FRESHNESS.labels(*values).set(max(now - child.value, 0.0))
+
+
+REGISTRY.on_collect(_update_freshness)
+
+
+def record_newest(patient_id: str, timestamp: float) -> None:
+    """Advance the newest-reading gauge of a patient."""
+    child = NEWEST_READING.labels(patient_id)
+    if timestamp > child.value:
+        child.set(timestamp)
+
+
+# Path segments that are identifiers rather than endpoints (UUIDs, numeric ids)
+_ID_SEGMENT = re.compile(r"/(?:[0-9a-fA-F]{8}-[0-9a-fA-F-]{27}|\d+)(?=/|$)")
+
+
+def endpoint_label(path: str) -> str:
+    """URL path with identifier segments collapsed, to keep label cardinality low."""
+    return _ID_SEGMENT.sub("/{id}", path)
+
+
+def statement_operation(statement: str) -> str:
+    """Leading SQL keyword (SELECT, INSERT, ...) of a statement."""
+    head = statement.lstrip()[:16].split(None, 1)
+    return head[0].upper() if head else "OTHER"
+
+
+# Routes streaming a download; their duration follows the range and the client's bandwidth
+UNTIMED_ROUTES = frozenset({"/api/glucose/export"})
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request by its route template.
+
+    Requests that match no route share one ``unmatched`` label so scans of
+    random paths cannot grow the series count. Server-Sent Event streams and
+    ``UNTIMED_ROUTES`` are not timed: they last as long as the client keeps
+    reading.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+        streaming = False
+
+        async def send_wrapper(message: Any) -> None:
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                streaming = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", ())
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            if not streaming and route not in UNTIMED_ROUTES:
+                HTTP_REQUEST_DURATION.labels(scope["method"], route, str(status)).observe(
+                    time.perf_counter() - started
+                )
@@ -0,0 +1 @@
+"""Alembic migrations for the SweetWatch schema, applied by ``sweetwatch.db.migrate``."""
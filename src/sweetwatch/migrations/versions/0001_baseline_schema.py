@@ -0,0 +1,94 @@
+"""Baseline schema: raw readings and hourly/daily rollups.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Databases created by ``create_all`` before migrations existed already have
+some or all of these tables, so every object is created only if missing.
+Their readings table may also predate the ``(patient_id, timestamp)``
+unique constraint that ingest relies on; it is added after dropping
+duplicate readings.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0001"
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "glucose_readings",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("patient_id", sa.String(), nullable=False),
+        sa.Column("value", sa.Float(), nullable=False),
+        sa.Column("trend", sa.Integer(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "patient_id", "timestamp", name="uq_glucose_readings_patient_timestamp"
+        ),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_glucose_readings_patient_id",
+        "glucose_readings",
+        ["patient_id"],
+        if_not_exists=True,
+    )
+    if not op.get_context().as_sql:
+        _add_reading_constraint()
+    op.create_table(
+        "glucose_rollups",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("patient_id", sa.String(), nullable=False),
+        sa.Column("period", sa.String(), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("value_sum", sa.Float(), nullable=False),
+        sa.Column("value_sum_sq", sa.Float(), nullable=False),
+        sa.Column("value_min", sa.Float(), nullable=False),
+        sa.Column("value_max", sa.Float(), nullable=False),
+        sa.Column("below_count", sa.Integer(), nullable=False),
+        sa.Column("in_range_count", sa.Integer(), nullable=False),
+        sa.Column("above_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "patient_id", "period", "bucket_start", name="uq_glucose_rollups_patient_bucket"
+        ),
+        if_not_exists=True,
+    )
+
+
+def _add_reading_constraint() -> None:
+    """Deduplicate readings and add their unique constraint, if it is missing."""
+    existing = sa.inspect(op.get_bind()).get_unique_constraints("glucose_readings")
+    if any(c["name"] == "uq_glucose_readings_patient_timestamp" for c in existing):
+        return
+
+    readings = sa.table(
+        "glucose_readings", sa.column("id"), sa.column("patient_id"), sa.column("timestamp")
+    )
+    # Keep the first stored copy of every reading
+    first = sa.select(sa.func.min(readings.c.id)).group_by(
+        readings.c.patient_id, readings.c.timestamp
+    )
+    op.execute(readings.delete().where(readings.c.id.not_in(first)))
+    # SQLite recreates the table; other backends ALTER it in place
+    with op.batch_alter_table("glucose_readings") as batch_op:
+        batch_op.create_unique_constraint(
+            "uq_glucose_readings_patient_timestamp", ["patient_id", "timestamp"]
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("glucose_rollups")
+    op.drop_index("ix_glucose_readings_patient_id", table_name="glucose_readings")
+    op.drop_table("glucose_readings")
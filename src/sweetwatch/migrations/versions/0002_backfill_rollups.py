@@ -0,0 +1,34 @@
+"""Backfill rollups from readings stored before rollups existed.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+Ingest only rolls up the readings it inserts, so a database adopted by the
+baseline revision has raw readings but no rollups, and hourly/daily history
+and ``/summary`` come back empty for that data. Buckets that still have raw
+rows are recomputed from them; the others keep their rollups.
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "0002"
+down_revision: str | None = "0001"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Data only; offline SQL scripts have no readings to aggregate
+    if op.get_context().as_sql:
+        return
+    from sweetwatch.services.rollups import backfill_rollups
+
+    backfill_rollups(op.get_bind())
+
+
+def downgrade() -> None:
+    # Rollups recomputed from raw rows are the same as those ingest maintains
+    pass
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, Integer, String
+from sqlalchemy import DateTime, Float, Integer, String, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -10,6 +10,9 @@ class Base(DeclarativeBase):
 
 class GlucoseReading(Base):
     __tablename__ = "glucose_readings"
+    __table_args__ = (
+        UniqueConstraint("patient_id", "timestamp", name="uq_glucose_readings_patient_timestamp"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     patient_id: Mapped[str] = mapped_column(String, index=True)
@@ -17,3 +20,31 @@ class GlucoseReading(Base):
     trend: Mapped[int] = mapped_column(Integer, nullable=True)
     timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class GlucoseRollup(Base):
+    """Per-patient hourly or daily aggregate, maintained incrementally on ingest.
+
+    Sums and sums of squares let mean, SD and CV over any span of buckets be
+    derived without touching raw readings.
+    """
+
+    __tablename__ = "glucose_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "patient_id", "period", "bucket_start", name="uq_glucose_rollups_patient_bucket"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    patient_id: Mapped[str] = mapped_column(String, nullable=False)
+    period: Mapped[str] = mapped_column(String, nullable=False)  # "hour" or "day"
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    value_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    value_sum_sq: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    value_min: Mapped[float] = mapped_column(Float, nullable=False)
+    value_max: Mapped[float] = mapped_column(Float, nullable=False)
+    below_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    in_range_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    above_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
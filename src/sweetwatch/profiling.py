@@ -0,0 +1,97 @@
+"""Startup profiling: where import and initialisation time goes.
+
+With ``STARTUP_PROFILE=true`` the app logs how long importing it took and
+each lifespan phase before it starts serving (migrations, cache warm-up,
+scheduler start). ``sweetwatch-startup`` breaks import time down per
+top-level package, measured in a fresh interpreter with ``-X importtime``::
+
+    sweetwatch-startup                           # the API app
+    sweetwatch-startup sweetwatch.tasks.rollups  # a cron entry point
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from sweetwatch import IMPORT_STARTED
+
+
+class StartupProfile:
+    """Durations of named startup phases, in the order they ran."""
+
+    def __init__(self) -> None:
+        self.phases: list[tuple[str, float]] = []
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the ``with`` block as phase ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def report(self) -> str:
+        total = sum(seconds for _, seconds in self.phases)
+        lines = [f"Startup took {total * 1000:.0f} ms:"]
+        lines += [f"  {name:<16} {seconds * 1000:8.1f} ms" for name, seconds in self.phases]
+        return "\n".join(lines)
+
+
+# Phases of this process; the app records its own import first
+startup = StartupProfile()
+
+
+def record_import(name: str) -> None:
+    """Record the time since the ``sweetwatch`` package was imported as phase ``name``."""
+    startup.record(name, time.perf_counter() - IMPORT_STARTED)
+
+
+def import_times(module: str) -> tuple[float, dict[str, float]]:
+    """Seconds to import ``module`` in a fresh interpreter, and that time per top-level package.
+
+    Each module's own (exclusive) time is charged to its top-level package,
+    so the shares add up to the total.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    packages: dict[str, float] = defaultdict(float)
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, name = line.removeprefix("import time:").split("|")
+        packages[name.strip().split(".")[0]] += int(own) / 1e6
+    return sum(packages.values()), dict(packages)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for ``sweetwatch-startup``."""
+    parser = argparse.ArgumentParser(description="Break down the import time of a module.")
+    parser.add_argument("module", nargs="?", default="sweetwatch.api.main")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list")
+    args = parser.parse_args(argv)
+
+    total, packages = import_times(args.module)
+    print(f"import {args.module}: {total * 1000:.0f} ms")
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    for name, seconds in ranked[: args.top]:
+        print(f"  {name:<24} {seconds * 1000:8.1f} ms  {seconds / total:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Time-bucketed aggregation of glucose readings in SQL."""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import Integer, Select, SQLColumnExpression, cast, func, select
+from sqlalchemy.sql.elements import ColumnElement
+
+from sweetwatch.models.glucose import GlucoseReading
+
+# Bucket widths in seconds for the history ``resolution`` parameter
+RESOLUTIONS: dict[str, int] = {
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "1h": 60 * 60,
+    "1d": 24 * 60 * 60,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class GlucoseBucket:
+    """Aggregate of the readings in one time bucket."""
+
+    timestamp: datetime  # bucket start, naive UTC
+    mean: float
+    min: float
+    max: float
+    count: int
+
+
+def epoch_seconds(dialect: str, column: SQLColumnExpression[datetime]) -> ColumnElement[int]:
+    """Unix time of a naive UTC timestamp column, per dialect."""
+    if dialect == "sqlite":
+        return cast(func.strftime("%s", column), Integer)
+    if dialect == "postgresql":
+        return cast(func.floor(func.extract("epoch", column)), Integer)
+    raise ValueError(f"Time bucketing is not supported on {dialect}")
+
+
+def time_bucket(
+    dialect: str, column: SQLColumnExpression[datetime], seconds: int
+) -> ColumnElement[int]:
+    """Unix time of the start of the ``seconds``-wide bucket holding ``column``.
+
+    Buckets are aligned to the epoch, so daily buckets are UTC days.
+    """
+    epoch = epoch_seconds(dialect, column)
+    return (epoch - epoch % seconds).label("bucket")
+
+
+def bucket_query(
+    dialect: str, seconds: int, patient_id: str | None = None
+) -> Select[int, float, float, float, int]:
+    """SELECT bucket, mean, min, max, count grouped by bucket, newest first.
+
+    With ``patient_id`` only that patient's readings are aggregated.
+    """
+    bucket = time_bucket(dialect, GlucoseReading.timestamp, seconds)
+    stmt = (
+        select(
+            bucket,
+            func.avg(GlucoseReading.value),
+            func.min(GlucoseReading.value),
+            func.max(GlucoseReading.value),
+            func.count(),
+        )
+        .group_by(bucket)
+        .order_by(bucket.desc())
+    )
+    if patient_id is not None:
+        stmt = stmt.where(GlucoseReading.patient_id == patient_id)
+    return stmt
+
+
+def to_bucket(row: tuple[int, float, float, float, int]) -> GlucoseBucket:
+    start, mean, low, high, count = row
+    return GlucoseBucket(
+        timestamp=datetime.fromtimestamp(start, tz=timezone.utc).replace(tzinfo=None),
+        mean=float(mean),
+        min=float(low),
+        max=float(high),
+        count=count,
+    )
@@ -0,0 +1,238 @@
+"""Vectorized CGM analytics on contiguous NumPy arrays.
+
+A patient's series is loaded once into two arrays (epoch seconds and mg/dL)
+and every metric is computed with array operations, so 90-day reports cost
+milliseconds rather than per-row Python loops.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from sweetwatch.models.glucose import GlucoseReading
+
+# Consensus (Battelino 2019) range thresholds, mg/dL
+VERY_LOW = 54
+LOW = 70
+HIGH = 180
+VERY_HIGH = 250
+
+AGP_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+@dataclass(frozen=True)
+class GlucoseSeries:
+    """Readings of one window as parallel arrays, sorted by time."""
+
+    times: np.ndarray  # int64 epoch seconds (UTC)
+    values: np.ndarray  # float64 mg/dL
+
+    def __len__(self) -> int:
+        return int(self.values.size)
+
+    @classmethod
+    def from_rows(cls, rows: list[tuple[datetime, float]]) -> "GlucoseSeries":
+        if not rows:
+            return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+        timestamps, values = zip(*rows)
+        # Stored timestamps are naive UTC, which datetime64 takes as-is
+        times = np.array(timestamps, dtype="datetime64[s]").astype(np.int64)
+        return cls(times, np.asarray(values, dtype=np.float64))
+
+
+async def load_series(
+    db: AsyncSession, days: int, patient_id: str | None = None
+) -> GlucoseSeries:
+    """Load the last ``days`` of readings in one query, as arrays."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    stmt = (
+        select(GlucoseReading.timestamp, GlucoseReading.value)
+        .where(GlucoseReading.timestamp >= cutoff)
+        .order_by(GlucoseReading.timestamp)
+    )
+    if patient_id is not None:
+        stmt = stmt.where(GlucoseReading.patient_id == patient_id)
+    rows = (await db.execute(stmt)).all()
+    return GlucoseSeries.from_rows([(ts, value) for ts, value in rows])
+
+
+@dataclass
+class GlucoseStats:
+    """Standard CGM metrics for one series."""
+
+    count: int
+    mean: float | None
+    sd: float | None
+    cv: float | None  # percent
+    gmi: float | None  # percent
+    mage: float | None  # mg/dL
+    lbgi: float | None
+    hbgi: float | None
+    time_very_low: float | None  # percent of readings < 54
+    time_low: float | None  # 54-69
+    time_in_range: float | None  # 70-180
+    time_high: float | None  # 181-250
+    time_very_high: float | None  # > 250
+
+
+def time_in_ranges(values: np.ndarray) -> tuple[float, float, float, float, float]:
+    """Percent of readings in each consensus range, lowest first."""
+    below = np.array([(values < VERY_LOW).sum(), (values < LOW).sum()])
+    above = np.array([(values > HIGH).sum(), (values > VERY_HIGH).sum()])
+    n = values.size
+    very_low, low = below[0], below[1] - below[0]
+    high, very_high = above[0] - above[1], above[1]
+    in_range = n - below[1] - above[0]
+    return tuple(  # type: ignore[return-value]
+        float(c / n * 100) for c in (very_low, low, in_range, high, very_high)
+    )
+
+
+def gmi(mean: float) -> float:
+    """Glucose Management Indicator (%) from mean glucose in mg/dL."""
+    return 3.31 + 0.02392 * mean
+
+
+def risk_indices(values: np.ndarray) -> tuple[float, float]:
+    """Kovatchev low and high blood glucose indices (LBGI, HBGI).
+
+    Values below 1 mg/dL (e.g. stored zeros) count as 1, whose log is finite.
+    """
+    f = 1.509 * (np.log(np.clip(values, 1, None)) ** 1.084 - 5.381)
+    risk = 10 * f * f
+    lbgi = np.where(f < 0, risk, 0.0).mean()
+    hbgi = np.where(f > 0, risk, 0.0).mean()
+    return float(lbgi), float(hbgi)
+
+
+def mage(values: np.ndarray, sd: float) -> float | None:
+    """Mean amplitude of glycemic excursions larger than one SD.
+
+    Turning points are found on the de-duplicated series; every swing between
+    consecutive turning points whose amplitude exceeds ``sd`` is averaged,
+    in both directions.
+    """
+    if values.size < 3 or sd == 0:
+        return None
+    # Drop flat steps so plateaus don't hide turning points
+    keep = np.concatenate(([True], np.diff(values) != 0))
+    v = values[keep]
+    if v.size < 3:
+        return None
+    slope = np.sign(np.diff(v))
+    turning = np.flatnonzero(slope[1:] != slope[:-1]) + 1
+    extrema = v[np.concatenate(([0], turning, [v.size - 1]))]
+    swings = np.abs(np.diff(extrema))
+    swings = swings[swings > sd]
+    return float(swings.mean()) if swings.size else None
+
+
+def compute_stats(series: GlucoseSeries) -> GlucoseStats:
+    """All scalar metrics for a series in a handful of array passes."""
+    values = series.values
+    n = len(series)
+    if n == 0:
+        return GlucoseStats(0, *([None] * 12))
+
+    mean = float(values.mean())
+    sd = float(values.std(ddof=1)) if n > 1 else 0.0
+    lbgi, hbgi = risk_indices(values)
+    very_low, low, in_range, high, very_high = time_in_ranges(values)
+    return GlucoseStats(
+        count=n,
+        mean=mean,
+        sd=sd,
+        cv=sd / mean * 100 if mean else None,
+        gmi=gmi(mean),
+        mage=mage(values, sd),
+        lbgi=lbgi,
+        hbgi=hbgi,
+        time_very_low=very_low,
+        time_low=low,
+        time_in_range=in_range,
+        time_high=high,
+        time_very_high=very_high,
+    )
+
+
+@dataclass
+class AgpProfile:
+    """Ambulatory glucose profile: percentiles per time-of-day bin."""
+
+    bin_minutes: int
+    minutes: np.ndarray  # bin start, minutes after local midnight
+    counts: np.ndarray
+    percentiles: dict[int, np.ndarray]  # percentile -> value per bin (NaN if empty)
+
+
+def _utc_offsets(epochs: np.ndarray, zone: ZoneInfo) -> np.ndarray:
+    return np.array(
+        [
+            datetime.fromtimestamp(int(t), tz=zone).utcoffset().total_seconds()  # type: ignore[union-attr]
+            for t in epochs
+        ],
+        dtype=np.int64,
+    )
+
+
+def local_minutes(times: np.ndarray, tz: str) -> np.ndarray:
+    """Minutes after local midnight for each epoch time, DST aware.
+
+    Offsets are looked up once per UTC day; only days where the offset
+    changes are resolved hour by hour.
+    """
+    zone = ZoneInfo(tz)
+    hours, inverse = np.unique(times // 3600, return_inverse=True)
+    days = np.unique(hours // 24)
+    at_start = _utc_offsets(days * 86400, zone)
+    at_end = _utc_offsets((days + 1) * 86400, zone)
+
+    day_index = np.searchsorted(days, hours // 24)
+    offsets = at_start[day_index]
+    transition = (at_start != at_end)[day_index]
+    offsets[transition] = _utc_offsets(hours[transition] * 3600, zone)
+
+    local = times + offsets[inverse]
+    minutes: np.ndarray = (local % 86400) // 60
+    return minutes
+
+
+def agp(series: GlucoseSeries, bin_minutes: int = 15, tz: str = "UTC") -> AgpProfile:
+    """Percentiles 5/25/50/75/95 of glucose per time-of-day bin.
+
+    One sort orders readings by bin, then value; each percentile is then
+    a linear interpolation between two ranks inside its bin's slice, the
+    same method as ``numpy.percentile``.
+    """
+    n_bins = 1440 // bin_minutes
+    minutes = np.arange(n_bins) * bin_minutes
+    if len(series) == 0:
+        empty = np.full(n_bins, np.nan)
+        return AgpProfile(
+            bin_minutes, minutes, np.zeros(n_bins, dtype=np.int64),
+            {p: empty for p in AGP_PERCENTILES},
+        )
+
+    bins = local_minutes(series.times, tz) // bin_minutes
+    # Single float sort key: bin major, value minor (glucose is non-negative)
+    key = bins * (series.values.max() + 1) + series.values
+    ordered = series.values[np.argsort(key)]
+    counts = np.bincount(bins, minlength=n_bins)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    populated = counts > 0
+
+    percentiles: dict[int, np.ndarray] = {}
+    for p in AGP_PERCENTILES:
+        rank = (counts[populated] - 1) * (p / 100)
+        lower = np.floor(rank).astype(np.int64)
+        upper = np.minimum(lower + 1, counts[populated] - 1)
+        base = starts[populated]
+        low_values, high_values = ordered[base + lower], ordered[base + upper]
+        column = np.full(n_bins, np.nan)
+        column[populated] = low_values + (high_values - low_values) * (rank - lower)
+        percentiles[p] = column
+    return AgpProfile(bin_minutes, minutes, counts, percentiles)
@@ -0,0 +1,47 @@
+"""In-process fan-out of newly stored readings to streaming clients."""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+
+from sweetwatch.services.cache import CachedReading
+
+logger = logging.getLogger(__name__)
+
+
+class Broadcaster:
+    """Publishes readings to every subscriber through bounded queues.
+
+    Publishing never blocks: when a subscriber's queue is full the oldest
+    pending reading is dropped, so slow consumers skip ahead to the newest
+    data instead of holding back the sync path or growing memory.
+    """
+
+    def __init__(self, queue_size: int = 32) -> None:
+        self.queue_size = queue_size
+        self._subscribers: set[asyncio.Queue[CachedReading]] = set()
+        self.dropped = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue[CachedReading]]:
+        """Register a subscriber queue for the lifetime of the context."""
+        queue: asyncio.Queue[CachedReading] = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def publish(self, readings: Iterable[CachedReading]) -> None:
+        """Deliver readings, oldest first, to all current subscribers."""
+        for reading in readings:
+            for queue in self._subscribers:
+                if queue.full():
+                    queue.get_nowait()
+                    self.dropped += 1
+                queue.put_nowait(reading)
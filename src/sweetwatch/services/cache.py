@@ -0,0 +1,154 @@
+"""In-memory hot window of recent readings, kept per patient."""
+
+from bisect import insort
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from heapq import merge
+from itertools import islice
+from typing import NamedTuple
+
+from sweetwatch.models.glucose import GlucoseReading
+from sweetwatch.sources.base import naive_utc
+
+
+class DataVersion(NamedTuple):
+    """Identity of the most recently stored reading, used as an HTTP validator."""
+
+    last_id: int
+    last_modified: datetime  # when it was stored (naive UTC), not its reading time
+
+
+@dataclass(frozen=True, slots=True)
+class CachedReading:
+    """Immutable snapshot of a stored reading, detached from any session."""
+
+    id: int
+    patient_id: str
+    value: float
+    trend: int | None
+    timestamp: datetime  # naive UTC, as it comes back from the database
+
+    @classmethod
+    def from_model(cls, reading: GlucoseReading) -> "CachedReading":
+        return cls(
+            id=reading.id,
+            patient_id=reading.patient_id,
+            value=float(reading.value),
+            trend=reading.trend,
+            timestamp=naive_utc(reading.timestamp),
+        )
+
+
+def _timestamp_key(reading: CachedReading) -> datetime:
+    return reading.timestamp
+
+
+class ReadingCache:
+    """Per-patient ring buffers covering the last ``hours`` of readings.
+
+    The cache only answers reads once it has been warmed from the database,
+    after which every insert done by this process is appended to it. It is
+    process-local, so it assumes a single worker owns syncing.
+    """
+
+    def __init__(self, hours: int) -> None:
+        self.hours = hours
+        self.window = timedelta(hours=hours)
+        self._buffers: dict[str, deque[CachedReading]] = {}
+        self._warm = False
+        # Last inserted row seen by this process, across all patients and per patient
+        self.version: DataVersion | None = None
+        self._versions: dict[str, DataVersion] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.hours > 0
+
+    @property
+    def warm(self) -> bool:
+        return self.enabled and self._warm
+
+    def covers(self, hours: int) -> bool:
+        """Whether a window of ``hours`` can be served entirely from memory."""
+        return self.warm and hours <= self.hours
+
+    def load(self, readings: Iterable[GlucoseReading], versions: dict[str, DataVersion]) -> None:
+        """Replace the cache contents with readings and per-patient versions from the database."""
+        if not self.enabled:
+            return
+        self._buffers.clear()
+        self.add(readings)
+        self._versions = dict(versions)
+        self.version = max(versions.values(), default=None)
+        self._warm = True
+
+    def version_for(self, patient_id: str | None = None) -> DataVersion | None:
+        """Last stored row of one patient, or across all patients."""
+        if patient_id is None:
+            return self.version
+        return self._versions.get(patient_id)
+
+    def add(self, readings: Iterable[GlucoseReading]) -> None:
+        """Add newly stored readings, keeping each buffer sorted by timestamp."""
+        if not self.enabled:
+            return
+        touched = set()
+        for reading in readings:
+            cached = CachedReading.from_model(reading)
+            version = DataVersion(cached.id, naive_utc(reading.created_at))
+            if self.version is None or version > self.version:
+                self.version = version
+            current = self._versions.get(cached.patient_id)
+            if current is None or version > current:
+                self._versions[cached.patient_id] = version
+            buffer = self._buffers.setdefault(cached.patient_id, deque())
+            if not buffer or cached.timestamp >= buffer[-1].timestamp:
+                buffer.append(cached)
+            else:
+                insort(buffer, cached, key=_timestamp_key)
+            touched.add(cached.patient_id)
+        for patient_id in touched:
+            self._evict(self._buffers[patient_id])
+
+    def latest(self, patient_id: str | None = None) -> CachedReading | None:
+        """Most recent cached reading, across all patients unless one is given."""
+        buffers = self._select(patient_id)
+        tails = [buffer[-1] for buffer in buffers if buffer]
+        return max(tails, key=_timestamp_key, default=None)
+
+    def history(
+        self, since: datetime, limit: int, patient_id: str | None = None
+    ) -> list[CachedReading]:
+        """Readings at or after ``since``, newest first, like the history query."""
+        cutoff = naive_utc(since)
+        newest_first = [
+            self._newer_than(buffer, cutoff) for buffer in self._select(patient_id)
+        ]
+        merged = merge(*newest_first, key=_timestamp_key, reverse=True)
+        return list(islice(merged, limit))
+
+    def clear(self) -> None:
+        self._buffers.clear()
+        self._warm = False
+        self.version = None
+        self._versions.clear()
+
+    def _select(self, patient_id: str | None) -> list[deque[CachedReading]]:
+        if patient_id is None:
+            return list(self._buffers.values())
+        buffer = self._buffers.get(patient_id)
+        return [buffer] if buffer is not None else []
+
+    @staticmethod
+    def _newer_than(buffer: deque[CachedReading], cutoff: datetime) -> Iterable[CachedReading]:
+        for reading in reversed(buffer):
+            if reading.timestamp < cutoff:
+                break
+            yield reading
+
+    def _evict(self, buffer: deque[CachedReading]) -> None:
+        horizon = datetime.now(timezone.utc).replace(tzinfo=None) - self.window
+        while buffer and buffer[0].timestamp < horizon:
+            buffer.popleft()
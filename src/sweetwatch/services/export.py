@@ -0,0 +1,104 @@
+"""Streaming bulk export of raw readings as CSV or NDJSON.
+
+Rows are read through a server-side cursor in fixed-size partitions of
+plain tuples and each partition is encoded into one chunk, so memory stays
+bounded by the partition size whatever the date range.
+"""
+
+import csv
+import io
+import json
+import zlib
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime
+from typing import Any, Literal
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from sweetwatch.models.glucose import GlucoseReading
+
+ExportFormat = Literal["csv", "ndjson"]
+
+COLUMNS = ("patient_id", "timestamp", "value", "trend")
+
+MEDIA_TYPES: dict[str, str] = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# Rows fetched per round trip from the cursor
+EXPORT_PARTITION_SIZE = 5000
+
+
+async def iter_partitions(
+    db: AsyncSession,
+    start: datetime | None,
+    end: datetime | None,
+    patient_id: str | None = None,
+    partition_size: int = EXPORT_PARTITION_SIZE,
+) -> AsyncIterator[Sequence[Any]]:
+    """Readings in ``[start, end)`` as lists of column tuples, oldest first."""
+    stmt = select(
+        GlucoseReading.patient_id,
+        GlucoseReading.timestamp,
+        GlucoseReading.value,
+        GlucoseReading.trend,
+    ).order_by(GlucoseReading.timestamp, GlucoseReading.id)
+    if start is not None:
+        stmt = stmt.where(GlucoseReading.timestamp >= start)
+    if end is not None:
+        stmt = stmt.where(GlucoseReading.timestamp < end)
+    if patient_id is not None:
+        stmt = stmt.where(GlucoseReading.patient_id == patient_id)
+
+    result = await db.stream(stmt.execution_options(yield_per=partition_size))
+    async for partition in result.partitions():
+        yield partition
+
+
+def _utc(ts: datetime) -> str:
+    # Stored timestamps are naive UTC
+    return ts.isoformat() + "Z"
+
+
+def encode_csv(rows: Sequence[Any], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(COLUMNS)
+    writer.writerows((pid, _utc(ts), value, trend) for pid, ts, value, trend in rows)
+    return buffer.getvalue()
+
+
+def encode_ndjson(rows: Sequence[Any]) -> str:
+    return "".join(
+        json.dumps(
+            {"patient_id": pid, "timestamp": _utc(ts), "value": value, "trend": trend},
+            separators=(",", ":"),
+        )
+        + "\n"
+        for pid, ts, value, trend in rows
+    )
+
+
+async def export_chunks(
+    partitions: AsyncIterator[Sequence[Any]], fmt: ExportFormat, compress: bool = False
+) -> AsyncIterator[bytes]:
+    """Encode partitions into response chunks, gzip-compressed on the fly if asked."""
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def emit(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor is not None else data
+
+    if fmt == "csv":
+        # The header goes out even when the range is empty
+        if chunk := emit(encode_csv([], header=True).encode()):
+            yield chunk
+    async for rows in partitions:
+        text = encode_csv(rows) if fmt == "csv" else encode_ndjson(rows)
+        if chunk := emit(text.encode()):
+            yield chunk
+    if compressor is not None:
+        yield compressor.flush()
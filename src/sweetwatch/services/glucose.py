@@ -1,79 +1,386 @@
 """Glucose data service - coordinates CGM source and database storage."""
 
+import asyncio
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta, timezone
+from typing import Literal
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from sweetwatch.config import settings
+from sweetwatch.db.engine import AsyncSessionLocal
+from sweetwatch.metrics import SYNC_DURATION, SYNC_ROWS, record_newest
 from sweetwatch.models.glucose import GlucoseReading
-from sweetwatch.sources.base import Trend
-from sweetwatch.sources.librelinkup import LibreLinkUpSource
+from sweetwatch.services.aggregates import GlucoseBucket, bucket_query, to_bucket
+from sweetwatch.services.broadcast import Broadcaster
+from sweetwatch.services.cache import CachedReading, DataVersion, ReadingCache
+from sweetwatch.services.prediction import MAX_GAP, Predictor
+from sweetwatch.services.rollups import PERIODS, apply_rollups, rollup_buckets
+from sweetwatch.sources import create_source
+from sweetwatch.sources.base import CGMSource, GlucoseEntry, Trend, Watermarks, as_utc
+
+__all__ = ["DataVersion", "GlucoseService", "SyncResult", "glucose_service"]
+
+# How a sync caller got its result: its own upstream fetch, a fetch already in
+# flight, or the last fetch reused within the minimum re-fetch interval
+SyncFreshness = Literal["fresh", "coalesced", "cached"]
+
+
+@dataclass(frozen=True)
+class SyncResult:
+    """Readings stored by one upstream fetch."""
+
+    stored: list[GlucoseReading]
+    fetched_at: datetime  # UTC, when the fetch completed
+    freshness: SyncFreshness = "fresh"
+
+
+def _record_newest(readings: Iterable[GlucoseReading]) -> None:
+    newest: dict[str, datetime] = {}
+    for reading in readings:
+        if reading.patient_id not in newest or reading.timestamp > newest[reading.patient_id]:
+            newest[reading.patient_id] = reading.timestamp
+    for patient_id, timestamp in newest.items():
+        record_newest(patient_id, as_utc(timestamp).timestamp())
 
 
 class GlucoseService:
-    """Service for fetching and storing glucose readings."""
+    """Service for fetching and storing glucose readings.
 
-    def __init__(self) -> None:
-        self._source: LibreLinkUpSource | None = None
+    Several services (one per account) may share a cache, broadcaster and
+    predictor so that reads, streams and forecasts see every account's readings.
+    """
 
-    async def _get_source(self) -> LibreLinkUpSource:
-        """Get or create the LibreLinkUp source."""
+    def __init__(
+        self,
+        source: CGMSource | None = None,
+        patient_id: str = "default",
+        cache: ReadingCache | None = None,
+        broadcaster: Broadcaster | None = None,
+        cache_hours: int | None = None,
+        predictor: Predictor | None = None,
+        min_sync_interval: float | None = None,
+    ) -> None:
+        self._source = source
+        self.patient_id = patient_id
+        self.cache = cache or ReadingCache(
+            settings.cache_hours if cache_hours is None else cache_hours
+        )
+        self.broadcaster = broadcaster or Broadcaster(queue_size=settings.stream_queue_size)
+        self.predictor = predictor or Predictor()
+        self._latest_trends: dict[str, int] = {}
+        # Newest stored timestamp per patient, loaded lazily from the database
+        self._watermarks: dict[str, datetime] | None = None
+        self.min_sync_interval = (
+            settings.sync_min_interval if min_sync_interval is None else min_sync_interval
+        )
+        self._sync_task: asyncio.Task[SyncResult] | None = None
+        self._last_sync: tuple[float, SyncResult] | None = None  # (monotonic, result)
+        self._patients: tuple[DataVersion | None, list[str]] | None = None
+
+    @property
+    def trend_changing(self) -> bool:
+        """Whether the newest fetched reading of any patient is not stable."""
+        return any(trend != 3 for trend in self._latest_trends.values())
+
+    @property
+    def reading_interval(self) -> float:
+        """Nominal sensor cadence of the source, in seconds."""
         if self._source is None:
-            self._source = LibreLinkUpSource(
-                username=settings.libre_username,
-                password=settings.libre_password,
-                region=settings.libre_region,
-            )
+            from sweetwatch.sources.librelinkup import LibreLinkUpSource
+
+            return LibreLinkUpSource.reading_interval
+        return self._source.reading_interval
+
+    async def _get_source(self) -> CGMSource:
+        """Get the source, creating the one configured by ``CGM_SOURCE`` on first use."""
+        if self._source is None:
+            self._source = create_source(settings)
         return self._source
 
-    async def fetch_and_store(self, db: Session, count: int = 50) -> list[GlucoseReading]:
-        """Fetch readings from LibreLinkUp and store new ones in database."""
-        source = await self._get_source()
-        entries = await source.get_entries(count=count)
-
-        stored = []
-        for entry in entries:
-            # Check if reading already exists (by timestamp)
-            existing = (
-                db.query(GlucoseReading)
-                .filter(GlucoseReading.timestamp == entry.timestamp)
-                .first()
-            )
+    async def sync(self, count: int = 50, min_interval: float | None = None) -> SyncResult:
+        """Fetch and store new readings, sharing upstream calls between callers.
+
+        Callers arriving while a fetch is in flight wait for it and share its
+        result. Within ``min_interval`` seconds (default ``min_sync_interval``)
+        of the last completed fetch, that result is returned without calling
+        upstream. The fetch uses its own session, so it completes even if the
+        caller that started it goes away.
+        """
+        if self._sync_task is not None:
+            return replace(await asyncio.shield(self._sync_task), freshness="coalesced")
+
+        min_interval = self.min_sync_interval if min_interval is None else min_interval
+        if self._last_sync is not None and min_interval > 0:
+            finished, result = self._last_sync
+            if time.monotonic() - finished < min_interval:
+                return replace(result, freshness="cached")
+
+        task = asyncio.create_task(self._sync_once(count))
+        self._sync_task = task
+        task.add_done_callback(self._sync_done)
+        return await asyncio.shield(task)
+
+    async def _sync_once(self, count: int) -> SyncResult:
+        async with AsyncSessionLocal() as db:
+            stored = await self.fetch_and_store(db, count=count)
+        result = SyncResult(stored, datetime.now(timezone.utc))
+        self._last_sync = (time.monotonic(), result)
+        return result
+
+    def _sync_done(self, task: asyncio.Task[SyncResult]) -> None:
+        if self._sync_task is task:
+            self._sync_task = None
+        if not task.cancelled():
+            task.exception()  # raised to the waiters; don't warn if none are left
+
+    async def fetch_and_store(self, db: AsyncSession, count: int = 50) -> list[GlucoseReading]:
+        """Fetch readings from the source and store new ones in database."""
+        started = time.perf_counter()
+        try:
+            source = await self._get_source()
+            entries = await source.get_entries(count=count, since=await self.get_watermarks(db))
+            for entry in sorted(entries, key=lambda e: e.timestamp):
+                self._latest_trends[entry.patient_id or self.patient_id] = self._trend_to_int(
+                    entry.trend
+                )
+            stored = await self.store_entries(db, entries, patient_id=self.patient_id)
+        except Exception:
+            SYNC_DURATION.labels(self.patient_id, "error").observe(time.perf_counter() - started)
+            raise
+        SYNC_DURATION.labels(self.patient_id, "ok").observe(time.perf_counter() - started)
+        SYNC_ROWS.labels(self.patient_id, "fetched").inc(len(entries))
+        SYNC_ROWS.labels(self.patient_id, "inserted").inc(len(stored))
+        return stored
+
+    async def store_entries(
+        self,
+        db: AsyncSession,
+        entries: Iterable[GlucoseEntry],
+        patient_id: str = "default",
+        notify: bool = True,
+    ) -> list[GlucoseReading]:
+        """Insert entries in one statement, skipping ones already stored.
 
-            if not existing:
-                reading = GlucoseReading(
-                    patient_id=source._patient_id or "default",
-                    value=float(entry.value),
-                    trend=self._trend_to_int(entry.trend),
-                    timestamp=entry.timestamp,
+        Entries tagged with a patient ID are stored for that patient, others
+        for ``patient_id``. Duplicates are resolved by the
+        ``(patient_id, timestamp)`` unique constraint, so the whole batch
+        costs a single round trip. The baseline migration adds the
+        constraint to databases created before it existed. Returns only the
+        readings that were actually inserted. ``notify=False`` skips pushing
+        them to stream subscribers, for bulk imports of history.
+        """
+        # Collapse duplicates within the batch; the last entry for a timestamp wins
+        rows = {
+            (entry.patient_id or patient_id, entry.timestamp): {
+                "patient_id": entry.patient_id or patient_id,
+                "value": float(entry.value),
+                "trend": self._trend_to_int(entry.trend),
+                "timestamp": entry.timestamp,
+            }
+            for entry in entries
+        }
+        if not rows:
+            return []
+
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+            stmt = (
+                insert(GlucoseReading)
+                .on_conflict_do_nothing(index_elements=["patient_id", "timestamp"])
+                .returning(GlucoseReading, sort_by_parameter_order=True)
+            )
+            stored = list(await db.scalars(stmt, list(rows.values())))
+        else:
+            # Generic fallback: one lookup for the whole batch instead of one per entry
+            existing = {
+                (row.patient_id, row.timestamp.replace(tzinfo=None))
+                for row in await db.execute(
+                    select(GlucoseReading.patient_id, GlucoseReading.timestamp).where(
+                        GlucoseReading.patient_id.in_({key[0] for key in rows}),
+                        GlucoseReading.timestamp.in_([key[1] for key in rows]),
+                    )
                 )
-                db.add(reading)
-                stored.append(reading)
+            }
+            stored = [
+                GlucoseReading(**row)
+                for (pid, timestamp), row in rows.items()
+                if (pid, timestamp.replace(tzinfo=None)) not in existing
+            ]
+            db.add_all(stored)
 
         if stored:
-            db.commit()
+            # Same transaction as the insert, so rollups match the raw rows
+            await apply_rollups(db, stored)
+            await db.commit()
+            self.cache.add(stored)
+            self.predictor.add(stored)
+            self._advance_watermarks(stored)
+            _record_newest(stored)
+            if notify:
+                self.broadcaster.publish(
+                    sorted(map(CachedReading.from_model, stored), key=lambda r: r.timestamp)
+                )
         return stored
 
-    def get_current(self, db: Session) -> GlucoseReading | None:
-        """Get the most recent reading from database."""
-        return (
-            db.query(GlucoseReading)
-            .order_by(GlucoseReading.timestamp.desc())
-            .first()
+    async def get_watermarks(self, db: AsyncSession) -> Watermarks:
+        """Newest stored timestamp per patient, for incremental fetches.
+
+        Loaded once with a grouped query, then advanced in memory on insert.
+        Untagged source entries are stored under this service's patient
+        label, which is exposed to the source as the ``None`` key.
+        """
+        if self._watermarks is None:
+            rows = await db.execute(
+                select(GlucoseReading.patient_id, func.max(GlucoseReading.timestamp)).group_by(
+                    GlucoseReading.patient_id
+                )
+            )
+            self._watermarks = {pid: as_utc(ts) for pid, ts in rows}
+        watermarks: dict[str | None, datetime] = {
+            pid: ts for pid, ts in self._watermarks.items()
+        }
+        if self.patient_id in self._watermarks:
+            watermarks[None] = self._watermarks[self.patient_id]
+        return watermarks
+
+    def _advance_watermarks(self, readings: Iterable[GlucoseReading]) -> None:
+        if self._watermarks is None:
+            return
+        for reading in readings:
+            ts = as_utc(reading.timestamp)
+            current = self._watermarks.get(reading.patient_id)
+            if current is None or ts > current:
+                self._watermarks[reading.patient_id] = ts
+
+    async def warm_cache(self, db: AsyncSession) -> None:
+        """Load the hot window from the database so reads can skip SQL.
+
+        The predictor is primed from the same rows, or from the last few
+        readings when the cache is disabled.
+        """
+        window = self.cache.window if self.cache.enabled else 2 * MAX_GAP
+        result = await db.scalars(
+            select(GlucoseReading)
+            .where(GlucoseReading.timestamp >= datetime.now(timezone.utc) - window)
+            .order_by(GlucoseReading.timestamp)
         )
+        readings = list(result)
+        self.predictor.add(readings)
+        _record_newest(readings)
+        if self.cache.enabled:
+            self.cache.load(readings, await self._query_versions(db))
 
-    def get_history(
-        self, db: Session, hours: int = 24, limit: int = 288
-    ) -> list[GlucoseReading]:
-        """Get historical readings from database."""
+    async def get_version(
+        self, db: AsyncSession, patient_id: str | None = None
+    ) -> DataVersion | None:
+        """Cheap change marker: the id and insert time of the last inserted row.
+
+        Scoped to ``patient_id`` when given. Served from memory once the hot
+        window is warm, otherwise a single index lookup.
+        """
+        if self.cache.warm:
+            return self.cache.version_for(patient_id)
+        stmt = select(GlucoseReading.id, GlucoseReading.created_at)
+        if patient_id is not None:
+            stmt = stmt.where(GlucoseReading.patient_id == patient_id)
+        row = (await db.execute(stmt.order_by(GlucoseReading.id.desc()).limit(1))).first()
+        return DataVersion(row.id, row.created_at) if row else None
+
+    async def _query_versions(self, db: AsyncSession) -> dict[str, DataVersion]:
+        last_ids = select(func.max(GlucoseReading.id)).group_by(GlucoseReading.patient_id)
+        rows = await db.execute(
+            select(GlucoseReading.patient_id, GlucoseReading.id, GlucoseReading.created_at).where(
+                GlucoseReading.id.in_(last_ids)
+            )
+        )
+        return {pid: DataVersion(last_id, created_at) for pid, last_id, created_at in rows}
+
+    async def get_patient_ids(self, db: AsyncSession) -> list[str]:
+        """Patients with stored readings, re-read only after new rows were stored."""
+        version = await self.get_version(db)
+        if self._patients is None or self._patients[0] != version:
+            stmt = select(GlucoseReading.patient_id).distinct().order_by(GlucoseReading.patient_id)
+            self._patients = (version, list(await db.scalars(stmt)))
+        return self._patients[1]
+
+    async def get_current(
+        self, db: AsyncSession, patient_id: str | None = None
+    ) -> GlucoseReading | CachedReading | None:
+        """Get the most recent reading, from the hot window when possible.
+
+        Scoped to ``patient_id`` when given, like the other reads.
+        """
+        if self.cache.warm:
+            cached = self.cache.latest(patient_id)
+            if cached is not None:
+                return cached
+        stmt = select(GlucoseReading)
+        if patient_id is not None:
+            stmt = stmt.where(GlucoseReading.patient_id == patient_id)
+        return await db.scalar(stmt.order_by(GlucoseReading.timestamp.desc()).limit(1))
+
+    async def get_history(
+        self, db: AsyncSession, hours: int = 24, limit: int = 288, patient_id: str | None = None
+    ) -> list[GlucoseReading] | list[CachedReading]:
+        """Get historical readings, from the hot window when it covers them."""
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+        if self.cache.covers(hours):
+            return self.cache.history(cutoff, limit, patient_id)
+        stmt = select(GlucoseReading).where(GlucoseReading.timestamp >= cutoff)
+        if patient_id is not None:
+            stmt = stmt.where(GlucoseReading.patient_id == patient_id)
+        result = await db.scalars(stmt.order_by(GlucoseReading.timestamp.desc()).limit(limit))
+        return list(result)
+
+    async def get_history_rows(
+        self, db: AsyncSession, hours: int = 24, limit: int = 288, patient_id: str | None = None
+    ) -> list[tuple[int, float, int | None, datetime]]:
+        """Like ``get_history`` but as ``(id, value, trend, timestamp)`` tuples.
+
+        Selects only those columns, so large windows skip ORM object loading.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+        if self.cache.covers(hours):
+            return [
+                (r.id, r.value, r.trend, r.timestamp)
+                for r in self.cache.history(cutoff, limit, patient_id)
+            ]
+        stmt = select(
+            GlucoseReading.id,
+            GlucoseReading.value,
+            GlucoseReading.trend,
+            GlucoseReading.timestamp,
+        ).where(GlucoseReading.timestamp >= cutoff)
+        if patient_id is not None:
+            stmt = stmt.where(GlucoseReading.patient_id == patient_id)
+        result = await db.execute(stmt.order_by(GlucoseReading.timestamp.desc()).limit(limit))
+        return [(id_, value, trend, ts) for id_, value, trend, ts in result]
+
+    async def get_buckets(
+        self, db: AsyncSession, hours: int, bucket_seconds: int, patient_id: str | None = None
+    ) -> list[GlucoseBucket]:
+        """Mean/min/max/count per time bucket over the last ``hours``, newest first.
+
+        Aggregation runs in the database (GROUP BY on the bucket start), so the
+        response size depends on the resolution rather than the reading count.
+        Hourly and daily buckets are read from rollups, which also cover
+        ranges whose raw readings were compacted by retention.
+        """
         cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
-        return (
-            db.query(GlucoseReading)
-            .filter(GlucoseReading.timestamp >= cutoff)
-            .order_by(GlucoseReading.timestamp.desc())
-            .limit(limit)
-            .all()
+        for period, seconds in PERIODS.items():
+            if seconds == bucket_seconds:
+                return await rollup_buckets(db, period, cutoff, patient_id)
+        stmt = bucket_query(db.get_bind().dialect.name, bucket_seconds, patient_id).where(
+            GlucoseReading.timestamp >= cutoff
         )
+        return [to_bucket(row) for row in await db.execute(stmt)]
 
     @staticmethod
     def _trend_to_int(trend: Trend) -> int:
@@ -0,0 +1,157 @@
+"""Local short-term glucose forecasts.
+
+Each patient has a two-state Kalman filter (level and rate of change) fed
+with every stored reading. An update is a handful of float operations, and
+a forecast extrapolates the filtered trend with a variance that grows with
+the horizon, so predictions are available on every sync without any remote
+call.
+"""
+
+import math
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sweetwatch.models.glucose import GlucoseReading
+from sweetwatch.services.cache import CachedReading
+from sweetwatch.sources.base import naive_utc
+
+HORIZONS = (15, 30, 60)  # minutes
+
+# Sensor noise (SD, mg/dL) and the spectral density of random changes in the
+# rate, (mg/dL/min^2)^2 per minute, tuned for 1-15 minute CGM cadences
+MEASUREMENT_SD = 5.0
+RATE_NOISE = 0.02
+
+# A gap longer than this restarts the filter from the next reading
+MAX_GAP = timedelta(minutes=30)
+
+# Two-sided 95% band
+Z_95 = 1.96
+
+# Range reported by CGM sensors, mg/dL
+SENSOR_MIN = 40.0
+SENSOR_MAX = 400.0
+
+
+@dataclass(slots=True)
+class TrendState:
+    """Filtered level (mg/dL) and rate (mg/dL per minute) with their covariance."""
+
+    timestamp: datetime  # naive UTC of the last reading
+    level: float
+    rate: float = 0.0
+    p_ll: float = MEASUREMENT_SD**2
+    p_lr: float = 0.0
+    p_rr: float = 4.0  # rate unknown until the second reading
+
+    def update(self, timestamp: datetime, value: float) -> None:
+        """Predict forward to ``timestamp`` and correct with ``value``."""
+        dt = (timestamp - self.timestamp).total_seconds() / 60
+        # Predict: constant rate, white-noise acceleration
+        level = self.level + self.rate * dt
+        p_ll = (
+            self.p_ll + 2 * dt * self.p_lr + dt * dt * self.p_rr + RATE_NOISE * dt**3 / 3
+        )
+        p_lr = self.p_lr + dt * self.p_rr + RATE_NOISE * dt * dt / 2
+        p_rr = self.p_rr + RATE_NOISE * dt
+        # Correct
+        s = p_ll + MEASUREMENT_SD**2
+        k_l, k_r = p_ll / s, p_lr / s
+        residual = value - level
+        self.level = level + k_l * residual
+        self.rate = self.rate + k_r * residual
+        self.p_ll = (1 - k_l) * p_ll
+        self.p_lr = (1 - k_l) * p_lr
+        self.p_rr = p_rr - k_r * p_lr
+        self.timestamp = timestamp
+
+    def forecast(self, minutes: float) -> tuple[float, float]:
+        """Expected value and standard deviation ``minutes`` after the last reading."""
+        mean = self.level + self.rate * minutes
+        variance = (
+            self.p_ll
+            + 2 * minutes * self.p_lr
+            + minutes * minutes * self.p_rr
+            + RATE_NOISE * minutes**3 / 3
+        )
+        return mean, math.sqrt(variance)
+
+
+@dataclass(frozen=True, slots=True)
+class ForecastPoint:
+    minutes: int
+    timestamp: datetime
+    value: float
+    low: float
+    high: float
+
+
+@dataclass(frozen=True, slots=True)
+class Prediction:
+    patient_id: str
+    timestamp: datetime  # last reading the forecast is based on
+    value: float  # filtered current level
+    rate: float  # mg/dL per minute
+    points: list[ForecastPoint]
+
+
+def _clamp(value: float) -> float:
+    return min(max(value, SENSOR_MIN), SENSOR_MAX)
+
+
+class Predictor:
+    """Per-patient trend filters, updated in constant time per reading."""
+
+    def __init__(self) -> None:
+        self._states: dict[str, TrendState] = {}
+
+    def update(self, patient_id: str, timestamp: datetime, value: float) -> None:
+        """Feed one reading; readings older than the filter's last one are ignored."""
+        timestamp = naive_utc(timestamp)
+        state = self._states.get(patient_id)
+        if state is None or timestamp - state.timestamp > MAX_GAP:
+            self._states[patient_id] = TrendState(timestamp, float(value))
+        elif timestamp > state.timestamp:
+            state.update(timestamp, float(value))
+
+    def add(self, readings: Iterable[GlucoseReading | CachedReading]) -> None:
+        """Feed stored readings in time order."""
+        for reading in sorted(readings, key=lambda r: naive_utc(r.timestamp)):
+            self.update(reading.patient_id, reading.timestamp, reading.value)
+
+    def predict(
+        self,
+        patient_id: str | None = None,
+        horizons: Iterable[int] = HORIZONS,
+        max_age: timedelta = MAX_GAP,
+    ) -> Prediction | None:
+        """Forecast for a patient, or the one with the newest reading.
+
+        Returns ``None`` when there is no reading within ``max_age``.
+        """
+        if patient_id is None:
+            if not self._states:
+                return None
+            patient_id = max(self._states, key=lambda pid: self._states[pid].timestamp)
+        state = self._states.get(patient_id)
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        if state is None or now - state.timestamp > max_age:
+            return None
+
+        points = []
+        for minutes in horizons:
+            mean, sd = state.forecast(minutes)
+            points.append(
+                ForecastPoint(
+                    minutes=minutes,
+                    timestamp=state.timestamp + timedelta(minutes=minutes),
+                    value=_clamp(mean),
+                    low=_clamp(mean - Z_95 * sd),
+                    high=_clamp(mean + Z_95 * sd),
+                )
+            )
+        return Prediction(patient_id, state.timestamp, state.level, state.rate, points)
+
+    def clear(self) -> None:
+        self._states.clear()
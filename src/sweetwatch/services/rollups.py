@@ -0,0 +1,312 @@
+"""Hourly and daily rollups of glucose readings.
+
+Rollups are updated inside the ingest transaction from the rows that were
+actually inserted, so they never double count. ``rebuild_rollups`` recomputes
+a range from raw readings; the ``0002`` migration runs ``backfill_rollups``
+over readings stored before rollups existed.
+"""
+
+import math
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import Delete, Select, and_, case, delete, func, insert, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from sweetwatch.models.glucose import GlucoseReading, GlucoseRollup
+from sweetwatch.services.aggregates import GlucoseBucket, time_bucket
+from sweetwatch.sources.base import naive_utc
+
+# Consensus target range, mg/dL
+TARGET_LOW = 70
+TARGET_HIGH = 180
+
+PERIODS: dict[str, int] = {
+    "hour": 60 * 60,
+    "day": 24 * 60 * 60,
+}
+
+_COUNTERS = ("count", "value_sum", "value_sum_sq", "below_count", "in_range_count", "above_count")
+
+
+def _truncate(ts: datetime, period: str) -> datetime:
+    ts = naive_utc(ts).replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0) if period == "day" else ts
+
+
+def accumulate(readings: Iterable[GlucoseReading]) -> list[dict[str, Any]]:
+    """Fold readings into one partial rollup row per patient, period and bucket."""
+    rows: dict[tuple[str, str, datetime], dict[str, Any]] = {}
+    for reading in readings:
+        value = float(reading.value)
+        for period in PERIODS:
+            key = (reading.patient_id, period, _truncate(reading.timestamp, period))
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = {
+                    "patient_id": key[0],
+                    "period": period,
+                    "bucket_start": key[2],
+                    "value_min": value,
+                    "value_max": value,
+                    **dict.fromkeys(_COUNTERS, 0),
+                }
+            row["count"] += 1
+            row["value_sum"] += value
+            row["value_sum_sq"] += value * value
+            row["value_min"] = min(row["value_min"], value)
+            row["value_max"] = max(row["value_max"], value)
+            if value < TARGET_LOW:
+                row["below_count"] += 1
+            elif value > TARGET_HIGH:
+                row["above_count"] += 1
+            else:
+                row["in_range_count"] += 1
+    return list(rows.values())
+
+
+async def apply_rollups(db: AsyncSession, readings: Iterable[GlucoseReading]) -> None:
+    """Merge newly inserted readings into their rollups, without committing."""
+    rows = accumulate(readings)
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        upsert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        # SQLite's two-argument min()/max() are scalar, like LEAST/GREATEST
+        least: Callable[..., ColumnElement[Any]]
+        greatest: Callable[..., ColumnElement[Any]]
+        if dialect == "sqlite":
+            least, greatest = func.min, func.max
+        else:
+            least, greatest = func.least, func.greatest
+        stmt = upsert(GlucoseRollup)
+        table = GlucoseRollup.__table__.c
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["patient_id", "period", "bucket_start"],
+            set_={
+                **{name: table[name] + stmt.excluded[name] for name in _COUNTERS},
+                "value_min": least(table.value_min, stmt.excluded.value_min),
+                "value_max": greatest(table.value_max, stmt.excluded.value_max),
+            },
+        )
+        await db.execute(stmt, rows)
+        return
+
+    # Generic fallback: read the touched buckets once and merge in Python
+    keys = {(row["patient_id"], row["period"], row["bucket_start"]) for row in rows}
+    existing = {
+        (r.patient_id, r.period, r.bucket_start): r
+        for r in await db.scalars(
+            select(GlucoseRollup).where(
+                GlucoseRollup.patient_id.in_({k[0] for k in keys}),
+                GlucoseRollup.bucket_start.in_({k[2] for k in keys}),
+            )
+        )
+    }
+    for row in rows:
+        rollup = existing.get((row["patient_id"], row["period"], row["bucket_start"]))
+        if rollup is None:
+            db.add(GlucoseRollup(**row))
+            continue
+        for name in _COUNTERS:
+            setattr(rollup, name, getattr(rollup, name) + row[name])
+        rollup.value_min = min(rollup.value_min, row["value_min"])
+        rollup.value_max = max(rollup.value_max, row["value_max"])
+
+
+def _raw_rollups(dialect: str, period: str, raw_scope: list[Any]) -> Select[*tuple[Any, ...]]:
+    """Rollup counters per patient and ``period`` bucket, aggregated from raw readings."""
+    value = GlucoseReading.value
+    bucket = time_bucket(dialect, GlucoseReading.timestamp, PERIODS[period])
+    return (
+        select(
+            GlucoseReading.patient_id,
+            bucket,
+            func.count(),
+            func.sum(value),
+            func.sum(value * value),
+            func.min(value),
+            func.max(value),
+            func.sum(case((value < TARGET_LOW, 1), else_=0)),
+            func.sum(case((and_(value >= TARGET_LOW, value <= TARGET_HIGH), 1), else_=0)),
+            func.sum(case((value > TARGET_HIGH, 1), else_=0)),
+        )
+        .where(*raw_scope)
+        .group_by(GlucoseReading.patient_id, bucket)
+    )
+
+
+def _rollup_rows(period: str, result: Iterable[Any]) -> list[dict[str, Any]]:
+    return [
+        {
+            "patient_id": pid,
+            "period": period,
+            "bucket_start": naive_utc(datetime.fromtimestamp(epoch, tz=timezone.utc)),
+            "count": count,
+            "value_sum": total,
+            "value_sum_sq": total_sq,
+            "value_min": low,
+            "value_max": high,
+            "below_count": below,
+            "in_range_count": in_range,
+            "above_count": above,
+        }
+        for pid, epoch, count, total, total_sq, low, high, below, in_range, above in result
+    ]
+
+
+def _delete_rollups(period: str, rows: list[dict[str, Any]]) -> Delete:
+    """DELETE the rollups that ``rows`` replace."""
+    key = tuple_(GlucoseRollup.patient_id, GlucoseRollup.bucket_start)
+    return delete(GlucoseRollup).where(
+        GlucoseRollup.period == period,
+        key.in_([(row["patient_id"], row["bucket_start"]) for row in rows]),
+    )
+
+
+async def rebuild_rollups(
+    db: AsyncSession, start: datetime, end: datetime, patient_id: str | None = None
+) -> int:
+    """Recompute rollups for whole UTC days overlapping ``[start, end)`` from raw rows.
+
+    Only buckets that still have raw rows are replaced, so days already
+    compacted by retention keep their rollups. Returns the number of rollup
+    rows written. Like ``apply_rollups`` it does not commit, so callers can
+    make the rebuild part of a larger transaction.
+    """
+    start = _truncate(start, "day")
+    if naive_utc(end) != _truncate(end, "day"):
+        end = _truncate(end, "day") + timedelta(days=1)
+    else:
+        end = naive_utc(end)
+    dialect = db.get_bind().dialect.name
+
+    raw_scope = [GlucoseReading.timestamp >= start, GlucoseReading.timestamp < end]
+    if patient_id is not None:
+        raw_scope.append(GlucoseReading.patient_id == patient_id)
+
+    written = 0
+    for period in PERIODS:
+        rows = _rollup_rows(period, await db.execute(_raw_rollups(dialect, period, raw_scope)))
+        if rows:
+            await db.execute(_delete_rollups(period, rows))
+            await db.execute(insert(GlucoseRollup), rows)
+        written += len(rows)
+    return written
+
+
+def backfill_rollups(connection: Connection, batch_size: int = 500) -> int:
+    """Recompute the rollups of every bucket that has raw rows, on a sync connection.
+
+    For the migration that fills rollups for readings stored before they
+    existed. Replaces ``batch_size`` buckets per statement; returns the
+    number of rollup rows written.
+    """
+    dialect = connection.dialect.name
+    written = 0
+    for period in PERIODS:
+        rows = _rollup_rows(period, connection.execute(_raw_rollups(dialect, period, [])))
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i : i + batch_size]
+            connection.execute(_delete_rollups(period, batch))
+            connection.execute(insert(GlucoseRollup), batch)
+        written += len(rows)
+    return written
+
+
+async def rollup_buckets(
+    db: AsyncSession, period: str, since: datetime, patient_id: str | None = None
+) -> list[GlucoseBucket]:
+    """Mean/min/max/count per hour or day from rollups, newest first.
+
+    Covers the bucket containing ``since`` in full. Unlike the raw bucket
+    query this keeps working for ranges whose raw rows were compacted.
+    Without ``patient_id`` buckets are pooled across patients.
+    """
+    total = func.sum(GlucoseRollup.count)
+    stmt = (
+        select(
+            GlucoseRollup.bucket_start,
+            func.sum(GlucoseRollup.value_sum) / total,
+            func.min(GlucoseRollup.value_min),
+            func.max(GlucoseRollup.value_max),
+            total,
+        )
+        .where(
+            GlucoseRollup.period == period,
+            GlucoseRollup.bucket_start >= _truncate(since, period),
+        )
+        .group_by(GlucoseRollup.bucket_start)
+        .order_by(GlucoseRollup.bucket_start.desc())
+    )
+    if patient_id is not None:
+        stmt = stmt.where(GlucoseRollup.patient_id == patient_id)
+    return [
+        GlucoseBucket(bucket_start, float(mean), float(low), float(high), int(count))
+        for bucket_start, mean, low, high, count in await db.execute(stmt)
+    ]
+
+
+@dataclass
+class RollupSummary:
+    """Statistics over a span of daily rollups."""
+
+    days: int
+    count: int
+    mean: float | None
+    sd: float | None
+    cv: float | None  # percent
+    min: float | None
+    max: float | None
+    time_below: float | None  # percent of readings below TARGET_LOW
+    time_in_range: float | None
+    time_above: float | None
+
+
+async def summarize(db: AsyncSession, days: int, patient_id: str | None = None) -> RollupSummary:
+    """Mean, SD, CV and time in ranges over the last ``days`` UTC days (today included).
+
+    Reads one rollup row per patient per day, so cost grows with ``days``
+    rather than with the number of readings.
+    """
+    since = _truncate(datetime.now(timezone.utc), "day") - timedelta(days=days - 1)
+    stmt = select(
+        func.sum(GlucoseRollup.count),
+        func.sum(GlucoseRollup.value_sum),
+        func.sum(GlucoseRollup.value_sum_sq),
+        func.min(GlucoseRollup.value_min),
+        func.max(GlucoseRollup.value_max),
+        func.sum(GlucoseRollup.below_count),
+        func.sum(GlucoseRollup.in_range_count),
+        func.sum(GlucoseRollup.above_count),
+    ).where(GlucoseRollup.period == "day", GlucoseRollup.bucket_start >= since)
+    if patient_id is not None:
+        stmt = stmt.where(GlucoseRollup.patient_id == patient_id)
+
+    n, total, total_sq, low, high, below, in_range, above = (await db.execute(stmt)).one()
+    if not n:
+        return RollupSummary(days, 0, None, None, None, None, None, None, None, None)
+
+    mean = total / n
+    variance = (total_sq - total * total / n) / (n - 1) if n > 1 else 0.0
+    sd = math.sqrt(max(variance, 0.0))
+    return RollupSummary(
+        days=days,
+        count=n,
+        mean=mean,
+        sd=sd,
+        cv=sd / mean * 100 if mean else None,
+        min=low,
+        max=high,
+        time_below=below / n * 100,
+        time_in_range=in_range / n * 100,
+        time_above=above / n * 100,
+    )
@@ -0,0 +1,71 @@
+"""Compact payload for memory-constrained watch widgets.
+
+The payload is a positional JSON array with integers only::
+
+    [1, t, g, d, [dt1, dt2, ...], [g1, g2, ...], s]
+
+==========  ===========================================================
+index       meaning
+==========  ===========================================================
+0           schema version (``WATCH_SCHEMA_VERSION``)
+1           ``t``: epoch seconds of the current reading (UTC)
+2           ``g``: current glucose, mg/dL, rounded
+3           ``d``: trend 1-5 (see ``/current``)
+4           sparkline time deltas, newest first: point ``k`` was taken
+            ``dt1 + ... + dt(k+1)`` seconds before ``t``
+5           sparkline values, mg/dL, same order as index 4
+6           ``s``: 1 if no reading falls in the requested window and
+            index 1-3 are the last known reading, else 0
+==========  ===========================================================
+
+New fields are only ever appended, so older widgets keep parsing index
+0-5 unchanged; a breaking change bumps the schema version.
+"""
+
+from collections.abc import Sequence
+from datetime import datetime, timezone
+
+from sweetwatch.models.glucose import GlucoseReading
+from sweetwatch.services.cache import CachedReading
+
+WATCH_SCHEMA_VERSION = 1
+
+
+def _epoch(ts: datetime) -> int:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp())
+
+
+def watch_payload(
+    readings: Sequence[GlucoseReading | CachedReading], max_points: int, stale: bool = False
+) -> list[object]:
+    """Encode readings (newest first) as the compact watch array.
+
+    The first reading is the current value; the rest are thinned evenly to
+    at most ``max_points`` sparkline points. ``stale`` marks a current value
+    from outside the requested window.
+    """
+    current, history = readings[0], readings[1:]
+    points: Sequence[GlucoseReading | CachedReading] = ()
+    if history and max_points > 0:
+        stride = -(-len(history) // max_points)  # ceil
+        points = history[stride - 1 :: stride][:max_points]
+
+    base = _epoch(current.timestamp)
+    deltas, values = [], []
+    previous = base
+    for reading in points:
+        ts = _epoch(reading.timestamp)
+        deltas.append(previous - ts)
+        values.append(round(reading.value))
+        previous = ts
+    return [
+        WATCH_SCHEMA_VERSION,
+        base,
+        round(current.value),
+        current.trend or 3,
+        deltas,
+        values,
+        int(stale),
+    ]
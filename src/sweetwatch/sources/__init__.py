@@ -1,29 +1,57 @@
-"""CGM data sources."""
+"""CGM data sources.
 
-from typing import TYPE_CHECKING
+Implementations are imported on first use (they pull in httpx and, for
+replay, NumPy), so importing the package for ``create_source`` or the base
+types stays cheap.
+"""
 
-from .base import CGMSource, GlucoseEntry, Trend
-from .librelinkup import LibreLinkUpSource
-from .nightscout import NightscoutSource
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+from .base import CGMSource, GlucoseEntry, Trend, Watermarks
 
 if TYPE_CHECKING:
-    from sweetwatch.config import Settings
+    from sweetwatch.config import AccountConfig, Settings
+
+    from .http import HttpOptions, SessionStore
+    from .librelinkup import LibreLinkUpSource
+    from .nightscout import NightscoutSource
+    from .replay import ReplaySource
 
 __all__ = [
     "CGMSource",
     "GlucoseEntry",
     "Trend",
+    "Watermarks",
+    "HttpOptions",
+    "SessionStore",
     "NightscoutSource",
     "LibreLinkUpSource",
+    "ReplaySource",
     "create_source",
 ]
 
+_LAZY = {
+    "HttpOptions": ".http",
+    "SessionStore": ".http",
+    "LibreLinkUpSource": ".librelinkup",
+    "NightscoutSource": ".nightscout",
+    "ReplaySource": ".replay",
+}
+
 
-def create_source(settings: "Settings") -> CGMSource:
+def __getattr__(name: str) -> Any:
+    if name in _LAZY:
+        return getattr(import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def create_source(settings: "Settings | AccountConfig") -> CGMSource:
     """Create a CGM source based on configuration.
 
     Args:
-        settings: Application settings containing source configuration.
+        settings: Application settings or a scheduler account containing
+            source configuration.
 
     Returns:
         Configured CGM source instance.
@@ -31,14 +59,23 @@ def create_source(settings: "Settings") -> CGMSource:
     Raises:
         ValueError: If the configured source type is unknown.
     """
+    from sweetwatch.config import settings as app_settings
+
+    from .http import HttpOptions, SessionStore
+
     source_type = settings.cgm_source.lower()
+    # Transport settings are process-wide, shared by every account
+    http = HttpOptions.from_settings(app_settings)
 
     if source_type == "nightscout":
         if not settings.nightscout_url:
             raise ValueError("NIGHTSCOUT_URL is required when CGM_SOURCE=nightscout")
+        from .nightscout import NightscoutSource
+
         return NightscoutSource(
             url=settings.nightscout_url,
             api_secret=settings.nightscout_api_secret,
+            http=http,
         )
 
     if source_type == "librelinkup":
@@ -46,10 +83,35 @@ def create_source(settings: "Settings") -> CGMSource:
             raise ValueError(
                 "LIBRE_USERNAME and LIBRE_PASSWORD are required when CGM_SOURCE=librelinkup"
             )
+        from .librelinkup import LibreLinkUpSource
+
         return LibreLinkUpSource(
             username=settings.libre_username,
             password=settings.libre_password,
             region=settings.libre_region,
+            max_concurrency=settings.libre_max_concurrency,
+            connections_ttl=settings.libre_connections_ttl,
+            http=http,
+            session_store=(
+                SessionStore(app_settings.libre_session_file)
+                if app_settings.libre_session_file
+                else None
+            ),
+        )
+
+    if source_type == "replay":
+        from .replay import ReplaySource
+
+        # Simulated conditions are process-wide; the series itself is per account
+        return ReplaySource(
+            patients=settings.replay_patients,
+            interval_minutes=settings.replay_interval,
+            seed=settings.replay_seed,
+            recording=settings.replay_file or None,
+            speed=app_settings.replay_speed,
+            latency=app_settings.replay_latency,
+            error_rate=app_settings.replay_error_rate,
+            gap_rate=app_settings.replay_gap_rate,
         )
 
     raise ValueError(f"Unknown CGM source: {source_type}")
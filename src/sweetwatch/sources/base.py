@@ -1,8 +1,9 @@
 """Base classes for CGM data sources."""
 
 from abc import ABC, abstractmethod
+from collections.abc import Mapping
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 
 
@@ -26,19 +27,48 @@ class GlucoseEntry:
     value: int  # mg/dL
     trend: Trend
     timestamp: datetime
+    patient_id: str | None = None  # set by sources that follow several patients
+
+
+# Newest stored timestamp per patient ID. The ``None`` key applies to entries
+# the source does not tag with a patient ID.
+Watermarks = Mapping[str | None, datetime]
+
+
+def as_utc(ts: datetime) -> datetime:
+    """Treat naive timestamps (as stored in the database) as UTC."""
+    return ts if ts.tzinfo is not None else ts.replace(tzinfo=timezone.utc)
+
+
+def naive_utc(ts: datetime) -> datetime:
+    """Normalize a timestamp to naive UTC, the form the database stores and returns."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
 
 
 class CGMSource(ABC):
     """Abstract base class for CGM data sources."""
 
+    # Nominal seconds between sensor readings; the starting point for
+    # cadence-aware scheduling until the real cadence is learned
+    reading_interval: float = 300.0
+
     @abstractmethod
     async def get_current(self) -> GlucoseEntry | None:
         """Get the most recent glucose reading."""
         ...
 
     @abstractmethod
-    async def get_entries(self, count: int = 10) -> list[GlucoseEntry]:
-        """Get recent glucose readings."""
+    async def get_entries(
+        self, count: int = 10, since: Watermarks | None = None
+    ) -> list[GlucoseEntry]:
+        """Get recent glucose readings.
+
+        When ``since`` is given, sources should skip entries at or before the
+        watermark of their patient as early as possible; callers still
+        deduplicate, so returning extra entries is safe.
+        """
         ...
 
     @abstractmethod
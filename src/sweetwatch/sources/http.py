@@ -0,0 +1,195 @@
+"""Shared HTTP transport for CGM sources.
+
+Each source keeps one pooled ``httpx.AsyncClient`` from ``create_client``
+and sends requests through ``send``, which retries rate limits, server
+errors and dropped connections with exponential backoff and full jitter.
+``SessionStore`` keeps login state on disk so a restarted process can skip
+the login round trips.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+from sweetwatch.metrics import UPSTREAM_REQUEST_DURATION, endpoint_label
+
+if TYPE_CHECKING:
+    from sweetwatch.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: rate limits and transient upstream failures
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass(frozen=True)
+class HttpOptions:
+    """Connection pool and retry settings shared by all sources."""
+
+    timeout: float = 30.0
+    max_connections: int = 10
+    max_keepalive: int = 5
+    keepalive_expiry: float = 30.0  # seconds an idle connection is kept open
+    http2: bool = False
+    retries: int = 3  # attempts after the first one
+    backoff: float = 0.5  # seconds, doubled on every attempt
+    max_backoff: float = 30.0
+
+    @classmethod
+    def from_settings(cls, settings: "Settings") -> "HttpOptions":
+        return cls(
+            timeout=settings.http_timeout,
+            max_connections=settings.http_max_connections,
+            max_keepalive=settings.http_max_keepalive,
+            keepalive_expiry=settings.http_keepalive_expiry,
+            http2=settings.http_http2,
+            retries=settings.http_retries,
+            backoff=settings.http_backoff,
+            max_backoff=settings.http_max_backoff,
+        )
+
+
+def create_client(options: HttpOptions, **kwargs: Any) -> httpx.AsyncClient:
+    """Pooled client with keep-alive limits; HTTP/2 when asked and available."""
+    http2 = options.http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 needs the h2 package (pip install 'httpx[http2]'); using HTTP/1.1")
+        http2 = False
+    return httpx.AsyncClient(
+        timeout=options.timeout,
+        limits=httpx.Limits(
+            max_connections=options.max_connections,
+            max_keepalive_connections=options.max_keepalive,
+            keepalive_expiry=options.keepalive_expiry,
+        ),
+        http2=http2,
+        **kwargs,
+    )
+
+
+def _retry_after(response: httpx.Response | None) -> float | None:
+    """Seconds requested by a ``Retry-After`` header, if any."""
+    value = response.headers.get("retry-after") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def backoff_delay(
+    options: HttpOptions, attempt: int, response: httpx.Response | None = None
+) -> float:
+    """Delay before retry ``attempt`` (0-based): Retry-After, else full jitter."""
+    retry_after = _retry_after(response)
+    if retry_after is not None:
+        return min(retry_after, options.max_backoff)
+    return random.uniform(0, min(options.max_backoff, options.backoff * 2**attempt))
+
+
+async def send(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    options: HttpOptions,
+    **kwargs: Any,
+) -> httpx.Response:
+    """Send a request, retrying 429/5xx responses and transport errors.
+
+    The last response is returned as is once retries run out, so callers
+    still decide how to handle the status. Every attempt is timed into the
+    upstream latency histogram, labelled by host and path.
+    """
+    target = client.base_url.join(url)
+    source, endpoint = target.host, endpoint_label(target.path)
+    attempt = 0
+    while True:
+        response: httpx.Response | None = None
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            UPSTREAM_REQUEST_DURATION.labels(source, endpoint, "error").observe(
+                time.perf_counter() - started
+            )
+            if attempt >= options.retries:
+                raise
+            reason = f"{type(e).__name__}: {e}"
+        else:
+            UPSTREAM_REQUEST_DURATION.labels(source, endpoint, str(response.status_code)).observe(
+                time.perf_counter() - started
+            )
+            if response.status_code not in RETRY_STATUSES or attempt >= options.retries:
+                return response
+            reason = f"HTTP {response.status_code}"
+        delay = backoff_delay(options, attempt, response)
+        attempt += 1
+        logger.warning(
+            f"{method} {target.path} failed ({reason}); "
+            f"retry {attempt}/{options.retries} in {delay:.1f}s"
+        )
+        await asyncio.sleep(delay)
+
+
+class SessionStore:
+    """Login state per account in a JSON file readable only by its owner.
+
+    Entries are keyed by a hash of the account identity, so the file holds
+    tokens but no usernames. Writes replace the file atomically.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    @staticmethod
+    def key(*identity: str) -> str:
+        return hashlib.sha256("|".join(identity).encode()).hexdigest()
+
+    def _read(self) -> dict[str, dict[str, Any]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable session file {self.path}: {e}")
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, data: dict[str, dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        tmp.replace(self.path)
+
+    def load(self, key: str) -> dict[str, Any] | None:
+        return self._read().get(key)
+
+    def save(self, key: str, state: dict[str, Any]) -> None:
+        data = self._read()
+        data[key] = state
+        self._write(data)
+
+    def drop(self, key: str) -> None:
+        data = self._read()
+        if data.pop(key, None) is not None:
+            self._write(data)
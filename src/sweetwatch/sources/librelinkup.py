@@ -1,12 +1,18 @@
 """LibreLinkUp API client."""
 
+import asyncio
 import hashlib
 import logging
+import time
 from datetime import datetime, timezone
+from typing import Any
 
 import httpx
 
-from .base import CGMSource, GlucoseEntry, Trend
+from sweetwatch.metrics import UPSTREAM_LOGINS
+
+from .base import CGMSource, GlucoseEntry, Trend, Watermarks, as_utc
+from .http import HttpOptions, SessionStore, create_client, send
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +28,9 @@ TREND_MAP: dict[str | int, Trend] = {
     "rising": Trend.RISING,
 }
 
+# Persisted tokens this close to expiry are not reused
+TOKEN_EXPIRY_MARGIN = 300  # seconds
+
 # User agent mimicking iOS app
 USER_AGENT = "Mozilla/5.0 (iPhone; CPU OS 17_4.1 like Mac OS X) AppleWebKit/536.26 (KHTML, like Gecko) Version/17.4.1 Mobile/10A5355d Safari/8536.25"
 
@@ -29,6 +38,8 @@ USER_AGENT = "Mozilla/5.0 (iPhone; CPU OS 17_4.1 like Mac OS X) AppleWebKit/536.
 class LibreLinkUpSource(CGMSource):
     """CGM data source using LibreLinkUp API."""
 
+    reading_interval = 60.0
+
     BASE_URLS: dict[str, str] = {
         "EU": "https://api-eu.libreview.io",
         "US": "https://api-us.libreview.io",
@@ -43,15 +54,43 @@ class LibreLinkUpSource(CGMSource):
         "LA": "https://api-la.libreview.io",
     }
 
-    def __init__(self, username: str, password: str, region: str = "EU") -> None:
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        region: str = "EU",
+        max_concurrency: int = 4,
+        connections_ttl: float = 3600.0,
+        http: HttpOptions | None = None,
+        session_store: SessionStore | None = None,
+    ) -> None:
         self.username = username
         self.password = password
         self.region = region.upper()
         self.base_url = self.BASE_URLS.get(self.region, self.BASE_URLS["EU"])
+        self.connections_ttl = connections_ttl
+        self.http_options = http or HttpOptions()
         self._token: str | None = None
+        self._token_expires: float | None = None  # epoch seconds
         self._user_id: str | None = None
-        self._patient_id: str | None = None
-        self._http = httpx.AsyncClient(timeout=30.0)
+        self._patient_ids: list[str] = []
+        self._connections_fetched_at: float | None = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._login_lock = asyncio.Lock()
+        self._session_store = session_store
+        self._session_key = SessionStore.key("librelinkup", self.username.lower())
+        self._session_restored = False
+        self._http = create_client(self.http_options)
+
+    @property
+    def _patient_id(self) -> str | None:
+        """First followed patient, for callers that expect a single one."""
+        return self._patient_ids[0] if self._patient_ids else None
+
+    @property
+    def patient_ids(self) -> list[str]:
+        """All patients followed by this account."""
+        return list(self._patient_ids)
 
     def _get_headers(self, authenticated: bool = False) -> dict[str, str]:
         """Get headers for LibreLinkUp API requests."""
@@ -70,20 +109,103 @@ class LibreLinkUpSource(CGMSource):
                 headers["account-id"] = account_id
         return headers
 
+    def _restore_session(self) -> None:
+        """Reuse a token and connection list persisted by an earlier process."""
+        self._session_restored = True
+        if self._session_store is None:
+            return
+        state = self._session_store.load(self._session_key)
+        if not state or not state.get("token"):
+            return
+        expires = state.get("expires")
+        if expires is not None and expires - TOKEN_EXPIRY_MARGIN < time.time():
+            return
+        self._token = state["token"]
+        self._token_expires = expires
+        self._user_id = state.get("user_id")
+        self.base_url = state.get("base_url") or self.base_url
+        connections_at = state.get("connections_at")
+        if connections_at is not None:
+            self._patient_ids = list(state.get("patient_ids", []))
+            age = max(time.time() - connections_at, 0.0)
+            self._connections_fetched_at = time.monotonic() - age
+        logger.info("Restored LibreLinkUp session, skipping login")
+
+    def _save_session(self) -> None:
+        if self._session_store is None or self._token is None:
+            return
+        connections_at = None
+        if self._connections_fetched_at is not None:
+            connections_at = time.time() - (time.monotonic() - self._connections_fetched_at)
+        try:
+            self._session_store.save(
+                self._session_key,
+                {
+                    "token": self._token,
+                    "expires": self._token_expires,
+                    "user_id": self._user_id,
+                    "base_url": self.base_url,
+                    "patient_ids": self._patient_ids,
+                    "connections_at": connections_at,
+                },
+            )
+        except OSError as e:
+            logger.warning(f"Could not persist LibreLinkUp session: {e}")
+
     async def _ensure_authenticated(self) -> None:
         """Authenticate if not already authenticated."""
+        if not self._session_restored:
+            self._restore_session()
         if self._token is None:
-            await self._login()
-        if self._patient_id is None:
-            await self._get_patient_id()
+            async with self._login_lock:
+                if self._token is None:
+                    await self._login()
+        if (
+            self._connections_fetched_at is None
+            or time.monotonic() - self._connections_fetched_at > self.connections_ttl
+        ):
+            await self._refresh_connections()
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Authenticated request; a rejected token triggers one re-login and retry."""
+        token = self._token
+        resp = await send(
+            self._http,
+            method,
+            url,
+            self.http_options,
+            headers=self._get_headers(authenticated=True),
+            **kwargs,
+        )
+        if resp.status_code != 401:
+            return resp
+
+        async with self._login_lock:
+            # Concurrent requests share one re-login for the same stale token
+            if self._token == token:
+                logger.info("LibreLinkUp token rejected, logging in again")
+                self._token = None
+                await self._login()
+        return await send(
+            self._http,
+            method,
+            url,
+            self.http_options,
+            headers=self._get_headers(authenticated=True),
+            **kwargs,
+        )
 
     async def _login(self) -> None:
         """Authenticate with LibreLinkUp and store the auth token."""
         logger.info(f"Logging in to LibreLinkUp ({self.region})...")
+        UPSTREAM_LOGINS.labels("librelinkup").inc()
 
         url = f"{self.base_url}/llu/auth/login"
-        resp = await self._http.post(
+        resp = await send(
+            self._http,
+            "POST",
             url,
+            self.http_options,
             json={"email": self.username, "password": self.password},
             headers=self._get_headers(),
         )
@@ -99,8 +221,11 @@ class LibreLinkUpSource(CGMSource):
             self.base_url = self.BASE_URLS.get(new_region.upper(), self.base_url)
             # Retry login with new region
             url = f"{self.base_url}/llu/auth/login"
-            resp = await self._http.post(
+            resp = await send(
+                self._http,
+                "POST",
                 url,
+                self.http_options,
                 json={"email": self.username, "password": self.password},
                 headers=self._get_headers(),
             )
@@ -116,6 +241,7 @@ class LibreLinkUpSource(CGMSource):
         auth_data = data.get("data", {})
         auth_ticket = auth_data.get("authTicket", {})
         self._token = auth_ticket.get("token")
+        self._token_expires = auth_ticket.get("expires")
 
         # Get user ID for account-id header
         user_data = auth_data.get("user", {})
@@ -126,14 +252,12 @@ class LibreLinkUpSource(CGMSource):
             raise RuntimeError("Failed to get auth token from LibreLinkUp")
 
         logger.info("Successfully logged in to LibreLinkUp")
+        self._save_session()
 
-    async def _get_patient_id(self) -> None:
-        """Get the first patient connection ID."""
+    async def _refresh_connections(self) -> None:
+        """Fetch the IDs of all patients this account follows."""
         url = f"{self.base_url}/llu/connections"
-        resp = await self._http.get(
-            url,
-            headers=self._get_headers(authenticated=True),
-        )
+        resp = await self._request("GET", url)
 
         logger.info(f"Connections response status: {resp.status_code}")
         if resp.status_code != 200:
@@ -143,18 +267,23 @@ class LibreLinkUpSource(CGMSource):
         data = resp.json()
 
         connections = data.get("data", [])
-        if connections:
-            self._patient_id = connections[0]["patientId"]
-            logger.info(f"Found patient ID: {self._patient_id}")
+        self._patient_ids = [c["patientId"] for c in connections]
+        self._connections_fetched_at = time.monotonic()
+        if self._patient_ids:
+            logger.info(
+                f"Found {len(self._patient_ids)} patient connection(s): {self._patient_ids}"
+            )
         else:
             logger.warning("No patient connections found.")
+        self._save_session()
 
     async def get_current(self) -> GlucoseEntry | None:
         """Get the most recent glucose reading."""
         entries = await self.get_entries(count=1)
         return entries[0] if entries else None
 
-    def _parse_timestamp(self, ts_str: str) -> datetime:
+    @staticmethod
+    def _parse_timestamp(ts_str: str) -> datetime:
         """Parse timestamp from various LibreLinkUp formats."""
         if not ts_str:
             return datetime.now(timezone.utc)
@@ -179,30 +308,56 @@ class LibreLinkUpSource(CGMSource):
         logger.warning(f"Could not parse timestamp: {ts_str}")
         return datetime.now(timezone.utc)
 
-    async def get_entries(self, count: int = 10) -> list[GlucoseEntry]:
-        """Get recent glucose readings from LibreLinkUp."""
+    async def get_entries(
+        self, count: int = 10, since: Watermarks | None = None
+    ) -> list[GlucoseEntry]:
+        """Get recent glucose readings for every followed patient.
+
+        Graphs are fetched concurrently, bounded by the source semaphore, and
+        each entry is tagged with its patient ID. ``since`` is looked up per
+        patient.
+        """
         await self._ensure_authenticated()
 
-        if not self._patient_id:
+        if not self._patient_ids:
             return []
 
-        url = f"{self.base_url}/llu/connections/{self._patient_id}/graph"
-        resp = await self._http.get(
-            url,
-            headers=self._get_headers(authenticated=True),
+        since = since or {}
+        results = await asyncio.gather(
+            *(
+                self._get_patient_entries(patient_id, count, since.get(patient_id))
+                for patient_id in self._patient_ids
+            )
         )
+        return [entry for entries in results for entry in entries]
+
+    async def _get_patient_entries(
+        self, patient_id: str, count: int, since: datetime | None = None
+    ) -> list[GlucoseEntry]:
+        """Get glucose readings for one patient from their graph, newer than ``since``."""
+        url = f"{self.base_url}/llu/connections/{patient_id}/graph"
+        async with self._semaphore:
+            resp = await self._request("GET", url)
         resp.raise_for_status()
         data = resp.json()["data"]
 
-        entries = []
         graph_data = data.get("graphData", [])
 
-        for item in graph_data[-count:]:
-            trend_value = item.get("TrendArrow", item.get("trend", 3))
-            trend = TREND_MAP.get(trend_value, Trend.UNKNOWN)
-
+        # Graph items are chronological: walk back from the newest and stop at
+        # the watermark, so already stored items are neither parsed nor built
+        cutoff = as_utc(since) if since is not None else None
+        new_items: list[tuple[dict[str, Any], datetime]] = []
+        for item in reversed(graph_data[-count:]):
             ts_str = item.get("Timestamp", item.get("FactoryTimestamp", item.get("timestamp", "")))
             timestamp = self._parse_timestamp(ts_str)
+            if cutoff is not None and as_utc(timestamp) <= cutoff:
+                break
+            new_items.append((item, timestamp))
+
+        entries = []
+        for item, timestamp in reversed(new_items):
+            trend_value = item.get("TrendArrow", item.get("trend", 3))
+            trend = TREND_MAP.get(trend_value, Trend.UNKNOWN)
 
             value = item.get("ValueInMgPerDl", item.get("Value", item.get("value", 0)))
 
@@ -211,6 +366,7 @@ class LibreLinkUpSource(CGMSource):
                     value=int(value),
                     trend=trend,
                     timestamp=timestamp,
+                    patient_id=patient_id,
                 )
             )
 
@@ -0,0 +1,100 @@
+"""Streaming reader for LibreView CSV glucose exports."""
+
+import csv
+import logging
+from collections.abc import Iterator
+from datetime import datetime, timezone, tzinfo
+from pathlib import Path
+
+from .base import GlucoseEntry, Trend
+
+logger = logging.getLogger(__name__)
+
+MMOL_TO_MGDL = 18.0182
+
+# Record types carrying a glucose value, mapped to their column prefix
+RECORD_COLUMNS: dict[str, str] = {
+    "0": "Historic Glucose",
+    "1": "Scan Glucose",
+}
+
+# LibreView uses the account locale for timestamps
+TIMESTAMP_FORMATS = [
+    "%m-%d-%Y %I:%M %p",
+    "%d-%m-%Y %H:%M",
+    "%Y-%m-%d %H:%M",
+    "%m/%d/%Y %I:%M %p",
+    "%d/%m/%Y %H:%M",
+    "%d.%m.%Y %H:%M",
+]
+
+
+def _parse_timestamp(value: str, tz: tzinfo) -> datetime | None:
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).replace(tzinfo=tz).astimezone(timezone.utc)
+        except ValueError:
+            continue
+    return None
+
+
+def _value_column(header: list[str], prefix: str) -> tuple[int, float] | None:
+    """Index and mg/dL factor of the column starting with ``prefix``."""
+    for index, name in enumerate(header):
+        if name.startswith(prefix):
+            return index, MMOL_TO_MGDL if "mmol" in name.lower() else 1.0
+    return None
+
+
+def read_libreview_csv(
+    path: str | Path, tz: tzinfo = timezone.utc, skip_rows: int = 0
+) -> Iterator[tuple[int, GlucoseEntry]]:
+    """Yield ``(row_number, entry)`` pairs from a LibreView export, one row at a time.
+
+    The export starts with a metadata line followed by the column header.
+    Rows before ``skip_rows`` (data row numbers, 1-based) are skipped without
+    being parsed, which is how interrupted imports resume. Timestamps are
+    local to the exporting account and are interpreted in ``tz``.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header: list[str] | None = None
+        for row in reader:
+            if "Device Timestamp" in row:
+                header = row
+                break
+        if header is None:
+            raise ValueError(f"No LibreView header row found in {path}")
+
+        ts_index = header.index("Device Timestamp")
+        type_index = header.index("Record Type")
+        value_columns = {
+            record_type: column
+            for record_type, prefix in RECORD_COLUMNS.items()
+            if (column := _value_column(header, prefix)) is not None
+        }
+
+        for row_number, row in enumerate(reader, start=1):
+            if row_number <= skip_rows or len(row) <= type_index:
+                continue
+            column = value_columns.get(row[type_index])
+            if column is None:
+                continue
+            index, factor = column
+            raw_value = row[index] if index < len(row) else ""
+            if not raw_value:
+                continue
+            timestamp = _parse_timestamp(row[ts_index], tz)
+            if timestamp is None:
+                logger.warning(f"Skipping row {row_number}: bad timestamp {row[ts_index]!r}")
+                continue
+            try:
+                value = float(raw_value.replace(",", "."))
+            except ValueError:
+                logger.warning(f"Skipping row {row_number}: bad glucose value {raw_value!r}")
+                continue
+            yield row_number, GlucoseEntry(
+                value=round(value * factor),
+                trend=Trend.UNKNOWN,
+                timestamp=timestamp,
+            )
@@ -1,11 +1,12 @@
 """Nightscout API client."""
 
 import hashlib
+from collections.abc import AsyncIterator
 from datetime import datetime, timezone
+from typing import Any
 
-import httpx
-
-from .base import CGMSource, GlucoseEntry, Trend
+from .base import CGMSource, GlucoseEntry, Trend, Watermarks, as_utc
+from .http import HttpOptions, create_client, send
 
 # Mapping Nightscout direction strings to unified Trend enum
 DIRECTION_MAP: dict[str, Trend] = {
@@ -25,11 +26,13 @@ DIRECTION_MAP: dict[str, Trend] = {
 class NightscoutSource(CGMSource):
     """CGM data source using Nightscout API."""
 
-    def __init__(self, url: str, api_secret: str) -> None:
+    def __init__(self, url: str, api_secret: str, http: HttpOptions | None = None) -> None:
         self.url = url.rstrip("/")
         # Nightscout requires SHA1 hash of API_SECRET in the header
         self.api_secret_hash = hashlib.sha1(api_secret.encode()).hexdigest()
-        self._http = httpx.AsyncClient(
+        self.http_options = http or HttpOptions()
+        self._http = create_client(
+            self.http_options,
             base_url=self.url,
             headers={"api-secret": self.api_secret_hash},
         )
@@ -39,15 +42,82 @@ class NightscoutSource(CGMSource):
         entries = await self.get_entries(count=1)
         return entries[0] if entries else None
 
-    async def get_entries(self, count: int = 10) -> list[GlucoseEntry]:
-        """Get recent glucose readings from Nightscout."""
-        resp = await self._http.get(
+    async def get_entries(
+        self, count: int = 10, since: Watermarks | None = None
+    ) -> list[GlucoseEntry]:
+        """Get recent glucose readings from Nightscout.
+
+        With a watermark, the server filters on ``date`` so only newer entries
+        are transferred.
+        """
+        params: dict[str, int] = {"count": count}
+        watermark = since.get(None) if since else None
+        if watermark is not None:
+            params["find[date][$gt]"] = int(as_utc(watermark).timestamp() * 1000)
+
+        return await self._fetch(params)
+
+    async def iter_range(
+        self, start: datetime, end: datetime, page_size: int = 1000
+    ) -> AsyncIterator[list[GlucoseEntry]]:
+        """Page through entries with ``start <= date < end``, newest page first.
+
+        Each page moves the upper bound to the oldest date already seen,
+        so memory use is bounded by ``page_size`` regardless of the range.
+        The bound is inclusive after the first page, so records sharing that
+        millisecond are not skipped; the ones already yielded are dropped.
+        """
+        lower = int(as_utc(start).timestamp() * 1000)
+        upper = int(as_utc(end).timestamp() * 1000)
+        upper_op = "$lt"
+        seen: set[tuple[int, object]] = set()  # records at ``upper`` already yielded
+        while upper >= lower:
+            data = await self._fetch_raw(
+                {
+                    "count": page_size,
+                    "find[date][$gte]": lower,
+                    f"find[date][{upper_op}]": upper,
+                }
+            )
+            fresh = [item for item in data if self._record_key(item) not in seen]
+            if not fresh:
+                if upper_op == "$lte" and len(data) >= page_size:
+                    # A full page shares the boundary date; step below it
+                    upper_op, seen = "$lt", set()
+                    continue
+                return
+            page = self._parse_entries(fresh)
+            if page:
+                yield page
+            # Page on raw dates so non-SGV records cannot stall the cursor
+            oldest = min(int(item.get("date", 0)) for item in fresh)
+            if oldest != upper:
+                seen = set()
+            seen |= {key for key in map(self._record_key, fresh) if key[0] == oldest}
+            upper, upper_op = oldest, "$lte"
+
+    @staticmethod
+    def _record_key(item: dict[str, Any]) -> tuple[int, object]:
+        """Identity of a record within its millisecond: its id, else its value."""
+        return int(item.get("date", 0)), item.get("_id", item.get("sgv"))
+
+    async def _fetch(self, params: dict[str, int]) -> list[GlucoseEntry]:
+        return self._parse_entries(await self._fetch_raw(params))
+
+    async def _fetch_raw(self, params: dict[str, int]) -> list[dict[str, Any]]:
+        resp = await send(
+            self._http,
+            "GET",
             "/api/v1/entries.json",
-            params={"count": count},
+            self.http_options,
+            params=params,
         )
         resp.raise_for_status()
-        data = resp.json()
+        data: list[dict[str, Any]] = resp.json()
+        return data
 
+    @staticmethod
+    def _parse_entries(data: list[dict[str, Any]]) -> list[GlucoseEntry]:
         entries = []
         for item in data:
             if "sgv" not in item:
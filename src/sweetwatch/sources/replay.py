@@ -0,0 +1,238 @@
+"""Replay CGM source for offline load and soak testing.
+
+Serves generated series (``sweetwatch.synthetic``) or a recorded payload
+for any number of virtual patients, without touching the network. Time
+runs ``speed`` times faster than the wall clock: readings keep wall-clock
+timestamps but arrive ``speed`` times as often, so syncing, database
+growth and stream fan-out run at that rate while history windows and
+freshness behave as in production.
+
+Faults can be injected: latency added to every call, a fraction of calls
+failing with HTTP 503 like a struggling upstream, and gaps, stretches of
+readings that are never delivered.
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+import random
+import statistics
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from sweetwatch import synthetic
+
+from .base import CGMSource, GlucoseEntry, Trend, Watermarks, as_utc
+from .librelinkup import TREND_MAP, LibreLinkUpSource
+from .nightscout import NightscoutSource
+
+logger = logging.getLogger(__name__)
+
+# Gaps drop whole blocks of this many (virtual) seconds
+GAP_LENGTH = 30 * 60
+
+# Days of generated readings kept per patient between calls
+CACHED_DAYS = 3
+
+
+def load_recording(path: str | Path) -> list[GlucoseEntry]:
+    """Readings from a Nightscout ``entries.json`` or LibreLinkUp graph response.
+
+    Raises:
+        ValueError: If the file holds neither format or no readings.
+    """
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if isinstance(data, list):
+        entries = NightscoutSource._parse_entries(data)
+    elif isinstance(data, dict) and "graphData" in data.get("data", {}):
+        entries = []
+        for item in data["data"]["graphData"]:
+            ts = item.get("Timestamp", item.get("FactoryTimestamp", item.get("timestamp", "")))
+            entries.append(
+                GlucoseEntry(
+                    value=int(item.get("ValueInMgPerDl", item.get("Value", 0))),
+                    trend=TREND_MAP.get(item.get("TrendArrow", 3), Trend.UNKNOWN),
+                    timestamp=LibreLinkUpSource._parse_timestamp(ts),
+                )
+            )
+    else:
+        raise ValueError(f"{path}: expected Nightscout entries or a LibreLinkUp graph")
+    if len(entries) < 2:
+        raise ValueError(f"{path}: a recording needs at least two readings")
+    return sorted(entries, key=lambda e: as_utc(e.timestamp))
+
+
+class ReplaySource(CGMSource):
+    """Readings for ``patients`` virtual patients, generated or replayed.
+
+    Generated series follow each patient's synthetic profile (reproducible
+    from ``seed``) on a 1- or 5-minute grid. A ``recording`` is instead
+    looped forever, each patient starting at a different point of the
+    loop. Virtual and wall time coincide when the source is created.
+
+    Args:
+        patients: Number of virtual patients, tagged ``replay-<seed>-<n>``.
+        interval_minutes: Grid of generated readings (ignored for recordings).
+        seed: Seed of the generated series, latency and errors.
+        recording: Path of a recorded payload, see ``load_recording``.
+        speed: Time acceleration; 100 delivers readings 100 times as often.
+        latency: Mean seconds each call takes (uniform up to twice that).
+        error_rate: Fraction of calls that fail with HTTP 503.
+        gap_rate: Fraction of ``GAP_LENGTH`` stretches never delivered.
+        clock: Wall clock in epoch seconds, for tests.
+    """
+
+    def __init__(
+        self,
+        patients: int = 1,
+        interval_minutes: int = 5,
+        seed: int = 0,
+        recording: str | Path | None = None,
+        speed: float = 1.0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        gap_rate: float = 0.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if speed <= 0:
+            raise ValueError("Replay speed must be positive")
+        self.speed = speed
+        self.latency = latency
+        self.error_rate = error_rate
+        self.gap_rate = gap_rate
+        self.seed = seed
+        self._clock = clock
+        self._origin = clock()
+        self._rng = random.Random(seed)
+        self._profiles = synthetic.patient_profiles(
+            patients, interval_minutes, seed, prefix=f"replay-{seed}"
+        )
+        self._days: dict[tuple[int, int], list[tuple[float, GlucoseEntry]]] = {}
+
+        self._recording: list[GlucoseEntry] | None = None
+        interval = interval_minutes * 60.0
+        if recording:
+            self._recording = load_recording(recording)
+            times = [as_utc(e.timestamp).timestamp() for e in self._recording]
+            interval = statistics.median(b - a for a, b in zip(times, times[1:]))
+            self._offsets = [t - times[0] for t in times]
+            # One loop of the recording; it starts over one interval after its end
+            self._period = self._offsets[-1] + interval
+            logger.info(f"Replaying {len(times)} readings from {recording} at {speed}x")
+        self.reading_interval = interval / speed
+
+    @property
+    def patient_ids(self) -> list[str]:
+        return [profile.patient_id for profile in self._profiles]
+
+    def _virtual(self, wall: float) -> float:
+        return self._origin + (wall - self._origin) * self.speed
+
+    def _wall(self, virtual: float) -> float:
+        return self._origin + (virtual - self._origin) / self.speed
+
+    async def get_current(self) -> GlucoseEntry | None:
+        """Get the most recent glucose reading across patients."""
+        entries = await self.get_entries(count=1)
+        return max(entries, key=lambda e: e.timestamp, default=None)
+
+    async def get_entries(
+        self, count: int = 10, since: Watermarks | None = None
+    ) -> list[GlucoseEntry]:
+        """Last ``count`` readings of every patient, newer than ``since``.
+
+        Like LibreLinkUp, gaps shorten the window rather than extending it
+        further back.
+        """
+        if self.latency > 0:
+            await asyncio.sleep(self._rng.uniform(0, 2 * self.latency))
+        if self._rng.random() < self.error_rate:
+            request = httpx.Request("GET", "replay://upstream/entries")
+            response = httpx.Response(503, request=request)
+            raise httpx.HTTPStatusError(
+                "Injected replay error (HTTP 503)", request=request, response=response
+            )
+
+        now = self._virtual(self._clock())
+        since = since or {}
+        entries = []
+        for index, profile in enumerate(self._profiles):
+            if self._recording is not None:
+                readings = self._recorded(index, now, count)
+            else:
+                readings = self._generated(index, now, count)
+            watermark = since.get(profile.patient_id)
+            cutoff = as_utc(watermark).timestamp() if watermark is not None else None
+            for virtual, entry in self._without_gaps(index, readings):
+                wall = self._wall(virtual)
+                if cutoff is not None and wall <= cutoff:
+                    continue
+                entries.append(
+                    GlucoseEntry(
+                        value=entry.value,
+                        trend=entry.trend,
+                        timestamp=datetime.fromtimestamp(wall, tz=timezone.utc),
+                        patient_id=profile.patient_id,
+                    )
+                )
+        return entries
+
+    def _generated(self, index: int, now: float, count: int) -> list[tuple[float, GlucoseEntry]]:
+        """Last ``count`` generated readings at or before virtual time ``now``."""
+        profile = self._profiles[index]
+        today = int(now // synthetic.DAY)
+        oldest = today - CACHED_DAYS - count * profile.interval // synthetic.DAY
+        readings: list[tuple[float, GlucoseEntry]] = []
+        day = today
+        while len(readings) < count and day >= oldest:
+            key = (index, day)
+            if key not in self._days:
+                self._days[key] = [
+                    (e.timestamp.timestamp(), e)
+                    for e in synthetic.day_entries(profile, day, tag=False)
+                ]
+            readings = [r for r in self._days[key] if r[0] <= now] + readings
+            day -= 1
+        # Drop days the next calls will no longer reach
+        for key in [k for k in self._days if k[0] == index and k[1] < today - CACHED_DAYS]:
+            del self._days[key]
+        return readings[-count:]
+
+    def _recorded(self, index: int, now: float, count: int) -> list[tuple[float, GlucoseEntry]]:
+        """Last ``count`` looped recording readings at or before virtual time ``now``."""
+        assert self._recording is not None
+        # The first loop ends at the origin; patients are spread over the loop
+        start = self._origin - self._offsets[-1] + index * self._period / len(self._profiles)
+        cycle, offset = divmod(now - start, self._period)
+        position = bisect.bisect_right(self._offsets, offset)
+        readings: list[tuple[float, GlucoseEntry]] = []
+        while len(readings) < count:
+            if position == 0:
+                cycle, position = cycle - 1, len(self._offsets)
+                continue
+            position -= 1
+            virtual = start + cycle * self._period + self._offsets[position]
+            readings.append((virtual, self._recording[position]))
+        readings.reverse()
+        return readings
+
+    def _without_gaps(
+        self, index: int, readings: list[tuple[float, GlucoseEntry]]
+    ) -> list[tuple[float, GlucoseEntry]]:
+        if self.gap_rate <= 0:
+            return readings
+        blocks = {int(virtual // GAP_LENGTH) for virtual, _ in readings}
+        missing = {
+            block
+            for block in blocks
+            if random.Random(f"{self.seed}:{index}:{block}").random() < self.gap_rate
+        }
+        return [r for r in readings if int(r[0] // GAP_LENGTH) not in missing]
+
+    async def close(self) -> None:
+        """Nothing to release; kept for the source interface."""
@@ -0,0 +1,285 @@
+"""Deterministic synthetic CGM data.
+
+Readings are a pure function of the patient profile and the reading time:
+a circadian baseline with a dawn rise, meal excursions, slow physiological
+drift and sensor noise, minus sensor dropouts and warm-up gaps after every
+sensor change. Any time range can be generated on its own, in any order,
+and always yields the same readings, so benchmarks, tests and the replay
+source can cover years of 1- or 5-minute data without storing it.
+
+Payload helpers render readings the way LibreLinkUp and Nightscout return
+them, for parsing benchmarks and offline replay.
+"""
+
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import numpy as np
+
+from sweetwatch.sources.base import GlucoseEntry, Trend
+
+DAY = 86400
+
+# Sensor range, mg/dL
+SENSOR_MIN = 40
+SENSOR_MAX = 400
+
+# A new sensor every 14 days, unreadable for its first hour
+SENSOR_DAYS = 14
+WARMUP = 3600
+
+# Meals per day: (earliest, latest) start in hours, local to the profile
+MEALS = ((6.5, 9.0), (11.5, 14.0), (17.5, 20.5))
+MEAL_PEAK = 45 * 60  # seconds from meal to peak
+LOW_RATE = 0.4  # days with a downward excursion
+
+# Rate of change thresholds, mg/dL per minute
+FAST = 2.0
+SLOW = 1.0
+
+TREND_ARROWS: dict[Trend, int] = {
+    Trend.FALLING_FAST: 1,
+    Trend.FALLING: 2,
+    Trend.STABLE: 3,
+    Trend.RISING: 4,
+    Trend.RISING_FAST: 5,
+}
+
+NIGHTSCOUT_DIRECTIONS: dict[Trend, str] = {
+    Trend.FALLING_FAST: "DoubleDown",
+    Trend.FALLING: "SingleDown",
+    Trend.STABLE: "Flat",
+    Trend.RISING: "SingleUp",
+    Trend.RISING_FAST: "DoubleUp",
+}
+
+
+@dataclass(frozen=True)
+class PatientProfile:
+    """Parameters of one synthetic patient, all derived from ``seed``."""
+
+    patient_id: str
+    seed: int
+    interval: int = 300  # seconds between readings
+    phase: int = 0  # seconds the sensor grid is offset from midnight
+    baseline: float = 120.0  # mg/dL
+    meal_size: float = 70.0  # mg/dL peak of an average meal
+    drift: float = 20.0  # mg/dL amplitude of slow drift
+    noise: float = 4.0  # mg/dL sensor noise SD
+    dropout_rate: float = 0.3  # sensor dropouts per day
+    utc_offset: float = 1.0  # hours, places meals and the dawn rise
+
+    @classmethod
+    def create(cls, patient_id: str, seed: int, interval_minutes: int = 5) -> "PatientProfile":
+        rng = np.random.default_rng([seed, 0])
+        interval = interval_minutes * 60
+        return cls(
+            patient_id=patient_id,
+            seed=seed,
+            interval=interval,
+            phase=int(rng.integers(0, interval)),
+            baseline=float(rng.uniform(100, 150)),
+            meal_size=float(rng.uniform(40, 110)),
+            drift=float(rng.uniform(10, 30)),
+            noise=float(rng.uniform(3, 6)),
+            dropout_rate=float(rng.uniform(0.1, 0.5)),
+            utc_offset=float(rng.integers(-8, 10)),
+        )
+
+
+def patient_profiles(
+    patients: int, interval_minutes: int = 5, seed: int = 0, prefix: str = "patient"
+) -> list[PatientProfile]:
+    """``patients`` distinct profiles, reproducible from ``seed``."""
+    return [
+        PatientProfile.create(f"{prefix}-{i}", seed * 100_003 + i, interval_minutes)
+        for i in range(patients)
+    ]
+
+
+def _excursions(profile: PatientProfile, day: int) -> list[tuple[float, float, float]]:
+    """(epoch start, peak mg/dL, seconds to peak) of one local day's excursions.
+
+    Meals push glucose up; an occasional insulin overcorrection or exercise
+    pulls it down, sometimes into hypoglycaemia.
+    """
+    rng = np.random.default_rng([profile.seed, 1, day])
+    start = day * DAY - profile.utc_offset * 3600
+    excursions: list[tuple[float, float, float]] = []
+    for earliest, latest in MEALS:
+        if rng.random() < 0.1:
+            continue  # skipped meal
+        at = start + rng.uniform(earliest, latest) * 3600
+        excursions.append((at, profile.meal_size * rng.uniform(0.4, 1.6), MEAL_PEAK))
+    if rng.random() < LOW_RATE:
+        at = start + rng.uniform(0, 24) * 3600
+        excursions.append((at, -rng.uniform(30, 90), rng.uniform(40, 90) * 60))
+    return excursions
+
+
+def _signal(profile: PatientProfile, t: np.ndarray, day: int) -> np.ndarray:
+    """Noise-free glucose at epoch seconds ``t`` within local day ``day``."""
+    hours = (t / 3600 + profile.utc_offset) % 24
+    # Dawn phenomenon: rise towards 7am, trough mid-afternoon
+    glucose = profile.baseline + 15 * np.cos(2 * np.pi * (hours - 7) / 24)
+
+    rng = np.random.default_rng([profile.seed, 2])
+    periods = rng.uniform(2, 9, 4) * 3600
+    phases = rng.uniform(0, 2 * np.pi, 4)
+    for period, phase in zip(periods, phases):
+        glucose += profile.drift / 2 * np.sin(2 * np.pi * t / period + phase)
+
+    # Excursions last a few hours, so the previous day's late ones still count
+    for excursion_day in (day - 1, day):
+        for at, peak, to_peak in _excursions(profile, excursion_day):
+            x = np.clip((t - at) / to_peak, 0, None)
+            glucose += peak * x**2 * np.exp(2 * (1 - x))
+    return glucose
+
+
+def _trends(slopes: np.ndarray) -> list[Trend]:
+    trends = []
+    for slope in slopes:
+        if slope >= FAST:
+            trends.append(Trend.RISING_FAST)
+        elif slope >= SLOW:
+            trends.append(Trend.RISING)
+        elif slope <= -FAST:
+            trends.append(Trend.FALLING_FAST)
+        elif slope <= -SLOW:
+            trends.append(Trend.FALLING)
+        else:
+            trends.append(Trend.STABLE)
+    return trends
+
+
+def day_series(profile: PatientProfile, day: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Epoch seconds, values (mg/dL) and slopes (mg/dL/min) of one UTC day.
+
+    ``day`` counts days since the Unix epoch. Readings inside dropouts and
+    sensor warm-ups are left out.
+    """
+    start = day * DAY
+    times = np.arange(start + profile.phase, start + DAY, profile.interval, dtype=np.int64)
+    local_day = int((start + profile.utc_offset * 3600) // DAY)
+    signal = _signal(profile, times.astype(np.float64), local_day)
+    ahead = _signal(profile, times + 60.0, local_day)
+    slopes = ahead - signal
+
+    rng = np.random.default_rng([profile.seed, 3, day])
+    values = np.clip(
+        np.round(signal + rng.normal(0, profile.noise, times.size)), SENSOR_MIN, SENSOR_MAX
+    )
+
+    keep = np.ones(times.size, dtype=bool)
+    if day % SENSOR_DAYS == profile.seed % SENSOR_DAYS:
+        keep &= times - start >= WARMUP
+    for _ in range(rng.poisson(profile.dropout_rate)):
+        gap_start = start + rng.uniform(0, DAY)
+        keep &= (times < gap_start) | (times >= gap_start + rng.uniform(10, 120) * 60)
+    return times[keep], values[keep], slopes[keep]
+
+
+def _days(start: datetime, end: datetime) -> range:
+    first = int(start.timestamp() // DAY)
+    last = int((end.timestamp() - 1) // DAY)
+    return range(first, last + 1)
+
+
+def series(
+    profile: PatientProfile, start: datetime, end: datetime
+) -> tuple[np.ndarray, np.ndarray]:
+    """Epoch seconds and values of readings in ``[start, end)`` as arrays."""
+    lo, hi = start.timestamp(), end.timestamp()
+    times, values = [], []
+    for day in _days(start, end):
+        t, v, _ = day_series(profile, day)
+        mask = (t >= lo) & (t < hi)
+        times.append(t[mask])
+        values.append(v[mask])
+    if not times:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    return np.concatenate(times), np.concatenate(values)
+
+
+def day_entries(profile: PatientProfile, day: int, tag: bool = True) -> list[GlucoseEntry]:
+    """Readings of one UTC day as ``GlucoseEntry`` objects, oldest first.
+
+    With ``tag`` the entries carry the profile's patient ID.
+    """
+    times, values, slopes = day_series(profile, day)
+    patient_id = profile.patient_id if tag else None
+    return [
+        GlucoseEntry(
+            value=int(value),
+            trend=trend,
+            timestamp=datetime.fromtimestamp(ts, tz=timezone.utc),
+            patient_id=patient_id,
+        )
+        for ts, value, trend in zip(times.tolist(), values.tolist(), _trends(slopes))
+    ]
+
+
+def iter_entries(
+    profile: PatientProfile, start: datetime, end: datetime, tag: bool = True
+) -> Iterator[list[GlucoseEntry]]:
+    """Readings in ``[start, end)``, one list per UTC day."""
+    for day in _days(start, end):
+        entries = [e for e in day_entries(profile, day, tag) if start <= e.timestamp < end]
+        if entries:
+            yield entries
+
+
+def entries(
+    profile: PatientProfile, start: datetime, end: datetime, tag: bool = True
+) -> list[GlucoseEntry]:
+    """All readings in ``[start, end)``, oldest first."""
+    return [entry for day in iter_entries(profile, start, end, tag) for entry in day]
+
+
+def recent_entries(
+    profile: PatientProfile, now: datetime, count: int, tag: bool = True
+) -> list[GlucoseEntry]:
+    """The last ``count`` readings at or before ``now``, oldest first."""
+    span = timedelta(seconds=profile.interval * count * 2 + DAY)
+    return entries(profile, now - span, now + timedelta(seconds=1), tag)[-count:]
+
+
+def librelinkup_graph(readings: Sequence[GlucoseEntry]) -> dict[str, Any]:
+    """A LibreLinkUp ``/llu/connections/{id}/graph`` response body."""
+    items = []
+    for entry in readings:
+        ts = entry.timestamp.astimezone(timezone.utc)
+        stamp = f"{ts.month}/{ts.day}/{ts.year} {ts.strftime('%I:%M:%S %p').lstrip('0')}"
+        items.append(
+            {
+                "FactoryTimestamp": stamp,
+                "Timestamp": stamp,
+                "type": 0,
+                "ValueInMgPerDl": entry.value,
+                "TrendArrow": TREND_ARROWS.get(entry.trend, 3),
+                "MeasurementColor": 1,
+                "GlucoseUnits": 1,
+                "Value": entry.value,
+                "isHigh": False,
+                "isLow": False,
+            }
+        )
+    return {"status": 0, "data": {"connection": {}, "activeSensors": [], "graphData": items}}
+
+
+def nightscout_entries(readings: Sequence[GlucoseEntry]) -> list[dict[str, Any]]:
+    """A Nightscout ``/api/v1/entries.json`` response body, newest first."""
+    return [
+        {
+            "type": "sgv",
+            "sgv": entry.value,
+            "date": int(entry.timestamp.timestamp() * 1000),
+            "dateString": entry.timestamp.astimezone(timezone.utc).isoformat(),
+            "direction": NIGHTSCOUT_DIRECTIONS.get(entry.trend, "NOT COMPUTABLE"),
+            "device": "sweetwatch-synthetic",
+        }
+        for entry in reversed(readings)
+    ]
@@ -0,0 +1,316 @@
+"""Historical backfill / bulk import pipeline.
+
+Entries stream from a source generator into fixed-size batches, each stored
+with one bulk insert and committed on its own. After every batch the job's
+cursor is written to a checkpoint file, so an interrupted import resumes
+where it stopped and memory stays bounded by the batch size.
+
+The command line tool writes from its own process, so a running server's
+reading cache, validators and stream do not see what it imports; restart
+the server after importing readings within ``CACHE_HOURS``, or import
+from Nightscout through ``POST /api/glucose/backfill`` instead.
+
+Usage::
+
+    sweetwatch-backfill nightscout --start 2023-01-01 --end 2024-01-01
+    sweetwatch-backfill libreview export.csv --tz Europe/Warsaw --patient-id anna
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone, tzinfo
+from pathlib import Path
+from typing import TYPE_CHECKING
+from zoneinfo import ZoneInfo
+
+from sweetwatch.config import settings
+from sweetwatch.db.engine import AsyncSessionLocal
+from sweetwatch.services.glucose import GlucoseService, glucose_service
+from sweetwatch.sources.base import GlucoseEntry, as_utc
+from sweetwatch.sources.libreview import read_libreview_csv
+
+if TYPE_CHECKING:
+    from sweetwatch.sources.nightscout import NightscoutSource
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BackfillProgress:
+    """Counters and resume cursor of one backfill job."""
+
+    job_id: str
+    status: str = "pending"  # pending, running, done, failed
+    read: int = 0
+    inserted: int = 0
+    batches: int = 0
+    cursor: int | None = None
+    error: str | None = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def rate(self) -> float:
+        """Entries read per second so far."""
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return self.read / elapsed if elapsed > 0 else 0.0
+
+
+class Checkpoint:
+    """Last committed cursor of a job, persisted as JSON after every batch."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def load(self) -> int | None:
+        if not self.path.exists():
+            return None
+        cursor: int | None = json.loads(self.path.read_text(encoding="utf-8")).get("cursor")
+        return cursor
+
+    def save(self, progress: BackfillProgress) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(asdict(progress)), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+def checkpoint_for(job_id: str) -> Checkpoint:
+    return Checkpoint(Path(settings.backfill_checkpoint_dir) / f"{job_id}.json")
+
+
+async def run_pipeline(
+    entries: AsyncIterator[tuple[int, GlucoseEntry]],
+    progress: BackfillProgress,
+    patient_id: str = "default",
+    batch_size: int = 1000,
+    checkpoint: Checkpoint | None = None,
+    service: GlucoseService = glucose_service,
+) -> BackfillProgress:
+    """Store ``(cursor, entry)`` pairs in committed batches, checkpointing each one."""
+    batch: list[GlucoseEntry] = []
+    cursor: int | None = None
+
+    async def flush() -> None:
+        if not batch:
+            return
+        async with AsyncSessionLocal() as db:
+            stored = await service.store_entries(db, batch, patient_id=patient_id, notify=False)
+        progress.inserted += len(stored)
+        progress.batches += 1
+        progress.cursor = cursor
+        if checkpoint is not None:
+            checkpoint.save(progress)
+        logger.info(
+            f"[{progress.job_id}] batch {progress.batches}: read {progress.read}, "
+            f"inserted {progress.inserted} ({progress.rate:.0f} entries/s)"
+        )
+        batch.clear()
+
+    progress.status = "running"
+    try:
+        async for cursor, entry in entries:
+            batch.append(entry)
+            progress.read += 1
+            if len(batch) >= batch_size:
+                await flush()
+        await flush()
+    except Exception as e:
+        progress.status = "failed"
+        progress.error = str(e)
+        raise
+    else:
+        progress.status = "done"
+    finally:
+        progress.finished_at = time.time()
+        if checkpoint is not None:
+            checkpoint.save(progress)
+    return progress
+
+
+def _to_ms(ts: datetime) -> int:
+    return int(as_utc(ts).timestamp() * 1000)
+
+
+async def nightscout_entries(
+    source: "NightscoutSource",
+    start: datetime,
+    end: datetime,
+    page_size: int = 1000,
+    resume: int | None = None,
+) -> AsyncIterator[tuple[int, GlucoseEntry]]:
+    """Entries from Nightscout, newest first; the cursor is the entry date in ms.
+
+    Pages are walked backwards in time, so resuming narrows the upper bound
+    to the last committed cursor (inclusive; the insert ignores duplicates).
+    """
+    if resume is not None:
+        end = min(as_utc(end), datetime.fromtimestamp((resume + 1) / 1000, tz=timezone.utc))
+    async for page in source.iter_range(start, end, page_size=page_size):
+        for entry in page:
+            yield _to_ms(entry.timestamp), entry
+
+
+async def libreview_entries(
+    path: str | Path, tz: tzinfo = timezone.utc, resume: int | None = None
+) -> AsyncIterator[tuple[int, GlucoseEntry]]:
+    """Entries from a LibreView CSV export; the cursor is the data row number."""
+    for row_number, entry in read_libreview_csv(path, tz=tz, skip_rows=resume or 0):
+        yield row_number, entry
+
+
+# Jobs started through the API, kept for status polling
+backfill_jobs: dict[str, BackfillProgress] = {}
+_running: dict[str, asyncio.Task[BackfillProgress]] = {}
+
+
+def nightscout_job_id(start: datetime, end: datetime, patient_id: str) -> str:
+    return f"nightscout-{patient_id}-{as_utc(start):%Y%m%d%H%M}-{as_utc(end):%Y%m%d%H%M}"
+
+
+def start_nightscout_backfill(
+    start: datetime, end: datetime, patient_id: str = "default"
+) -> BackfillProgress:
+    """Run a Nightscout backfill in the background, resuming a previous run if any.
+
+    Starting a job that is already running returns its progress instead.
+    """
+    if not settings.nightscout_url:
+        raise ValueError("NIGHTSCOUT_URL is required for Nightscout backfill")
+
+    job_id = nightscout_job_id(start, end, patient_id)
+    if job_id in _running:
+        return backfill_jobs[job_id]
+
+    progress = BackfillProgress(job_id)
+    backfill_jobs[job_id] = progress
+    checkpoint = checkpoint_for(job_id)
+
+    async def run() -> BackfillProgress:
+        from sweetwatch.sources import HttpOptions, NightscoutSource
+
+        source = NightscoutSource(
+            settings.nightscout_url,
+            settings.nightscout_api_secret,
+            http=HttpOptions.from_settings(settings),
+        )
+        try:
+            entries = nightscout_entries(
+                source, start, end, settings.backfill_page_size, resume=checkpoint.load()
+            )
+            return await run_pipeline(
+                entries, progress, patient_id, settings.backfill_batch_size, checkpoint
+            )
+        finally:
+            await source.close()
+            _running.pop(job_id, None)
+
+    task = asyncio.create_task(run())
+    task.add_done_callback(lambda task: _job_done(progress, task))
+    _running[job_id] = task
+    return progress
+
+
+def _job_done(progress: BackfillProgress, task: asyncio.Task[BackfillProgress]) -> None:
+    """Record and log a background job that crashed, also before its pipeline started."""
+    if task.cancelled():
+        error = "cancelled"
+    elif (exc := task.exception()) is not None:
+        error = str(exc) or type(exc).__name__
+        logger.error(f"[{progress.job_id}] backfill failed: {error}", exc_info=exc)
+    else:
+        return
+    progress.status = "failed"
+    progress.error = error
+    progress.finished_at = progress.finished_at or time.time()
+
+
+def _parse_date(value: str) -> datetime:
+    return as_utc(datetime.fromisoformat(value))
+
+
+async def _main(args: argparse.Namespace) -> BackfillProgress:
+    if args.source == "nightscout":
+        from sweetwatch.sources import HttpOptions, NightscoutSource
+
+        url = args.url or settings.nightscout_url
+        if not url:
+            raise SystemExit("Nightscout URL is required (--url or NIGHTSCOUT_URL)")
+        job_id = args.job_id or nightscout_job_id(args.start, args.end, args.patient_id)
+        checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else checkpoint_for(job_id)
+        source = NightscoutSource(
+            url,
+            args.api_secret or settings.nightscout_api_secret,
+            http=HttpOptions.from_settings(settings),
+        )
+        entries = nightscout_entries(
+            source, args.start, args.end, args.page_size, resume=checkpoint.load()
+        )
+    else:
+        job_id = args.job_id or f"libreview-{args.patient_id}-{Path(args.path).stem}"
+        checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else checkpoint_for(job_id)
+        source = None
+        entries = libreview_entries(args.path, tz=ZoneInfo(args.tz), resume=checkpoint.load())
+
+    try:
+        return await run_pipeline(
+            entries, BackfillProgress(job_id), args.patient_id, args.batch_size, checkpoint
+        )
+    finally:
+        if source is not None:
+            await source.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for ``sweetwatch-backfill``."""
+    parser = argparse.ArgumentParser(description="Import historical glucose readings.")
+    parser.add_argument("--patient-id", default="default", help="Patient label to store under")
+    parser.add_argument("--batch-size", type=int, default=settings.backfill_batch_size)
+    parser.add_argument("--job-id", help="Checkpoint name (derived from the inputs by default)")
+    parser.add_argument("--checkpoint", type=Path, help="Checkpoint file path")
+    sub = parser.add_subparsers(dest="source", required=True)
+
+    ns = sub.add_parser("nightscout", help="Page through a Nightscout date range")
+    ns.add_argument("--start", type=_parse_date, required=True, help="ISO date, inclusive")
+    ns.add_argument(
+        "--end",
+        type=_parse_date,
+        default=datetime.now(timezone.utc) + timedelta(minutes=1),
+        help="ISO date, exclusive (default: now)",
+    )
+    ns.add_argument("--url", help="Nightscout URL (default: NIGHTSCOUT_URL)")
+    ns.add_argument("--api-secret", help="API secret (default: NIGHTSCOUT_API_SECRET)")
+    ns.add_argument("--page-size", type=int, default=settings.backfill_page_size)
+
+    lv = sub.add_parser("libreview", help="Stream a LibreView CSV export from disk")
+    lv.add_argument("path", help="Path to the exported CSV")
+    lv.add_argument("--tz", default="UTC", help="Time zone of the export timestamps")
+
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    # Offline runs may hit a fresh or outdated database
+    from sweetwatch.db import migrate
+
+    migrate.upgrade()
+
+    progress = asyncio.run(_main(args))
+    logger.info(
+        f"[{progress.job_id}] {progress.status}: read {progress.read}, "
+        f"inserted {progress.inserted} in {progress.batches} batches"
+    )
+    if progress.inserted:
+        logger.info("Restart a running server if the import covers its cached window")
+
+
+if __name__ == "__main__":
+    main()
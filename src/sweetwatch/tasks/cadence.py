@@ -0,0 +1,80 @@
+"""Sensor cadence tracking for cadence-aware sync scheduling.
+
+CGM sensors produce readings on a fixed grid (about a minute for
+LibreLinkUp, five minutes for Nightscout uploaders), and each one shows up
+upstream some seconds later. Tracking the grid per patient lets the
+scheduler poll right after the next reading should be available instead of
+on a fixed interval that is unrelated to the sensor.
+"""
+
+import statistics
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+# Learned cadences are clamped to this range, seconds
+MIN_CADENCE = 30.0
+MAX_CADENCE = 900.0
+
+# Gaps longer than this are sensor dropouts, not cadence
+MAX_GAP = 20 * 60.0
+
+# Recent deltas and availability delays kept per patient
+HISTORY = 20
+
+
+def _deque() -> deque[float]:
+    return deque(maxlen=HISTORY)
+
+
+@dataclass
+class CadenceTracker:
+    """Reading cadence and phase of one patient, learned from stored timestamps.
+
+    ``cadence`` starts from the source's nominal interval and becomes the
+    median of recent gaps between consecutive readings. The phase is the
+    newest reading's timestamp. ``delay`` is how long readings take to
+    become visible upstream, taken as the lower quartile of observed
+    freshness lags because late polls only ever inflate a lag.
+    """
+
+    cadence: float
+    last_reading: float | None = None  # epoch seconds
+    _deltas: deque[float] = field(default_factory=_deque)
+    _lags: deque[float] = field(default_factory=_deque)
+
+    def observe(self, timestamps: Iterable[float], seen_at: float) -> float | None:
+        """Feed stored reading timestamps first seen at ``seen_at``.
+
+        Returns the freshness lag (``seen_at`` minus the newest reading) when
+        the newest reading advanced, else ``None``. The first batch only sets
+        the phase, since its lag reflects backlog rather than polling.
+        """
+        previous = self.last_reading
+        for ts in sorted(timestamps):
+            if self.last_reading is not None:
+                if ts <= self.last_reading:
+                    continue
+                if ts - self.last_reading <= MAX_GAP:
+                    self._deltas.append(ts - self.last_reading)
+            self.last_reading = ts
+        if self._deltas:
+            self.cadence = min(max(statistics.median(self._deltas), MIN_CADENCE), MAX_CADENCE)
+        newest = self.last_reading
+        if previous is None or newest is None or newest == previous:
+            return None
+        lag = max(seen_at - newest, 0.0)
+        self._lags.append(lag)
+        return lag
+
+    @property
+    def delay(self) -> float:
+        if not self._lags:
+            return 0.0
+        return sorted(self._lags)[len(self._lags) // 4]
+
+    def next_arrival(self) -> float | None:
+        """Epoch time the next reading should be visible upstream."""
+        if self.last_reading is None:
+            return None
+        return self.last_reading + self.cadence + self.delay
@@ -0,0 +1,203 @@
+"""Retention and compaction of raw glucose readings.
+
+Raw readings older than the retention age are folded into the hourly and
+daily rollups, optionally archived to a gzip CSV per day, and deleted. On
+SQLite the freed pages are then returned to the filesystem with an
+incremental vacuum, so the database file stops growing with history.
+
+Usage::
+
+    sweetwatch-retention --days 180 [--archive-dir ./archive] [--vacuum]
+"""
+
+import argparse
+import asyncio
+import csv
+import gzip
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import CursorResult, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from sweetwatch.config import settings
+from sweetwatch.db.engine import AsyncSessionLocal, async_engine
+from sweetwatch.models.glucose import GlucoseReading
+from sweetwatch.services.rollups import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+# Raw history and the hot window reach back a week; never compact inside it
+MIN_RAW_DAYS = 8
+
+
+@dataclass
+class RetentionResult:
+    """Outcome of one retention run."""
+
+    days: int = 0  # calendar days compacted
+    deleted: int = 0
+    archived: int = 0
+    vacuumed_pages: int = 0
+
+
+def _archive(path: Path, rows: list[GlucoseReading]) -> None:
+    """Write one day of raw rows as gzip CSV, atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["patient_id", "timestamp", "value", "trend"])
+        for row in rows:
+            writer.writerow([row.patient_id, row.timestamp.isoformat(), row.value, row.trend])
+    tmp.replace(path)
+
+
+async def compact(raw_days: int, archive_dir: str | Path | None = None) -> RetentionResult:
+    """Fold raw readings older than ``raw_days`` into rollups and delete them.
+
+    Works one UTC day per transaction, oldest first. Each day's rollups are
+    rebuilt from its raw rows before they are deleted, so statistics and
+    hourly/daily history stay exact. Rows inserted into that day while it is
+    being compacted are left for the next run.
+    """
+    raw_days = max(raw_days, MIN_RAW_DAYS)
+    cutoff = datetime.now(timezone.utc).replace(
+        tzinfo=None, hour=0, minute=0, second=0, microsecond=0
+    ) - timedelta(days=raw_days)
+    result = RetentionResult()
+
+    day: datetime | None = None
+    while True:
+        async with AsyncSessionLocal() as db:
+            # Jump over empty stretches to the next day that has raw rows
+            stmt = select(func.min(GlucoseReading.timestamp))
+            if day is not None:
+                stmt = stmt.where(GlucoseReading.timestamp >= day)
+            oldest = await db.scalar(stmt)
+            if oldest is None:
+                break
+            day = oldest.replace(hour=0, minute=0, second=0, microsecond=0)
+            if day >= cutoff:
+                break
+            next_day = day + timedelta(days=1)
+
+            await rebuild_rollups(db, day, next_day)
+            in_day = [GlucoseReading.timestamp >= day, GlucoseReading.timestamp < next_day]
+            rows = list(
+                await db.scalars(select(GlucoseReading).where(*in_day).order_by(GlucoseReading.id))
+            )
+            if rows:
+                if archive_dir:
+                    # The first id keeps late arrivals compacted later from overwriting
+                    name = f"readings-{day:%Y-%m-%d}-{rows[0].id}.csv.gz"
+                    _archive(Path(archive_dir) / name, rows)
+                    result.archived += len(rows)
+                # DELETE results are cursor results, which carry the row count
+                deleted: CursorResult[Any] = await db.execute(  # type: ignore[assignment]
+                    delete(GlucoseReading).where(*in_day, GlucoseReading.id <= rows[-1].id)
+                )
+                await db.commit()
+                result.deleted += deleted.rowcount
+                result.days += 1
+        day = next_day
+
+    if result.deleted:
+        logger.info(
+            f"Compacted {result.deleted} raw readings from {result.days} day(s) "
+            f"older than {cutoff:%Y-%m-%d}"
+        )
+    return result
+
+
+async def vacuum(engine: AsyncEngine = async_engine, full: bool = False) -> int:
+    """Return free SQLite pages to the filesystem; returns the pages freed.
+
+    ``full`` runs a one-off VACUUM, needed once to switch a database created
+    before the performance profile to incremental auto-vacuum. Other
+    backends reclaim space on their own, so this is a no-op there.
+    """
+    if engine.dialect.name != "sqlite":
+        return 0
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        free_pages = (await conn.exec_driver_sql("PRAGMA freelist_count")).scalar() or 0
+        if full:
+            await conn.exec_driver_sql("VACUUM")
+        elif (await conn.exec_driver_sql("PRAGMA auto_vacuum")).scalar() == 2:
+            await conn.exec_driver_sql("PRAGMA incremental_vacuum")
+        else:
+            logger.info("auto_vacuum is not INCREMENTAL; run sweetwatch-retention --vacuum once")
+            return 0
+        remaining = (await conn.exec_driver_sql("PRAGMA freelist_count")).scalar() or 0
+    return int(free_pages - remaining)
+
+
+async def run_retention(
+    raw_days: int, archive_dir: str | Path | None = None, full_vacuum: bool = False
+) -> RetentionResult:
+    """Compact old raw readings, then vacuum if anything was deleted."""
+    result = await compact(raw_days, archive_dir)
+    if result.deleted or full_vacuum:
+        result.vacuumed_pages = await vacuum(full=full_vacuum)
+    return result
+
+
+async def retention_loop(interval: float) -> None:
+    """Run retention every ``interval`` seconds with the configured settings."""
+    while True:
+        try:
+            await run_retention(settings.retention_raw_days, settings.retention_archive_dir)
+        except Exception as e:
+            logger.exception(f"Retention run failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for ``sweetwatch-retention``."""
+    parser = argparse.ArgumentParser(description="Compact old raw glucose readings.")
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=settings.retention_raw_days,
+        help=f"Keep raw readings for this many days (min {MIN_RAW_DAYS})",
+    )
+    parser.add_argument(
+        "--archive-dir",
+        default=settings.retention_archive_dir,
+        help="Write compacted raw readings here as gzip CSV before deleting",
+    )
+    parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="Run a full VACUUM (once, to enable incremental vacuum on older files)",
+    )
+    args = parser.parse_args(argv)
+    if args.days <= 0 and not args.vacuum:
+        raise SystemExit("Nothing to do: set --days (or RETENTION_RAW_DAYS) or --vacuum")
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    async def run() -> RetentionResult:
+        try:
+            if args.days > 0:
+                return await run_retention(args.days, args.archive_dir, args.vacuum)
+            return RetentionResult(vacuumed_pages=await vacuum(full=True))
+        finally:
+            await async_engine.dispose()
+
+    result = asyncio.run(run())
+    logger.info(
+        f"Deleted {result.deleted} raw readings ({result.archived} archived) "
+        f"from {result.days} day(s); freed {result.vacuumed_pages} pages"
+    )
+
+
+if __name__ == "__main__":
+    main()
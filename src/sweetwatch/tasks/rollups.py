@@ -0,0 +1,52 @@
+"""Rebuild glucose rollups from raw readings.
+
+Usage::
+
+    sweetwatch-rollups --start 2024-01-01 --end 2025-01-01 [--patient-id anna]
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sweetwatch.db.engine import AsyncSessionLocal
+from sweetwatch.services.rollups import rebuild_rollups
+from sweetwatch.sources.base import as_utc
+
+logger = logging.getLogger(__name__)
+
+
+async def _rebuild(start: datetime, end: datetime, patient_id: str | None) -> int:
+    """Rebuild one day at a time so each transaction stays small."""
+    written = 0
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < end:
+        async with AsyncSessionLocal() as db:
+            written += await rebuild_rollups(db, day, min(day + timedelta(days=1), end), patient_id)
+            await db.commit()
+        day += timedelta(days=1)
+    return written
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point for ``sweetwatch-rollups``."""
+    parser = argparse.ArgumentParser(description="Rebuild hourly/daily glucose rollups.")
+    parser.add_argument("--start", type=datetime.fromisoformat, required=True)
+    parser.add_argument(
+        "--end", type=datetime.fromisoformat, default=datetime.now(timezone.utc)
+    )
+    parser.add_argument("--patient-id", help="Limit to one patient (default: all)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    written = asyncio.run(_rebuild(as_utc(args.start), as_utc(args.end), args.patient_id))
+    logger.info(f"Rebuilt {written} rollup rows")
+
+
+if __name__ == "__main__":
+    main()
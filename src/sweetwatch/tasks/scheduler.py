@@ -0,0 +1,308 @@
+"""Multi-account sync scheduler.
+
+Accounts are kept in a priority queue ordered by their next due time. A
+dispatcher moves due accounts onto a work queue drained by a fixed pool of
+workers, so the number of concurrent upstream syncs stays bounded no matter
+how many accounts are configured.
+
+In ``trend`` mode each account polls on a fixed interval picked by its
+trend. In ``cadence`` mode it polls just after its sensor's next reading
+is expected upstream (see ``sweetwatch.tasks.cadence``) and backs off
+while that reading is late.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from sweetwatch.services.glucose import GlucoseService, SyncResult
+from sweetwatch.sources.base import as_utc
+from sweetwatch.tasks.cadence import CadenceTracker
+
+logger = logging.getLogger(__name__)
+
+SYNC_MODES = ("trend", "cadence")
+
+# Never poll sooner than this after the previous poll, seconds
+MIN_POLL_DELAY = 1.0
+
+# A reading overdue by this many cadences means the sensor is offline, so
+# the account stops retrying for it until readings resume
+OFFLINE_CADENCES = 3
+
+# Freshness lags kept per account for the status percentiles
+LAG_HISTORY = 500
+
+
+def _lag_history() -> deque[float]:
+    return deque(maxlen=LAG_HISTORY)
+
+
+def _percentile(values: deque[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+@dataclass
+class AccountState:
+    """Scheduling state and last-run bookkeeping for one account."""
+
+    account_id: str
+    service: GlucoseService
+    interval: float
+    due: float = 0.0  # loop time
+    running: bool = False
+    runs: int = 0
+    failures: int = 0
+    last_synced: int = 0
+    last_started: float | None = None  # wall clock
+    last_duration: float | None = None
+    last_lag: float | None = None
+    last_error: str | None = None
+    # Sensor cadence per patient and freshness: seconds from a reading's
+    # timestamp until it was stored
+    cadence: dict[str, CadenceTracker] = field(default_factory=dict)
+    misses: int = 0  # consecutive polls that found nothing new
+    empty_polls: int = 0
+    freshness_lags: deque[float] = field(default_factory=_lag_history)
+
+
+@dataclass(order=True)
+class _DueItem:
+    due: float
+    seq: int
+    account_id: str = field(compare=False)
+
+
+class SyncScheduler:
+    """Runs each account's sync when due, on a bounded pool of workers.
+
+    Each account keeps the adaptive cadence of the original single loop:
+    ``interval_stable`` while its latest trend is flat, ``interval_changing``
+    otherwise. Every schedule is spread by ``jitter`` (a fraction of the
+    interval) so accounts don't drift into synchronised bursts.
+
+    With ``mode="cadence"`` the next poll is placed ``cadence_margin``
+    seconds after the next expected reading instead; a poll that comes back
+    empty is retried after ``cadence_margin`` doubled per miss. Intervals
+    never exceed ``interval_stable``. Freshness lag is recorded in both modes.
+    """
+
+    def __init__(
+        self,
+        accounts: dict[str, GlucoseService],
+        workers: int = 4,
+        interval_stable: float = 180,
+        interval_changing: float = 60,
+        jitter: float = 0.1,
+        initial_delay: float = 0,
+        count: int = 50,
+        mode: str = "trend",
+        cadence_margin: float = 5.0,
+    ) -> None:
+        if mode not in SYNC_MODES:
+            raise ValueError(f"Unknown sync mode: {mode} (expected one of {SYNC_MODES})")
+        self.mode = mode
+        self.cadence_margin = cadence_margin
+        self.workers = workers
+        self.interval_stable = interval_stable
+        self.interval_changing = interval_changing
+        self.jitter = jitter
+        self.initial_delay = initial_delay
+        self.count = count
+        self.accounts = {
+            account_id: AccountState(account_id, service, interval_stable)
+            for account_id, service in accounts.items()
+        }
+        self._heap: list[_DueItem] = []
+        self._seq = itertools.count()
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task[None]] = []
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _schedule(self, state: AccountState, delay: float) -> None:
+        state.due = asyncio.get_running_loop().time() + delay
+        heapq.heappush(self._heap, _DueItem(state.due, next(self._seq), state.account_id))
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        """Schedule every account and start the dispatcher and workers."""
+        # A single account syncs right away; several are spread over a jitter
+        # window instead of all hitting the upstream at once
+        window = self.jitter * self.interval_stable if len(self.accounts) > 1 else 0.0
+        for state in self.accounts.values():
+            self._schedule(state, self.initial_delay + random.uniform(0, window))
+        self._tasks = [asyncio.create_task(self._dispatch())]
+        self._tasks += [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        logger.info(
+            f"Sync scheduler started: {len(self.accounts)} account(s), {self.workers} worker(s)"
+        )
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Stop dispatching, let running syncs finish, then close account services.
+
+        Syncs still running after ``timeout`` seconds are cancelled.
+        Cancelling mid-transaction can strand a connection holding a write
+        lock, so in-flight syncs get to commit first.
+        """
+        if self._tasks:
+            self._tasks[0].cancel()  # dispatcher
+        # Drop runs that are queued but not started
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except TimeoutError:
+            logger.warning(f"Sync still running after {timeout}s, cancelling")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for state in self.accounts.values():
+            await state.service.close()
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            while self._heap and self._heap[0].due <= now:
+                self._queue.put_nowait(heapq.heappop(self._heap).account_id)
+            timeout = self._heap[0].due - now if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except TimeoutError:
+                pass
+
+    async def _work(self) -> None:
+        while True:
+            account_id = await self._queue.get()
+            try:
+                await self._run(self.accounts[account_id])
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, state: AccountState) -> None:
+        loop = asyncio.get_running_loop()
+        state.running = True
+        state.last_lag = max(0.0, loop.time() - state.due)
+        state.last_started = time.time()
+        started = loop.time()
+        delay: float | None = None
+        try:
+            # The scheduler owns the cadence, so only share fetches already in flight
+            result = await state.service.sync(count=self.count, min_interval=0)
+            stored = result.stored if result.freshness == "fresh" else []
+            state.last_synced = len(stored)
+            state.last_error = None
+            if stored:
+                logger.info(f"[{state.account_id}] Synced {len(stored)} new glucose readings")
+            state.interval = (
+                self.interval_changing if state.service.trend_changing else self.interval_stable
+            )
+            self._track(state, result)
+            if self.mode == "cadence":
+                delay = self._cadence_delay(state)
+        except Exception as e:
+            state.failures += 1
+            state.last_error = str(e)
+            logger.exception(f"[{state.account_id}] Error syncing glucose data: {e}")
+        finally:
+            state.runs += 1
+            state.running = False
+            state.last_duration = loop.time() - started
+            self._schedule(state, self._jittered(state.interval) if delay is None else delay)
+
+    def _track(self, state: AccountState, result: SyncResult) -> None:
+        """Feed stored readings to the cadence trackers and record freshness."""
+        by_patient: dict[str, list[float]] = {}
+        for reading in result.stored:
+            by_patient.setdefault(reading.patient_id, []).append(
+                as_utc(reading.timestamp).timestamp()
+            )
+        seen_at = result.fetched_at.timestamp()
+        for patient_id, timestamps in by_patient.items():
+            tracker = state.cadence.get(patient_id)
+            if tracker is None:
+                tracker = state.cadence[patient_id] = CadenceTracker(
+                    state.service.reading_interval
+                )
+            lag = tracker.observe(timestamps, seen_at)
+            if lag is not None:
+                state.freshness_lags.append(lag)
+        if result.stored:
+            state.misses = 0
+        else:
+            state.misses += 1
+            state.empty_polls += 1
+
+    def _cadence_delay(self, state: AccountState) -> float | None:
+        """Seconds until just after the next expected reading, or ``None`` if unknown."""
+        now = time.time()
+        upcoming, overdue = [], False
+        for tracker in state.cadence.values():
+            arrival = tracker.next_arrival()
+            if arrival is None:
+                continue
+            if arrival > now:
+                upcoming.append(arrival)
+            elif now - arrival < OFFLINE_CADENCES * tracker.cadence:
+                overdue = True
+        if not upcoming and not overdue:
+            return None
+        delay = min(upcoming) - now + self.cadence_margin if upcoming else self.interval_stable
+        if overdue:
+            # Expected but not seen yet: retry soon, backing off per empty poll
+            delay = min(delay, self.cadence_margin * 2**state.misses)
+        return min(max(delay, MIN_POLL_DELAY), self.interval_stable)
+
+    def status(self) -> dict[str, object]:
+        """Snapshot of queue depth, lag and per-account state."""
+        now = asyncio.get_running_loop().time()
+        overdue = [
+            now - state.due
+            for state in self.accounts.values()
+            if not state.running and state.due <= now
+        ]
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "accounts": len(self.accounts),
+            "queue_depth": self._queue.qsize(),
+            "running": sum(state.running for state in self.accounts.values()),
+            "max_lag": max(overdue, default=0.0),
+            "account_status": [
+                {
+                    "id": state.account_id,
+                    "interval": state.interval,
+                    "next_due_in": state.due - now,
+                    "running": state.running,
+                    "runs": state.runs,
+                    "failures": state.failures,
+                    "last_synced": state.last_synced,
+                    "last_started": state.last_started,
+                    "last_duration": state.last_duration,
+                    "last_lag": state.last_lag,
+                    "last_error": state.last_error,
+                    "cadence": min(
+                        (tracker.cadence for tracker in state.cadence.values()), default=None
+                    ),
+                    "empty_polls": state.empty_polls,
+                    "freshness_lag": state.freshness_lags[-1] if state.freshness_lags else None,
+                    "freshness_lag_p50": _percentile(state.freshness_lags, 0.5),
+                    "freshness_lag_p95": _percentile(state.freshness_lags, 0.95),
+                }
+                for state in self.accounts.values()
+            ],
+        }
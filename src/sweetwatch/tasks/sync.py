@@ -1,75 +1,94 @@
 """Background sync task for glucose data."""
 
 import asyncio
+import contextlib
 import logging
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 from fastapi import FastAPI
 
-from sweetwatch.db.engine import SessionLocal
-from sweetwatch.services.glucose import glucose_service
+from sweetwatch.config import load_accounts, settings
+from sweetwatch.db import migrate
+from sweetwatch.db.engine import AsyncSessionLocal, async_engine
+from sweetwatch.profiling import startup
+from sweetwatch.services.glucose import GlucoseService, glucose_service
+from sweetwatch.sources import create_source
+from sweetwatch.tasks.retention import retention_loop
+from sweetwatch.tasks.scheduler import SyncScheduler
 
 logger = logging.getLogger(__name__)
 
 
-async def sync_glucose_loop() -> None:
-    """Background loop to sync glucose data from LibreLinkUp.
+def build_scheduler() -> SyncScheduler:
+    """Create the scheduler for the configured accounts.
 
-    Interval adapts to trend:
-    - Stable (trend=3): 3 minutes
-    - Rising/Falling: 1 minute
+    Without ``ACCOUNTS_FILE`` the single account from settings is synced
+    through the shared ``glucose_service``. Otherwise every listed account
+    gets its own service, sharing the hot window cache and broadcaster.
+
+    Interval adapts to trend per account:
+    - Stable (trend=3): SYNC_INTERVAL_STABLE (3 minutes)
+    - Rising/Falling: SYNC_INTERVAL_CHANGING (1 minute)
     """
-    INTERVAL_STABLE = 3 * 60  # 3 minutes
-    INTERVAL_CHANGING = 1 * 60  # 1 minute
-
-    # Wait a bit before first sync to let the app start
-    await asyncio.sleep(10)
-
-    while True:
-        interval = INTERVAL_STABLE
-        try:
-            logger.info("Starting glucose sync...")
-            db = SessionLocal()
-            try:
-                stored = await glucose_service.fetch_and_store(db, count=50)
-                if stored:
-                    logger.info(f"Synced {len(stored)} new glucose readings")
-                else:
-                    logger.info("No new readings to sync")
-
-                # Check latest trend to determine next interval
-                current = glucose_service.get_current(db)
-                if current:
-                    logger.info(f"Current: {current.value} mg/dL, trend={current.trend}, time={current.timestamp}")
-                    if current.trend != 3:  # Not stable
-                        interval = INTERVAL_CHANGING
-                        logger.info(f"Trend changing, next sync in 1 min")
-            finally:
-                db.close()
-        except Exception as e:
-            logger.exception(f"Error syncing glucose data: {e}")
-
-        logger.info(f"Next sync in {interval} seconds")
-        await asyncio.sleep(interval)
+    if settings.accounts_file:
+        accounts = {
+            account.id: GlucoseService(
+                source=create_source(account),
+                patient_id=account.id,
+                cache=glucose_service.cache,
+                broadcaster=glucose_service.broadcaster,
+                predictor=glucose_service.predictor,
+            )
+            for account in load_accounts(settings.accounts_file)
+        }
+    else:
+        accounts = {"default": glucose_service}
+
+    return SyncScheduler(
+        accounts,
+        workers=settings.sync_workers,
+        interval_stable=settings.sync_interval_stable,
+        interval_changing=settings.sync_interval_changing,
+        jitter=settings.sync_jitter,
+        mode=settings.sync_mode,
+        cadence_margin=settings.sync_cadence_margin,
+    )
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """FastAPI lifespan context manager for background tasks."""
-    # Start background sync task
-    task = asyncio.create_task(sync_glucose_loop())
-    logger.info("Started glucose sync background task")
+    # Bring the schema up to date; Alembic's API is synchronous
+    with startup.phase("migrations"):
+        await asyncio.to_thread(migrate.upgrade)
+
+    # Warm the hot window before serving so reads skip the database
+    with startup.phase("warm cache"):
+        async with AsyncSessionLocal() as db:
+            await glucose_service.warm_cache(db)
+
+    # Start background sync scheduler; the first sync runs right away
+    with startup.phase("scheduler"):
+        scheduler = build_scheduler()
+        await scheduler.start()
+    app.state.scheduler = scheduler
+    if settings.startup_profile:
+        logger.info(startup.report())
+
+    retention = None
+    if settings.retention_raw_days > 0:
+        retention = asyncio.create_task(retention_loop(settings.retention_interval))
 
     yield
 
-    # Cancel background task on shutdown
-    task.cancel()
-    try:
-        await task
-    except asyncio.CancelledError:
-        pass
+    if retention is not None:
+        retention.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await retention
 
-    # Close glucose service
+    # Stop scheduler on shutdown; this also closes the account services
+    await scheduler.stop()
     await glucose_service.close()
-    logger.info("Stopped glucose sync background task")
+    await async_engine.dispose()
+    logger.info("Stopped glucose sync scheduler")
@@ -0,0 +1,48 @@
+import os
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway database before any sweetwatch module reads settings
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='sweetwatch-test-')}/test.db"
+)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    from sweetwatch.db import migrate
+
+    migrate.upgrade()
+
+
+@pytest.fixture
+async def db():
+    """Session on a fresh in-memory database, for tests that need no app state."""
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    from sweetwatch.models.glucose import Base
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest.fixture
+def store_readings():
+    """Store glucose entries for one patient in the test database, in their own session.
+
+    Uses an uncached service unless one is passed, e.g. the app's ``glucose_service``.
+    """
+    from sweetwatch.db.engine import AsyncSessionLocal
+    from sweetwatch.services.glucose import GlucoseService
+
+    async def store(entries, patient_id, service=None):
+        service = service or GlucoseService(cache_hours=0)
+        async with AsyncSessionLocal() as db:
+            return await service.store_entries(db, entries, patient_id=patient_id)
+
+    return store
@@ -0,0 +1,95 @@
+import statistics
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from sweetwatch.api.main import app
+from sweetwatch.services.analytics import GlucoseSeries, agp, compute_stats, local_minutes
+from sweetwatch.sources.base import GlucoseEntry, Trend
+
+client = TestClient(app)
+
+
+MIDNIGHT = 1_699_920_000  # 2023-11-14 00:00 UTC
+
+
+def _series(values: list[float], step: int = 300) -> GlucoseSeries:
+    times = MIDNIGHT + np.arange(len(values), dtype=np.int64) * step
+    return GlucoseSeries(times, np.asarray(values, dtype=np.float64))
+
+
+def test_stats_match_definitions():
+    values = [50, 60, 100, 180, 181, 250, 300, 100, 100, 240]
+    stats = compute_stats(_series(values))
+
+    mean, sd = statistics.mean(values), statistics.stdev(values)
+    assert stats.count == 10
+    assert stats.mean == pytest.approx(mean)
+    assert stats.cv == pytest.approx(sd / mean * 100)
+    assert stats.gmi == pytest.approx(3.31 + 0.02392 * mean)
+    # < 54, 54-69, 70-180, 181-250, > 250
+    assert (stats.time_very_low, stats.time_low, stats.time_in_range,
+            stats.time_high, stats.time_very_high) == (10, 10, 40, 30, 10)
+    # Extrema 50 -> 300 -> 100 -> 240; every swing exceeds one SD
+    assert stats.mage == pytest.approx((250 + 200 + 140) / 3)
+    assert stats.lbgi > 0 and stats.hbgi > 0
+
+
+def test_risk_indices_stay_finite_for_zero_readings():
+    with np.errstate(all="raise"):
+        stats = compute_stats(_series([0, 100, 120]))
+    assert np.isfinite(stats.lbgi) and np.isfinite(stats.hbgi)
+    assert stats.lbgi > 0
+
+
+def test_empty_series_has_no_metrics():
+    stats = compute_stats(_series([]))
+    assert stats.count == 0 and stats.mean is None
+    assert np.isnan(agp(_series([])).percentiles[50]).all()
+
+
+def test_local_minutes_follow_dst():
+    # 2024-03-31 Europe/Warsaw switches from +01:00 to +02:00 at 01:00 UTC
+    before = int(datetime(2024, 3, 31, 0, 30, tzinfo=timezone.utc).timestamp())
+    after = int(datetime(2024, 3, 31, 1, 30, tzinfo=timezone.utc).timestamp())
+    minutes = local_minutes(np.array([before, after]), "Europe/Warsaw")
+    assert minutes.tolist() == [90, 210]
+
+
+def test_agp_percentiles_per_bin():
+    # Two days of hourly readings: bin h holds values h and h + 100
+    values = [float(h) for h in range(24)] + [float(h + 100) for h in range(24)]
+    profile = agp(_series(values, step=3600), bin_minutes=60)
+    hours = np.arange(24)
+    assert profile.counts.tolist() == [2] * 24
+    assert profile.percentiles[5] == pytest.approx(hours + 5)
+    assert profile.percentiles[50] == pytest.approx(hours + 50)
+    assert profile.percentiles[95] == pytest.approx(hours + 95)
+
+
+async def test_stats_and_agp_endpoints(store_readings):
+    # Well before the windows other API tests aggregate over
+    start = datetime.now(timezone.utc) - timedelta(hours=20)
+    entries = [
+        GlucoseEntry(value=v, trend=Trend.STABLE, timestamp=start + timedelta(minutes=5 * i))
+        for i, v in enumerate([90, 120, 150, 200, 260])
+    ]
+    await store_readings(entries, "analytics")
+    await store_readings(entries[:1], "analytics-other")
+
+    stats = client.get("/api/glucose/stats?days=1&patient_id=analytics").json()
+    assert stats["count"] == 5
+    assert stats["time_in_range"] == pytest.approx(60)
+
+    data = client.get("/api/glucose/agp?days=1&patient_id=analytics&bin_minutes=60").json()
+    assert len(data["bins"]) == 24
+    assert sum(b["count"] for b in data["bins"]) == 5
+    assert client.get("/api/glucose/agp?tz=Mars/Olympus&patient_id=analytics").status_code == 422
+
+    # Several patients are stored, so pooling them is refused
+    for path in ("stats", "agp", "summary"):
+        assert client.get(f"/api/glucose/{path}?days=1").status_code == 422
+    summary = client.get("/api/glucose/summary?days=2&patient_id=analytics").json()
+    assert summary["count"] == 5
@@ -0,0 +1,65 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sweetwatch.agent.analyzer import GlucoseAnalyzer, compress_window
+
+
+class FakeMessages:
+    def __init__(self) -> None:
+        self.prompts: list[str] = []
+
+    async def create(self, **kwargs):
+        self.prompts.append(kwargs["messages"][0]["content"])
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(content=[SimpleNamespace(text=f"analysis {len(self.prompts)}")])
+
+
+def _window(n: int, start_value: float = 100) -> list[dict]:
+    start = datetime(2024, 1, 1)
+    return [
+        {"timestamp": start + timedelta(minutes=5 * i), "value": start_value + (i % 40) * 3}
+        for i in range(n)
+    ]
+
+
+def _analyzer(**kwargs) -> tuple[GlucoseAnalyzer, FakeMessages]:
+    messages = FakeMessages()
+    return GlucoseAnalyzer("", client=SimpleNamespace(messages=messages), **kwargs), messages
+
+
+async def test_identical_windows_are_cached_and_coalesced():
+    analyzer, messages = _analyzer()
+    window = _window(12)
+
+    results = await asyncio.gather(*(analyzer.analyze_trend(window) for _ in range(5)))
+    assert await analyzer.analyze_trend(list(window)) == "analysis 1"
+    assert results == ["analysis 1"] * 5
+    assert len(messages.prompts) == 1
+
+    await analyzer.analyze_trend(_window(12, start_value=90))
+    assert len(messages.prompts) == 2
+
+
+async def test_cache_expires_and_evicts_least_recent():
+    analyzer, messages = _analyzer(cache_ttl=0)
+    await analyzer.analyze_trend(_window(3))
+    await analyzer.analyze_trend(_window(3))
+    assert len(messages.prompts) == 2
+
+    analyzer, messages = _analyzer(cache_size=2)
+    a, b, c = _window(3, 100), _window(3, 110), _window(3, 120)
+    for window in (a, b, a, c, a, b):
+        await analyzer.analyze_trend(window)
+    # b was evicted when c arrived; a stayed recent
+    assert len(messages.prompts) == 4
+
+
+def test_long_windows_are_compressed():
+    window = _window(288)
+    prompt = compress_window(window)
+    assert len(prompt.splitlines()) < 40
+    assert "Summary of 288 readings" in prompt
+    assert "Peaks and nadirs:" in prompt
+    # Short windows are sent as-is
+    assert len(compress_window(_window(10)).splitlines()) == 11
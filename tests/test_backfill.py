@@ -0,0 +1,127 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from sweetwatch.config import settings
+from sweetwatch.services.glucose import GlucoseService
+from sweetwatch.sources.libreview import read_libreview_csv
+from sweetwatch.sources.nightscout import NightscoutSource
+from sweetwatch.tasks.backfill import (
+    BackfillProgress,
+    Checkpoint,
+    _running,
+    libreview_entries,
+    nightscout_entries,
+    nightscout_job_id,
+    run_pipeline,
+    start_nightscout_backfill,
+)
+
+CSV = """Glucose Data,Generated on,02-14-2026 10:00 AM UTC,Generated by,Test
+Device,Serial Number,Device Timestamp,Record Type,Historic Glucose mg/dL,Scan Glucose mg/dL
+FreeStyle LibreLink,X,02-13-2026 12:00 PM,0,100,
+FreeStyle LibreLink,X,02-13-2026 12:05 PM,1,,110
+FreeStyle LibreLink,X,02-13-2026 12:10 PM,6,,
+FreeStyle LibreLink,X,02-13-2026 12:15 PM,0,120,
+FreeStyle LibreLink,X,02-13-2026 12:30 PM,0,130,
+"""
+
+
+async def test_libreview_import_resumes_from_checkpoint(tmp_path):
+    export = tmp_path / "export.csv"
+    export.write_text(CSV)
+    checkpoint = Checkpoint(tmp_path / "job.json")
+    service = GlucoseService(cache_hours=0)
+
+    first = await run_pipeline(
+        libreview_entries(export), BackfillProgress("job"), "csv-patient", 2, checkpoint, service
+    )
+    assert (first.status, first.read, first.inserted, first.batches) == ("done", 4, 4, 2)
+    assert checkpoint.load() == 5
+
+    resumed = await run_pipeline(
+        libreview_entries(export, resume=checkpoint.load()),
+        BackfillProgress("job"),
+        "csv-patient",
+        2,
+        checkpoint,
+        service,
+    )
+    assert resumed.read == 0
+
+
+def test_libreview_rows_with_bad_values_are_skipped(tmp_path, caplog):
+    export = tmp_path / "export.csv"
+    export.write_text(CSV.replace("12:15 PM,0,120,", "12:15 PM,0,HI,"))
+
+    rows = [row for row, _ in read_libreview_csv(export)]
+
+    assert rows == [1, 2, 5]
+    assert "Skipping row 4: bad glucose value 'HI'" in caplog.text
+
+
+def _nightscout(records: list[dict]) -> NightscoutSource:
+    """A source whose server filters and orders ``records`` like Nightscout."""
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        lower = int(params["find[date][$gte]"])
+        if "find[date][$lte]" in params:
+            upper = int(params["find[date][$lte]"]) + 1
+        else:
+            upper = int(params["find[date][$lt]"])
+        page = sorted((r for r in records if lower <= r["date"] < upper), key=lambda r: -r["date"])
+        return httpx.Response(200, json=page[: int(params["count"])])
+
+    source = NightscoutSource("http://ns", "secret")
+    source._http = httpx.AsyncClient(base_url="http://ns", transport=httpx.MockTransport(handle))
+    return source
+
+
+async def test_nightscout_pages_backwards_through_range():
+    start = datetime(2026, 2, 13, tzinfo=timezone.utc)
+    dates = [int((start + timedelta(minutes=5 * i)).timestamp() * 1000) for i in range(7)]
+    source = _nightscout([{"sgv": 100, "date": d} for d in dates])
+    end = start + timedelta(hours=1)
+
+    seen = [cursor async for cursor, _ in nightscout_entries(source, start, end, page_size=3)]
+    resumed = [
+        cursor
+        async for cursor, _ in nightscout_entries(source, start, end, page_size=3, resume=dates[2])
+    ]
+    await source.close()
+
+    assert seen == sorted(dates, reverse=True)
+    assert resumed == [dates[2], dates[1], dates[0]]
+
+
+async def test_nightscout_paging_keeps_records_sharing_the_boundary_date():
+    start = datetime(2026, 2, 13, tzinfo=timezone.utc)
+    ms = int(start.timestamp() * 1000)
+    # Two records in one millisecond, split across the first two pages
+    dates = [ms + 3, ms + 2, ms + 1, ms + 1, ms]
+    source = _nightscout([{"_id": str(i), "sgv": 100 + i, "date": d} for i, d in enumerate(dates)])
+
+    pages = [page async for page in source.iter_range(start, start + timedelta(hours=1), 3)]
+    await source.close()
+
+    assert sorted(e.value for page in pages for e in page) == [100, 101, 102, 103, 104]
+
+
+async def test_background_job_failure_is_recorded_and_logged(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "nightscout_url", "http://ns")
+    monkeypatch.setattr(settings, "backfill_checkpoint_dir", str(tmp_path))
+    start = datetime(2026, 2, 13, tzinfo=timezone.utc)
+    end = start + timedelta(days=1)
+    job_id = nightscout_job_id(start, end, "p")
+    # Fails before the pipeline runs: a corrupt checkpoint
+    (tmp_path / f"{job_id}.json").write_text("{", encoding="utf-8")
+
+    progress = start_nightscout_backfill(start, end, "p")
+    await asyncio.wait([_running[job_id]])
+    await asyncio.sleep(0)
+
+    assert progress.status == "failed" and progress.error
+    assert progress.finished_at is not None
+    assert f"[{job_id}] backfill failed" in caplog.text
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sweetwatch.services.broadcast import Broadcaster
+from sweetwatch.services.cache import CachedReading
+
+
+def _reading(i: int) -> CachedReading:
+    return CachedReading(
+        id=i, patient_id="p1", value=100.0 + i, trend=3, timestamp=datetime(2026, 2, 13, 12, i)
+    )
+
+
+async def test_slow_subscriber_keeps_newest_readings():
+    broadcaster = Broadcaster(queue_size=2)
+
+    async with broadcaster.subscribe() as fast, broadcaster.subscribe() as slow:
+        broadcaster.publish([_reading(1)])
+        assert (await fast.get()).id == 1
+        broadcaster.publish([_reading(2), _reading(3)])
+
+        assert [(await slow.get()).id for _ in range(2)] == [2, 3]
+        assert [(await fast.get()).id for _ in range(2)] == [2, 3]
+        assert broadcaster.dropped == 1
+
+    assert broadcaster.subscriber_count == 0
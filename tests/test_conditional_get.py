@@ -0,0 +1,54 @@
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+from fastapi.testclient import TestClient
+
+from sweetwatch.api.main import app
+from sweetwatch.api.routers.glucose import HISTORY_WINDOW_GRANULARITY, _validator_headers
+from sweetwatch.services.glucose import DataVersion, glucose_service
+from sweetwatch.sources.base import GlucoseEntry, Trend
+
+client = TestClient(app)
+
+CURRENT = "/api/glucose/current?patient_id=conditional"
+
+
+def _entry(value: int) -> GlucoseEntry:
+    return GlucoseEntry(value=value, trend=Trend.STABLE, timestamp=datetime.now(timezone.utc))
+
+
+async def test_current_revalidates_until_new_reading(store_readings):
+    await store_readings([_entry(110)], "conditional", glucose_service)
+    first = client.get(CURRENT)
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert "max-age" in first.headers["cache-control"]
+
+    cached = client.get(CURRENT, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    since = client.get(CURRENT, headers={"If-Modified-Since": first.headers["last-modified"]})
+    assert since.status_code == 304
+
+    await store_readings([_entry(115)], "conditional", glucose_service)
+    changed = client.get(CURRENT, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+async def test_last_modified_is_insert_time_and_follows_the_window(store_readings):
+    # Backfilled history: an old reading stored now
+    entry = replace(_entry(120), timestamp=datetime.now(timezone.utc) - timedelta(days=2))
+    await store_readings([entry], "conditional-backfill", glucose_service)
+    response = client.get("/api/glucose/current?patient_id=conditional-backfill")
+    last_modified = parsedate_to_datetime(response.headers["last-modified"])
+    assert datetime.now(timezone.utc) - last_modified < timedelta(minutes=1)
+
+    # A window that slid into a new slot is newer than data stored before it
+    version = DataVersion(1, datetime(2020, 1, 1))
+    slot = 6_000_000
+    headers = _validator_headers(version, "history", window_slot=slot)
+    slot_start = datetime.fromtimestamp(slot * HISTORY_WINDOW_GRANULARITY, tz=timezone.utc)
+    assert parsedate_to_datetime(headers["Last-Modified"]) == slot_start
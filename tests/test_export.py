@@ -0,0 +1,66 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from sweetwatch.api.main import app
+from sweetwatch.db.engine import AsyncSessionLocal
+from sweetwatch.services.export import export_chunks, iter_partitions
+from sweetwatch.sources.base import GlucoseEntry, Trend
+
+client = TestClient(app)
+
+START = datetime(2021, 3, 1)
+QUERY = "start=2021-03-01T00:00:00Z&end=2021-03-02T00:00:00Z&patient_id=export"
+
+
+ENTRIES = [
+    GlucoseEntry(value=100 + i, trend=Trend.STABLE, timestamp=START + timedelta(minutes=5 * i))
+    for i in range(12)
+]
+
+
+async def test_export_csv_and_ndjson(store_readings):
+    await store_readings(ENTRIES, "export")
+
+    response = client.get(f"/api/glucose/export?{QUERY}")
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 12
+    assert rows[0] == {
+        "patient_id": "export", "timestamp": "2021-03-01T00:00:00Z", "value": "100.0", "trend": "3"
+    }
+
+    response = client.get(f"/api/glucose/export?{QUERY}&format=ndjson&gzip=true")
+    assert response.headers["content-disposition"].endswith('glucose.ndjson.gz"')
+    lines = gzip.decompress(response.content).decode().splitlines()
+    assert [json.loads(line)["value"] for line in lines] == [100 + i for i in range(12)]
+
+
+async def test_export_is_scoped_to_one_patient_unless_all_are_asked_for(store_readings):
+    await store_readings(ENTRIES, "export")
+    await store_readings(ENTRIES[:3], "export-other")
+    window = "start=2021-03-01T00:00:00Z&end=2021-03-02T00:00:00Z"
+
+    assert client.get(f"/api/glucose/export?{window}").status_code == 422
+
+    response = client.get(f"/api/glucose/export?{window}&all_patients=true")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert {row["patient_id"] for row in rows} >= {"export", "export-other"}
+
+    response = client.get(f"/api/glucose/export?{QUERY}&all_patients=true")
+    assert response.status_code == 422
+
+
+async def test_export_reads_in_partitions(store_readings):
+    await store_readings(ENTRIES, "export")
+    async with AsyncSessionLocal() as db:
+        partitions = iter_partitions(
+            db, START, START + timedelta(days=1), "export", partition_size=5
+        )
+        chunks = [chunk async for chunk in export_chunks(partitions, "csv")]
+    # Header, then one chunk per partition of at most five rows
+    assert [chunk.count(b"\n") for chunk in chunks] == [1, 5, 5, 2]
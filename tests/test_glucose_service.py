@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from sweetwatch.models.glucose import GlucoseReading
+from sweetwatch.services.glucose import GlucoseService
+from sweetwatch.sources.base import CGMSource, GlucoseEntry, Trend
+
+
+def _entries(start: datetime, n: int) -> list[GlucoseEntry]:
+    return [
+        GlucoseEntry(value=100 + i, trend=Trend.STABLE, timestamp=start + timedelta(minutes=i))
+        for i in range(n)
+    ]
+
+
+async def test_store_entries_skips_duplicates(db):
+    service = GlucoseService()
+    start = datetime(2026, 2, 13, 12, 0, tzinfo=timezone.utc)
+
+    first = await service.store_entries(db, _entries(start, 5), patient_id="p1")
+    second = await service.store_entries(db, _entries(start, 8), patient_id="p1")
+
+    assert [r.value for r in first] == [100, 101, 102, 103, 104]
+    assert [r.value for r in second] == [105, 106, 107]
+    assert await db.scalar(select(func.count()).select_from(GlucoseReading)) == 8
+
+
+async def test_store_entries_dedupes_per_patient(db):
+    service = GlucoseService()
+    start = datetime(2026, 2, 13, 12, 0, tzinfo=timezone.utc)
+
+    await service.store_entries(db, _entries(start, 3), patient_id="p1")
+    stored = await service.store_entries(db, _entries(start, 3), patient_id="p2")
+
+    assert len(stored) == 3
+    assert all(r.patient_id == "p2" for r in stored)
+
+
+async def test_history_served_from_warm_cache(db):
+    service = GlucoseService(cache_hours=24)
+    start = datetime.now(timezone.utc) - timedelta(hours=2)
+    await service.store_entries(db, _entries(start, 10), patient_id="p1")
+
+    await service.warm_cache(db)
+    await service.store_entries(
+        db, _entries(start + timedelta(minutes=10), 2), patient_id="p1"
+    )
+    from_db = await GlucoseService(cache_hours=0).get_history(db, hours=3, limit=5)
+    from_cache = await service.get_history(db, hours=3, limit=5)
+
+    assert service.cache.covers(3)
+    assert [(r.id, r.value, r.timestamp) for r in from_cache] == [
+        (r.id, r.value, r.timestamp) for r in from_db
+    ]
+    assert (await service.get_current(db)).value == 101.0
+
+
+async def test_reads_and_versions_are_scoped_per_patient(db):
+    service = GlucoseService(cache_hours=24)
+    start = datetime.now(timezone.utc) - timedelta(hours=1)
+    await service.store_entries(db, _entries(start, 3), patient_id="p1")
+    await service.store_entries(db, _entries(start + timedelta(seconds=30), 2), patient_id="p2")
+
+    for warm in (False, True):
+        if warm:
+            await service.warm_cache(db)
+        assert (await service.get_current(db, "p1")).value == 102
+        history = await service.get_history(db, hours=2, patient_id="p2")
+        assert [r.patient_id for r in history] == ["p2", "p2"]
+        rows = await service.get_history_rows(db, hours=2, patient_id="p1")
+        assert [value for _, value, _, _ in rows] == [102, 101, 100]
+        assert await service.get_patient_ids(db) == ["p1", "p2"]
+
+    p1 = await service.get_version(db, "p1")
+    await service.store_entries(db, _entries(start + timedelta(minutes=5), 1), patient_id="p2")
+    assert await service.get_version(db, "p1") == p1
+    assert (await service.get_version(db, "p2")).last_id > p1.last_id
+
+
+async def test_watermarks_track_newest_stored_timestamp(db):
+    service = GlucoseService(patient_id="p1", cache_hours=0)
+    start = datetime(2026, 2, 13, 12, 0, tzinfo=timezone.utc)
+    await service.store_entries(db, _entries(start, 3), patient_id="p1")
+
+    watermarks = await service.get_watermarks(db)
+    await service.store_entries(db, _entries(start + timedelta(minutes=5), 1), patient_id="p1")
+
+    assert watermarks == {"p1": start + timedelta(minutes=2), None: start + timedelta(minutes=2)}
+    assert (await service.get_watermarks(db))["p1"] == start + timedelta(minutes=5)
+
+
+class SlowSource(CGMSource):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def get_current(self) -> GlucoseEntry | None:
+        return None
+
+    async def get_entries(self, count: int = 10, since=None) -> list[GlucoseEntry]:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        start = datetime.now(timezone.utc) - timedelta(days=3)
+        return _entries(start + timedelta(seconds=self.calls), 2)
+
+    async def close(self) -> None:
+        pass
+
+
+async def test_concurrent_syncs_share_one_upstream_fetch():
+    source = SlowSource()
+    service = GlucoseService(source=source, patient_id="singleflight", min_sync_interval=60)
+
+    results = await asyncio.gather(*(service.sync() for _ in range(5)))
+    assert source.calls == 1
+    assert sorted(r.freshness for r in results) == ["coalesced"] * 4 + ["fresh"]
+    assert all(r.stored == results[0].stored for r in results)
+
+    # Within the minimum interval the last result is reused
+    cached = await service.sync()
+    assert (cached.freshness, cached.fetched_at, source.calls) == (
+        "cached", results[0].fetched_at, 1
+    )
+    assert (await service.sync(min_interval=0)).freshness == "fresh"
+    assert source.calls == 2
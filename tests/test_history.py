@@ -0,0 +1,99 @@
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from sweetwatch.api.main import app
+from sweetwatch.api.schemas import TREND_ARROWS, GlucoseHistoryResponse, GlucoseResponse
+from sweetwatch.api.serialization import history_json
+from sweetwatch.config import settings
+from sweetwatch.sources.base import GlucoseEntry, Trend
+
+client = TestClient(app)
+
+
+async def test_history_buckets_aggregate_in_sql(store_readings):
+    # Align to an hour boundary two hours back so both buckets are complete
+    now = datetime.now(timezone.utc)
+    start = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=2)
+    entries = [
+        GlucoseEntry(value=100 + i, trend=Trend.STABLE, timestamp=start + timedelta(minutes=5 * i))
+        for i in range(24)
+    ]
+    await store_readings(entries, "buckets")
+    # Another patient's readings in the same buckets must not leak in
+    await store_readings([replace(entry, value=300) for entry in entries], "buckets-other")
+
+    data = client.get("/api/glucose/history?hours=3&resolution=1h&patient_id=buckets").json()
+    buckets = {b["timestamp"]: b for b in data["buckets"]}
+
+    first = buckets[start.replace(tzinfo=None).isoformat()]
+    assert data["resolution"] == "1h"
+    assert (first["count"], first["min"], first["max"], first["mean"]) == (12, 100, 111, 105.5)
+
+    # Sub-hour resolutions aggregate raw readings rather than rollups
+    data = client.get("/api/glucose/history?hours=3&resolution=15m&patient_id=buckets").json()
+    assert max(b["max"] for b in data["buckets"]) == 123
+
+
+def test_raw_history_keeps_week_cap():
+    assert client.get("/api/glucose/history?hours=500&patient_id=fast").status_code == 422
+    url = "/api/glucose/history?hours=500&resolution=1d&patient_id=fast"
+    assert client.get(url).status_code == 200
+
+
+def _model_bytes(rows) -> bytes:
+    # What FastAPI renders for response_model=GlucoseHistoryResponse
+    readings = [
+        GlucoseResponse(id=i, value=v, trend=t or 3, timestamp=ts) for i, v, t, ts in rows
+    ]
+    model = GlucoseHistoryResponse(readings=readings, count=len(readings))
+    return JSONResponse(jsonable_encoder(model)).body
+
+
+def test_fast_history_json_matches_model_path():
+    ts = datetime(2026, 2, 13, 12, 0)
+    rows = [
+        (3, 120, 4, ts),
+        (2, 95.5, None, ts - timedelta(minutes=5, microseconds=123000)),
+        (1, 40.25, 7, ts - timedelta(minutes=10, microseconds=5)),
+        (0, 400.0, 0, ts - timedelta(minutes=15)),
+    ]
+    assert history_json(rows) == _model_bytes(rows)
+    assert history_json([]) == _model_bytes([])
+
+
+async def test_raw_history_response_schema(store_readings):
+    now = datetime.now(timezone.utc)
+    entries = [
+        GlucoseEntry(value=110 + i, trend=Trend.FALLING, timestamp=now - timedelta(minutes=i))
+        for i in range(3)
+    ]
+    await store_readings(entries, "fast")
+
+    response = client.get("/api/glucose/history?hours=1&limit=2&patient_id=fast")
+    assert response.headers["content-type"] == "application/json"
+    data = GlucoseHistoryResponse.model_validate_json(response.content)
+    assert data.count == 2 and data.readings[0].timestamp > data.readings[1].timestamp
+    assert response.json()["readings"][0]["trend_arrow"] in TREND_ARROWS.values()
+
+
+async def test_reads_need_a_patient_once_several_are_stored(monkeypatch, store_readings):
+    now = datetime.now(timezone.utc)
+    entry = GlucoseEntry(value=100, trend=Trend.STABLE, timestamp=now)
+    for patient_id in ("scope-a", "scope-b"):
+        await store_readings([entry], patient_id)
+
+    response = client.get("/api/glucose/current")
+    assert response.status_code == 422
+    assert "scope-a" in response.json()["detail"]
+
+    monkeypatch.setattr(settings, "default_patient_id", "scope-b")
+    assert client.get("/api/glucose/current").status_code == 200
+
+    monkeypatch.setattr(settings, "default_patient_id", "")
+    data = client.get("/api/glucose/patients").json()
+    assert {"scope-a", "scope-b"} <= set(data["patients"])
+    assert data["default"] == data["patients"][0]
@@ -0,0 +1,51 @@
+import httpx
+import pytest
+
+from sweetwatch.sources.http import HttpOptions, SessionStore, backoff_delay, send
+
+NO_WAIT = HttpOptions(retries=2, backoff=0)
+
+
+def _client(statuses: list[int | Exception]) -> httpx.AsyncClient:
+    def handle(request: httpx.Request) -> httpx.Response:
+        status = statuses.pop(0)
+        if isinstance(status, Exception):
+            raise status
+        return httpx.Response(status, headers={"Retry-After": "0"})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handle))
+
+
+async def test_send_retries_rate_limits_and_server_errors():
+    statuses: list[int | Exception] = [429, httpx.ConnectError("reset"), 200]
+    async with _client(statuses) as client:
+        response = await send(client, "GET", "http://upstream/x", NO_WAIT)
+    assert response.status_code == 200 and not statuses
+
+
+async def test_send_gives_up_after_retries():
+    async with _client([503, 503, 503, 200]) as client:
+        assert (await send(client, "GET", "http://upstream/x", NO_WAIT)).status_code == 503
+    async with _client([404]) as client:
+        assert (await send(client, "GET", "http://upstream/x", NO_WAIT)).status_code == 404
+    with pytest.raises(httpx.ConnectError):
+        async with _client([httpx.ConnectError("down")] * 3) as client:
+            await send(client, "GET", "http://upstream/x", NO_WAIT)
+
+
+def test_backoff_is_jittered_and_capped():
+    options = HttpOptions(backoff=1, max_backoff=5)
+    assert all(0 <= backoff_delay(options, 2) <= 4 for _ in range(50))
+    assert all(backoff_delay(options, 10) <= 5 for _ in range(50))
+    retry_after = httpx.Response(429, headers={"Retry-After": "120"})
+    assert backoff_delay(options, 0, retry_after) == 5
+
+
+def test_session_store_round_trip(tmp_path):
+    store = SessionStore(tmp_path / "session.json")
+    key = SessionStore.key("librelinkup", "user")
+    store.save(key, {"token": "t"})
+    assert store.load(key) == {"token": "t"}
+    assert (tmp_path / "session.json").stat().st_mode & 0o777 == 0o600
+    store.drop(key)
+    assert store.load(key) is None
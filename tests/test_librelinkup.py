@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+
+import httpx
+
+from sweetwatch.sources.http import SessionStore
+from sweetwatch.sources.librelinkup import LibreLinkUpSource
+
+
+def _graph(value: int) -> dict:
+    return {
+        "data": {
+            "graphData": [
+                {"FactoryTimestamp": "2/13/2026 12:00:00 PM", "ValueInMgPerDl": value},
+                {"FactoryTimestamp": "2/13/2026 12:05:00 PM", "ValueInMgPerDl": value + 5},
+            ]
+        }
+    }
+
+
+def _handler(calls: list[str], valid_tokens: tuple[str, ...] = ("t",)):
+    def handle(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path == "/llu/auth/login":
+            return httpx.Response(
+                200,
+                json={"status": 0, "data": {"authTicket": {"token": "t"}, "user": {"id": "u"}}},
+            )
+        if request.headers.get("authorization") not in {f"Bearer {t}" for t in valid_tokens}:
+            return httpx.Response(401)
+        if request.url.path == "/llu/connections":
+            return httpx.Response(200, json={"data": [{"patientId": "a"}, {"patientId": "b"}]})
+        patient_id = request.url.path.split("/")[3]
+        return httpx.Response(200, json=_graph(100 if patient_id == "a" else 200))
+
+    return handle
+
+
+async def test_get_entries_covers_all_connections():
+    calls: list[str] = []
+    source = LibreLinkUpSource("user", "pass", max_concurrency=1)
+    source._http = httpx.AsyncClient(transport=httpx.MockTransport(_handler(calls)))
+
+    entries = await source.get_entries(count=1)
+    await source.get_entries(count=1)
+    await source.close()
+
+    assert [(e.patient_id, e.value) for e in entries] == [("a", 105), ("b", 205)]
+    # Connections are cached between calls rather than refetched
+    assert calls.count("/llu/connections") == 1
+    assert calls.count("/llu/auth/login") == 1
+
+
+async def test_get_entries_skips_items_at_or_before_watermark():
+    source = LibreLinkUpSource("user", "pass")
+    source._http = httpx.AsyncClient(transport=httpx.MockTransport(_handler([])))
+    watermark = datetime(2026, 2, 13, 12, 0, tzinfo=timezone.utc)
+
+    entries = await source.get_entries(count=10, since={"a": watermark})
+    await source.close()
+
+    assert [(e.patient_id, e.value) for e in entries] == [("a", 105), ("b", 200), ("b", 205)]
+
+
+async def test_expired_token_logs_in_again_once():
+    calls: list[str] = []
+    source = LibreLinkUpSource("user", "pass")
+    source._http = httpx.AsyncClient(transport=httpx.MockTransport(_handler(calls)))
+    source._token, source._user_id = "expired", "u"
+
+    entries = await source.get_entries(count=1)
+    await source.close()
+
+    assert [e.value for e in entries] == [105, 205]
+    assert calls.count("/llu/auth/login") == 1
+
+
+async def test_persisted_session_skips_login_and_connections(tmp_path):
+    store = SessionStore(tmp_path / "session.json")
+    first = LibreLinkUpSource("user", "pass", session_store=store)
+    first._http = httpx.AsyncClient(transport=httpx.MockTransport(_handler([])))
+    await first.get_entries(count=1)
+    await first.close()
+
+    calls: list[str] = []
+    second = LibreLinkUpSource("user", "pass", session_store=store)
+    second._http = httpx.AsyncClient(transport=httpx.MockTransport(_handler(calls)))
+    entries = await second.get_entries(count=1)
+    await second.close()
+
+    assert {e.patient_id for e in entries} == {"a", "b"}
+    assert "/llu/auth/login" not in calls and "/llu/connections" not in calls
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from sweetwatch.api.main import app
+from sweetwatch.metrics import (
+    HTTP_REQUEST_DURATION,
+    Counter,
+    Histogram,
+    MetricsMiddleware,
+    endpoint_label,
+    statement_operation,
+)
+from sweetwatch.sources.base import GlucoseEntry, Trend
+
+client = TestClient(app)
+
+
+def test_exposition_format():
+    requests = Counter("demo_requests", "Requests", ("route",))
+    requests.labels('/a"b').inc(2)
+    latency = Histogram("demo_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.labels("/x").observe(value)
+
+    assert requests.render().splitlines() == [
+        "# HELP demo_requests_total Requests",
+        "# TYPE demo_requests_total counter",
+        'demo_requests_total{route="/a\\"b"} 2',
+    ]
+    assert latency.render().splitlines()[2:] == [
+        'demo_seconds_bucket{route="/x",le="0.1"} 2',
+        'demo_seconds_bucket{route="/x",le="1"} 3',
+        'demo_seconds_bucket{route="/x",le="+Inf"} 4',
+        'demo_seconds_sum{route="/x"} 3.65',
+        'demo_seconds_count{route="/x"} 4',
+    ]
+
+
+def test_labels_stay_low_cardinality():
+    assert (
+        endpoint_label("/llu/connections/0f8fad5b-d9cb-469f-a165-70867728950e/graph")
+        == "/llu/connections/{id}/graph"
+    )
+    assert endpoint_label("/api/v1/entries.json") == "/api/v1/entries.json"
+    assert statement_operation("\n  select 1") == "SELECT"
+
+
+async def test_metrics_endpoint_reports_routes_queries_and_freshness(store_readings):
+    ts = datetime.now(timezone.utc) - timedelta(minutes=90)
+    await store_readings([GlucoseEntry(value=120, trend=Trend.STABLE, timestamp=ts)], "metrics")
+    client.get("/api/glucose/history?hours=1&patient_id=metrics")
+    client.get("/no-such-page")
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert (
+        'sweetwatch_http_request_duration_seconds_count{method="GET",'
+        'route="/api/glucose/history",status="200"}'
+    ) in body
+    assert 'route="unmatched",status="404"' in body
+    assert 'sweetwatch_db_query_duration_seconds_count{operation="SELECT"}' in body
+    freshness = next(
+        line for line in body.splitlines()
+        if line.startswith('sweetwatch_reading_freshness_seconds{patient="metrics"}')
+    )
+    assert 5390 < float(freshness.split()[-1]) < 5500
+
+
+async def test_event_streams_are_not_timed():
+    async def sse(scope, receive, send):
+        headers = [(b"content-type", b"text/event-stream; charset=utf-8")]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def noop(message):
+        pass
+
+    timed = HTTP_REQUEST_DURATION.labels("GET", "unmatched", "200")
+    before = timed.count
+    await MetricsMiddleware(sse)(scope={"type": "http", "method": "GET"}, receive=None, send=noop)
+    assert timed.count == before
+
+
+def test_streamed_exports_are_not_timed():
+    timed = HTTP_REQUEST_DURATION.labels("GET", "/api/glucose/export", "200")
+    before = timed.count
+    assert client.get("/api/glucose/export?patient_id=metrics-export").status_code == 200
+    assert timed.count == before
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+import sqlalchemy as sa
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from sweetwatch.db import migrate
+from sweetwatch.models.glucose import Base, GlucoseReading
+from sweetwatch.services.glucose import GlucoseService
+from sweetwatch.services.rollups import rollup_buckets
+from sweetwatch.sources.base import GlucoseEntry, Trend
+
+START = datetime(2025, 1, 1)
+
+
+def _legacy_readings(metadata: sa.MetaData) -> sa.Table:
+    """``glucose_readings`` as the first release's ``create_all`` left it: no unique constraint."""
+    return sa.Table(
+        "glucose_readings",
+        metadata,
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("patient_id", sa.String, nullable=False, index=True),
+        sa.Column("value", sa.Float, nullable=False),
+        sa.Column("trend", sa.Integer, nullable=True),
+        sa.Column("timestamp", sa.DateTime, nullable=False),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+    )
+
+
+def test_migrations_build_the_model_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/fresh.db")
+
+    migrate.upgrade(engine)
+    migrate.upgrade(engine)  # already at head: nothing to do
+
+    assert migrate.current_revision(engine) is not None
+    with engine.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+
+
+async def test_schema_from_create_all_is_adopted(tmp_path):
+    path = tmp_path / "legacy.db"
+    engine = create_engine(f"sqlite:///{path}")
+    metadata = sa.MetaData()
+    legacy = _legacy_readings(metadata)
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        # Without the constraint, an old sync stored one reading twice
+        connection.execute(
+            legacy.insert(),
+            [
+                {"patient_id": "p", "value": v, "trend": 3, "timestamp": ts, "created_at": ts}
+                for v, ts in [(110, START), (110, START), (115, START + timedelta(minutes=5))]
+            ],
+        )
+
+    migrate.upgrade(engine)
+
+    tables = inspect(engine).get_table_names()
+    assert "glucose_rollups" in tables and "alembic_version" in tables
+    with engine.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with AsyncSession(async_engine, expire_on_commit=False) as db:
+        entries = [
+            GlucoseEntry(value=v, trend=Trend.STABLE, timestamp=ts.replace(tzinfo=timezone.utc))
+            for v, ts in [(115, START + timedelta(minutes=5)), (120, START + timedelta(minutes=10))]
+        ]
+        stored = await GlucoseService(cache_hours=0).store_entries(
+            db, entries, patient_id="p", notify=False
+        )
+        count = await db.scalar(select(func.count()).select_from(GlucoseReading))
+        # Rollups backfilled from the adopted readings, then extended by ingest
+        hourly = await rollup_buckets(db, "hour", START, "p")
+    await async_engine.dispose()
+
+    assert [r.value for r in stored] == [120]
+    assert count == 3
+    assert [(b.count, b.min, b.max) for b in hourly] == [(3, 110, 120)]
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from sweetwatch.api.main import app
+from sweetwatch.services.glucose import glucose_service
+from sweetwatch.services.prediction import Predictor
+
+client = TestClient(app)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def test_steady_rise_is_extrapolated():
+    predictor = Predictor()
+    start = _now() - timedelta(minutes=60)
+    for i in range(13):
+        predictor.update("p1", start + timedelta(minutes=5 * i), 100 + 10 * i)  # 2 mg/dL/min
+
+    prediction = predictor.predict("p1")
+    assert prediction.rate == pytest.approx(2, abs=0.1)
+    by_horizon = {p.minutes: p for p in prediction.points}
+    assert by_horizon[30].value == pytest.approx(220 + 60, abs=5)
+    # Uncertainty widens with the horizon
+    widths = [p.high - p.low for p in prediction.points]
+    assert widths == sorted(widths)
+
+
+def test_gaps_restart_and_stale_state_is_not_served():
+    predictor = Predictor()
+    now = _now()
+    predictor.update("p1", now - timedelta(hours=3), 300)
+    assert predictor.predict("p1") is None
+
+    predictor.update("p1", now - timedelta(minutes=5), 100)
+    predictor.update("p1", now - timedelta(minutes=10), 500)  # older, ignored
+    prediction = predictor.predict()
+    assert prediction.patient_id == "p1"
+    assert prediction.value == 100 and prediction.rate == 0
+
+
+def test_prediction_endpoint():
+    now = _now()
+    for i in range(4):
+        glucose_service.predictor.update("forecast", now - timedelta(minutes=15 - 5 * i), 120)
+
+    data = client.get("/api/glucose/prediction?patient_id=forecast").json()
+    assert [p["minutes"] for p in data["points"]] == [15, 30, 60]
+    assert data["points"][0]["value"] == pytest.approx(120)
+    assert client.get("/api/glucose/prediction?patient_id=nobody").status_code == 404
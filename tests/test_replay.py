@@ -0,0 +1,83 @@
+import json
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+from sweetwatch import synthetic
+from sweetwatch.config import AccountConfig
+from sweetwatch.sources import ReplaySource, create_source
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_760_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def test_generated_readings_arrive_faster_with_acceleration():
+    clock = Clock()
+    source = ReplaySource(patients=3, speed=60, clock=clock)
+
+    first = await source.get_entries(count=2)
+    clock.now += 30  # 30 virtual minutes
+    watermarks = {e.patient_id: e.timestamp for e in first}
+    newer = await source.get_entries(count=50, since=watermarks)
+
+    assert {e.patient_id for e in first} == {"replay-0-0", "replay-0-1", "replay-0-2"}
+    assert source.reading_interval == 5.0
+    # Five-minute grid at 60x: six readings per patient in 30 wall seconds
+    assert len(newer) == 18
+    assert all(e.timestamp > watermarks[e.patient_id] for e in newer)
+    assert all(e.timestamp.timestamp() <= clock.now for e in newer)
+
+
+async def test_same_seed_replays_the_same_series():
+    a = await ReplaySource(patients=2, seed=5, clock=Clock()).get_entries(count=20)
+    b = await ReplaySource(patients=2, seed=5, clock=Clock()).get_entries(count=20)
+    c = await ReplaySource(patients=2, seed=6, clock=Clock()).get_entries(count=20)
+
+    assert a == b
+    assert [e.value for e in a] != [e.value for e in c]
+
+
+async def test_injected_errors_and_gaps():
+    failing = ReplaySource(error_rate=1.0, clock=Clock())
+    with pytest.raises(httpx.HTTPStatusError) as error:
+        await failing.get_entries()
+    assert error.value.response.status_code == 503
+
+    full = await ReplaySource(patients=4, clock=Clock()).get_entries(count=288)
+    gappy = await ReplaySource(patients=4, gap_rate=0.5, clock=Clock()).get_entries(count=288)
+    assert 0 < len(gappy) < len(full)
+    assert {e.timestamp for e in gappy} <= {e.timestamp for e in full}
+
+
+async def test_recording_is_looped(tmp_path):
+    profile = synthetic.patient_profiles(1)[0]
+    recorded = synthetic.recent_entries(
+        profile, datetime(2025, 1, 1, tzinfo=timezone.utc), 12, tag=False
+    )
+    path = tmp_path / "entries.json"
+    path.write_text(json.dumps(synthetic.nightscout_entries(recorded)))
+
+    clock = Clock()
+    source = ReplaySource(recording=path, clock=clock)
+    loop = await source.get_entries(count=12)
+    clock.now += 12 * 300
+    next_loop = await source.get_entries(count=12)
+
+    assert [e.value for e in loop] == [e.value for e in recorded]
+    assert [e.value for e in next_loop] == [e.value for e in recorded]
+    assert next_loop[0].timestamp > loop[-1].timestamp
+
+
+def test_create_source_builds_replay_from_account():
+    account = AccountConfig(id="soak", cgm_source="replay", replay_patients=3, replay_seed=2)
+
+    source = create_source(account)
+
+    assert isinstance(source, ReplaySource)
+    assert source.patient_ids == ["replay-2-0", "replay-2-1", "replay-2-2"]
@@ -0,0 +1,59 @@
+import csv
+import gzip
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from sweetwatch.db.engine import AsyncSessionLocal, async_engine
+from sweetwatch.models.glucose import GlucoseReading
+from sweetwatch.services.glucose import GlucoseService
+from sweetwatch.services.rollups import rebuild_rollups, rollup_buckets
+from sweetwatch.sources.base import GlucoseEntry, Trend
+from sweetwatch.tasks.retention import run_retention
+
+
+async def _raw_count(patient_id: str) -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(
+            select(func.count()).where(GlucoseReading.patient_id == patient_id)
+        )
+
+
+async def test_old_readings_are_compacted_into_rollups(tmp_path):
+    day = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    old, recent = day - timedelta(days=40), day - timedelta(days=2)
+    entries = [
+        GlucoseEntry(value=100 + i, trend=Trend.STABLE, timestamp=start + timedelta(minutes=15 * i))
+        for start in (old, recent)
+        for i in range(8)
+    ]
+    async with AsyncSessionLocal() as db:
+        await GlucoseService(cache_hours=0).store_entries(db, entries, patient_id="retention")
+
+    result = await run_retention(30, archive_dir=tmp_path)
+
+    assert result.deleted >= 8
+    assert await _raw_count("retention") == 8
+    rows = []
+    for archive in tmp_path.glob("readings-*.csv.gz"):
+        with gzip.open(archive, "rt") as f:
+            rows += [row for row in csv.DictReader(f) if row["patient_id"] == "retention"]
+    assert [float(row["value"]) for row in rows] == [100 + i for i in range(8)]
+
+    # Daily history still covers the compacted day, and rebuilding it is harmless
+    async with AsyncSessionLocal() as db:
+        await rebuild_rollups(db, old, old + timedelta(days=1))
+        buckets = await rollup_buckets(db, "day", old)
+    compacted = next(b for b in buckets if b.timestamp == old.replace(tzinfo=None))
+    assert (compacted.count, compacted.min, compacted.max) == (8, 100, 107)
+
+
+async def test_sqlite_profile_is_applied():
+    async with async_engine.connect() as conn:
+        pragmas = {
+            name: (await conn.exec_driver_sql(f"PRAGMA {name}")).scalar()
+            for name in ("journal_mode", "synchronous", "busy_timeout", "auto_vacuum")
+        }
+    assert pragmas == {
+        "journal_mode": "wal", "synchronous": 1, "busy_timeout": 5000, "auto_vacuum": 2
+    }
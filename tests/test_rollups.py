@@ -0,0 +1,76 @@
+import statistics
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from sweetwatch.models.glucose import GlucoseRollup
+from sweetwatch.services.glucose import GlucoseService
+from sweetwatch.services.rollups import rebuild_rollups, summarize
+from sweetwatch.sources.base import GlucoseEntry, Trend
+from sweetwatch.tasks.rollups import _rebuild
+
+
+async def _rollups(db: AsyncSession) -> list[tuple]:
+    result = await db.scalars(select(GlucoseRollup).order_by(GlucoseRollup.id))
+    return sorted(
+        (r.patient_id, r.period, r.bucket_start, r.count, r.value_sum, r.value_min, r.value_max,
+         r.below_count, r.in_range_count, r.above_count)
+        for r in result
+    )
+
+
+async def test_incremental_rollups_match_rebuild_and_summary(db):
+    service = GlucoseService(cache_hours=0)
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    start -= timedelta(hours=3)
+    values = [60, 90, 150, 200, 250, 120, 65, 180]
+    entries = [
+        GlucoseEntry(value=v, trend=Trend.STABLE, timestamp=start + timedelta(minutes=25 * i))
+        for i, v in enumerate(values)
+    ]
+
+    # Overlapping batches: duplicates must not be counted twice
+    await service.store_entries(db, entries[:5], patient_id="p1")
+    await service.store_entries(db, entries[3:], patient_id="p1")
+    incremental = await _rollups(db)
+
+    await rebuild_rollups(db, start, start + timedelta(days=1))
+    assert await _rollups(db) == incremental
+
+    summary = await summarize(db, days=2)
+    assert summary.count == len(values)
+    assert summary.mean == pytest.approx(statistics.mean(values))
+    assert summary.sd == pytest.approx(statistics.stdev(values))
+    assert summary.time_below == pytest.approx(200 / 8)
+    assert summary.time_above == pytest.approx(200 / 8)
+
+
+async def test_rebuild_leaves_the_commit_to_the_caller(db):
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    entries = [GlucoseEntry(value=100, trend=Trend.STABLE, timestamp=start)]
+    await GlucoseService(cache_hours=0).store_entries(db, entries, patient_id="p1")
+    await db.execute(delete(GlucoseRollup))
+    await db.commit()
+
+    assert await rebuild_rollups(db, start, start + timedelta(days=1)) == 2
+    await db.rollback()
+    assert await _rollups(db) == []
+
+    await rebuild_rollups(db, start, start + timedelta(days=1))
+    await db.commit()
+    assert len(await _rollups(db)) == 2
+
+
+async def test_cli_rebuild_processes_each_day_once(store_readings):
+    start = datetime(2021, 5, 1, tzinfo=timezone.utc)
+    entries = [
+        GlucoseEntry(value=100, trend=Trend.STABLE, timestamp=start + timedelta(hours=6 * i))
+        for i in range(12)
+    ]
+    await store_readings(entries, "rollup-cli")
+
+    # Starts mid-day: three days, 12 hourly and 3 daily buckets
+    written = await _rebuild(start + timedelta(hours=12), start + timedelta(days=3), "rollup-cli")
+    assert written == 15
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from sweetwatch.api.main import app
+from sweetwatch.services.glucose import GlucoseService
+from sweetwatch.sources.base import CGMSource, GlucoseEntry, Trend
+from sweetwatch.tasks.cadence import CadenceTracker
+from sweetwatch.tasks.scheduler import AccountState, SyncScheduler
+
+client = TestClient(app)
+
+
+class FakeSource(CGMSource):
+    active = 0
+    peak = 0
+
+    def __init__(self, trend: Trend) -> None:
+        self.trend = trend
+        self.calls = 0
+
+    async def get_current(self) -> GlucoseEntry | None:
+        return None
+
+    async def get_entries(self, count: int = 10, since=None) -> list[GlucoseEntry]:
+        FakeSource.active += 1
+        FakeSource.peak = max(FakeSource.peak, FakeSource.active)
+        await asyncio.sleep(0.01)
+        FakeSource.active -= 1
+        self.calls += 1
+        ts = datetime.now(timezone.utc) - timedelta(seconds=self.calls)
+        return [GlucoseEntry(value=100, trend=self.trend, timestamp=ts)]
+
+    async def close(self) -> None:
+        pass
+
+
+async def test_scheduler_runs_all_accounts_with_bounded_workers():
+    sources = {f"acct-{i}": FakeSource(Trend.STABLE if i else Trend.RISING) for i in range(6)}
+    scheduler = SyncScheduler(
+        {name: GlucoseService(source=src, patient_id=name) for name, src in sources.items()},
+        workers=2,
+        interval_stable=0.2,
+        interval_changing=0.05,
+        jitter=0.1,
+        initial_delay=0,
+    )
+
+    await scheduler.start()
+    await asyncio.sleep(0.5)
+    status = scheduler.status()
+    await scheduler.stop()
+
+    assert all(src.calls >= 1 for src in sources.values())
+    assert FakeSource.peak <= 2
+    # The changing account is polled on the shorter interval
+    assert sources["acct-0"].calls > sources["acct-1"].calls
+    assert status["accounts"] == 6
+    assert {a["id"] for a in status["account_status"]} == set(sources)
+
+
+def test_cadence_tracker_learns_interval_phase_and_lag():
+    tracker = CadenceTracker(cadence=300)
+    start = 1_700_000_000.0
+    # Backlog sets the phase but yields no lag
+    assert tracker.observe([start + 60 * i for i in range(5)], seen_at=start + 600) is None
+    assert tracker.cadence == 60 and tracker.last_reading == start + 240
+    # Sensor gaps are not mistaken for cadence
+    assert tracker.observe([start + 240 + 3600], seen_at=start + 3850) == 10
+    assert tracker.cadence == 60
+    assert tracker.next_arrival() == start + 240 + 3600 + 60 + 10
+
+
+def test_cadence_delay_polls_after_expected_reading_and_backs_off():
+    scheduler = SyncScheduler({}, interval_stable=180, mode="cadence", cadence_margin=5)
+    state = AccountState("a", GlucoseService(source=FakeSource(Trend.STABLE)), 180)
+    now = time.time()
+
+    state.cadence["p"] = CadenceTracker(cadence=60, last_reading=now - 50)
+    assert 14 < scheduler._cadence_delay(state) <= 15
+
+    # The reading is late: retry with exponential backoff per empty poll
+    state.cadence["p"].last_reading = now - 70
+    state.misses = 2
+    assert scheduler._cadence_delay(state) == 20
+    # Offline sensors fall back to the trend interval
+    state.cadence["p"].last_reading = now - 3600
+    assert scheduler._cadence_delay(state) is None
+
+
+def test_manual_sync_runs_the_scheduler_accounts(monkeypatch):
+    # With ACCOUNTS_FILE the shared service has no source of its own
+    sources = {name: FakeSource(Trend.STABLE) for name in ("manual-a", "manual-b")}
+    scheduler = SyncScheduler(
+        {
+            name: GlucoseService(source=src, patient_id=name, min_sync_interval=0)
+            for name, src in sources.items()
+        }
+    )
+    monkeypatch.setattr(app.state, "scheduler", scheduler, raising=False)
+
+    response = client.post("/api/glucose/sync")
+    assert response.status_code == 200
+    assert (response.json()["synced"], response.json()["freshness"]) == (2, "fresh")
+    assert [src.calls for src in sources.values()] == [1, 1]
+
+    assert client.post("/api/glucose/sync?account_id=manual-b").status_code == 200
+    assert [src.calls for src in sources.values()] == [1, 2]
+    assert client.post("/api/glucose/sync?account_id=nobody").status_code == 404
@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+from sweetwatch.profiling import StartupProfile, import_times
+
+# Loaded on first use only, never by importing the app
+LAZY = ("anthropic", "numpy", "httpx", "alembic")
+
+
+def test_app_import_leaves_heavy_dependencies_unloaded():
+    code = (
+        f"import sys, sweetwatch.api.main; print(','.join(m for m in {LAZY!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+
+def test_import_times_and_phase_report():
+    total, packages = import_times("sweetwatch.config")
+    assert total > 0
+    assert {"sweetwatch", "pydantic"} <= set(packages)
+    assert abs(sum(packages.values()) - total) < 1e-6
+
+    profile = StartupProfile()
+    with profile.phase("migrations"):
+        pass
+    profile.record("warm cache", 0.25)
+    report = profile.report()
+    assert [name for name, _ in profile.phases] == ["migrations", "warm cache"]
+    assert "warm cache" in report and "250.0 ms" in report
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from sweetwatch import synthetic
+from sweetwatch.sources.base import Trend
+from sweetwatch.sources.librelinkup import LibreLinkUpSource
+from sweetwatch.sources.nightscout import NightscoutSource
+
+START = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+
+def test_series_is_deterministic_and_independent_of_the_range():
+    profile = synthetic.patient_profiles(2, seed=7)[1]
+    week = synthetic.entries(profile, START, START + timedelta(days=7))
+    middle = synthetic.entries(
+        profile, START + timedelta(days=2, hours=5), START + timedelta(days=4)
+    )
+
+    assert week == synthetic.entries(profile, START, START + timedelta(days=7))
+    assert middle == [
+        e
+        for e in week
+        if START + timedelta(days=2, hours=5) <= e.timestamp < START + timedelta(days=4)
+    ]
+    assert week != synthetic.entries(
+        synthetic.patient_profiles(2, seed=8)[1], START, START + timedelta(days=7)
+    )
+
+
+def test_series_has_gaps_trends_and_sensor_range():
+    profile = synthetic.patient_profiles(1, interval_minutes=1)[0]
+    readings = synthetic.entries(profile, START, START + timedelta(days=30))
+    gaps = [(b.timestamp - a.timestamp).total_seconds() for a, b in zip(readings, readings[1:])]
+
+    assert 0.9 * 30 * 1440 < len(readings) < 30 * 1440
+    assert min(gaps) == 60 and max(gaps) > 600
+    assert {e.trend for e in readings} >= set(synthetic.TREND_ARROWS) - {Trend.FALLING_FAST}
+    assert all(synthetic.SENSOR_MIN <= e.value <= synthetic.SENSOR_MAX for e in readings)
+
+
+def test_recent_entries_end_at_now():
+    profile = synthetic.patient_profiles(1)[0]
+    now = START + timedelta(days=3, minutes=17)
+    recent = synthetic.recent_entries(profile, now, 12)
+
+    assert len(recent) == 12
+    assert recent[-1].timestamp <= now < recent[-1].timestamp + timedelta(hours=3)
+
+
+async def test_payloads_parse_back_to_the_same_readings():
+    profile = synthetic.patient_profiles(1)[0]
+    readings = synthetic.entries(profile, START, START + timedelta(hours=12), tag=False)
+    expected = [(e.value, e.trend, e.timestamp) for e in readings]
+
+    parsed = NightscoutSource._parse_entries(synthetic.nightscout_entries(readings))
+    assert [(e.value, e.trend, e.timestamp) for e in reversed(parsed)] == expected
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/llu/auth/login":
+            auth = {"authTicket": {"token": "t"}, "user": {"id": "u"}}
+            return httpx.Response(200, json={"status": 0, "data": auth})
+        if request.url.path == "/llu/connections":
+            return httpx.Response(200, json={"data": [{"patientId": "p"}]})
+        return httpx.Response(200, json=synthetic.librelinkup_graph(readings))
+
+    source = LibreLinkUpSource("user", "pass")
+    source._http = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+    parsed = await source.get_entries(count=len(readings))
+    await source.close()
+    assert [(e.value, e.trend, e.timestamp) for e in parsed] == expected
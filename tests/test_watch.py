@@ -0,0 +1,63 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from sweetwatch.api.main import app
+from sweetwatch.services.cache import CachedReading
+from sweetwatch.services.watch import watch_payload
+from sweetwatch.sources.base import GlucoseEntry, Trend
+
+client = TestClient(app)
+
+
+def _readings(n: int, step: int = 5) -> list[CachedReading]:
+    # Newest first, as history returns them
+    now = datetime(2024, 6, 1, 12, 0)
+    return [
+        CachedReading(i, "p", 100.4 + i, 4, now - timedelta(minutes=step * i)) for i in range(n)
+    ]
+
+
+def test_payload_layout():
+    payload = watch_payload(_readings(4), max_points=10)
+    t = int(datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc).timestamp())
+    assert payload == [1, t, 100, 4, [300, 300, 300], [101, 102, 103], 0]
+    assert len(json.dumps(payload, separators=(",", ":"))) < 60
+
+
+def test_sparkline_is_thinned_to_max_points():
+    version, t, _, _, deltas, values, _ = watch_payload(_readings(37), max_points=12)
+    assert len(deltas) == len(values) == 12
+    # Every third reading; offsets still add up to the oldest point's age
+    assert set(deltas) == {900} and sum(deltas) == 36 * 300
+    assert watch_payload(_readings(5), max_points=0)[4:] == [[], [], 0]
+
+
+async def test_watch_endpoint_is_compact_and_conditional(store_readings):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    entries = [
+        GlucoseEntry(value=150.6, trend=Trend.RISING, timestamp=now - timedelta(minutes=5 * i))
+        for i in range(6)
+    ]
+    await store_readings(entries, "watch")
+
+    url = "/api/glucose/watch?hours=1&patient_id=watch"
+    response = client.get(url)
+    version, t, value, trend, deltas, values, stale = response.json()
+    assert version == 1 and t >= int(now.timestamp()) and stale == 0
+    assert all(isinstance(v, int) for v in (value, trend, *deltas, *values))
+    assert len(deltas) == len(values) and min(deltas) >= 0
+    etag = response.headers["etag"]
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+async def test_watch_falls_back_to_the_last_reading_flagged_stale(store_readings):
+    old = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(hours=5)
+    entry = GlucoseEntry(value=98, trend=Trend.FALLING, timestamp=old)
+    await store_readings([entry], "watch-stale")
+
+    response = client.get("/api/glucose/watch?hours=1&patient_id=watch-stale")
+    assert response.status_code == 200
+    assert response.json() == [1, int(old.timestamp()), 98, 2, [], [], 1]